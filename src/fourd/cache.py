@@ -0,0 +1,78 @@
+#  fourd - cache
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+
+# name of the manifest file of a cache directory #
+cache_manifest = 'manifest.json'
+
+# size of the blocks read while hashing a file #
+cache_block = 16 * 1024 * 1024
+
+def cache_hash( path ):
+    '''
+    Compute the hash of the content of a file, reading it block by block
+    '''
+    digest = hashlib.sha256()
+    with open( path, mode='rb' ) as source:
+        for block in iter( lambda: source.read( cache_block ), b'' ):
+            digest.update( block )
+    return digest.hexdigest()
+
+def cache_load( cache ):
+    '''
+    Read the manifest of a cache directory, creating the directory if
+    needed. An empty manifest is returned for a new cache.
+    '''
+    os.makedirs( cache, exist_ok=True )
+    try:
+        with open( os.path.join( cache, cache_manifest ), mode='r' ) as manifest:
+            return json.load( manifest )
+    except FileNotFoundError:
+        return { 'settings' : None, 'files' : {} }
+
+def cache_save( cache, manifest ):
+    '''
+    Write the manifest of a cache directory, replacing the previous one
+    only once the new one is complete
+    '''
+    path = os.path.join( cache, cache_manifest )
+    with open( path + '.tmp', mode='w' ) as stream:
+        json.dump( manifest, stream, indent=1 )
+    os.replace( path + '.tmp', path )
+
+def cache_entry( path, entry=None ):
+    '''
+    Return the manifest entry of an input file, along with whether its
+    content differs from the one the given previous entry was made of. The
+    content is only hashed again when the size or the modification time of
+    the file changed.
+    '''
+    status = os.stat( path )
+    if entry is not None and entry['size'] == status.st_size and entry['mtime'] == status.st_mtime_ns:
+        return entry, False
+
+    digest = cache_hash( path )
+    if entry is not None and entry['size'] == status.st_size and entry['hash'] == digest:
+        entry = dict( entry, mtime=status.st_mtime_ns )
+        return entry, False
+
+    return { 'size' : status.st_size, 'mtime' : status.st_mtime_ns, 'hash' : digest }, True
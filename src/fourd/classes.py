@@ -0,0 +1,128 @@
+#  fourd - classes
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import numpy as np
+
+# colour of the classes that are not listed #
+class_unlisted = ( 7, 10, 12 )
+
+# colour of the reserved and user defined classes (19 and above) #
+class_user = ( 255, 255, 255 )
+
+# default colours of the LAS classes - this can be changed to address your specific values #
+class_default = {
+     0 : ( 255, 255, 255 ), # created, never classified
+     1 : ( 255, 255, 255 ), # unclassified
+     2 : ( 209, 224, 224 ), # ground
+     3 : (  70, 225, 100 ), # low vegetation
+     4 : (  70, 199, 100 ), # medium vegetation
+     5 : (  70, 152, 100 ), # high vegetation
+     6 : ( 241, 182,  88 ), # building
+     7 : (   0,   0, 156 ), # low point
+     8 : ( 255, 255, 255 ), # reserved
+     9 : (   0, 201, 255 ), # water
+    10 : ( 211, 213, 215 ), # rail
+    11 : ( 229,   0,   0 ), # road
+    12 : ( 255, 255, 255 ), # reserved
+    13 : (  32,   0, 124 ), # wire - guard
+    14 : (  32,   0, 124 ), # wire - conductor
+    15 : ( 248, 240,  92 ), # transmission tower
+    16 : (  32,   0, 124 ), # wire - connector
+    17 : ( 234, 231, 165 ), # bridge deck
+}
+
+def class_load( path ):
+    '''
+    Read a class-to-colour file, either JSON or TOML, and return its
+    content as a dictionary. Keys are class codes, or "default" for the
+    colour of the classes that are not listed, and values are [R, G, B]
+    '''
+    if os.path.splitext( path )[1].lower() == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open( path, mode='rb' ) as source:
+            return tomllib.load( source )
+
+    with open( path, mode='r' ) as source:
+        return json.load( source )
+
+def class_colour( colour, key ):
+    '''
+    Check and return a colour given as [R, G, B] in a class-to-colour file
+    '''
+    if len( colour ) != 3 or any( int( c ) < 0 or int( c ) > 255 for c in colour ):
+        raise ValueError( f'invalid colour for class {key} : {colour}' )
+    return tuple( int( c ) for c in colour )
+
+def class_lut( path=None ):
+    '''
+    Build the 256 x 3 lookup table giving the colour of each classification
+    value, either from the default colours or from a class-to-colour file,
+    in which case only the listed classes are coloured
+    '''
+    lut = np.empty( ( 256, 3 ), dtype=np.uint8 )
+
+    if path is None:
+        lut[:] = class_unlisted
+        lut[19:] = class_user
+        for code, colour in class_default.items():
+            lut[code] = colour
+        return lut
+
+    table = class_load( path )
+    lut[:] = class_colour( table.get( 'default', class_unlisted ), 'default' )
+    for key, colour in table.items():
+        if key == 'default':
+            continue
+        if not 0 <= int( key ) <= 255:
+            raise ValueError( f'invalid class code : {key}' )
+        lut[int( key )] = class_colour( colour, key )
+    return lut
+
+def class_counts( classes, counts=None ):
+    '''
+    Accumulate the number of points of each classification value
+    '''
+    chunk_counts = np.bincount( classes, minlength=256 )
+    if counts is None:
+        return chunk_counts
+    counts += chunk_counts
+    return counts
+
+def class_counts_merge( counts, other ):
+    '''
+    Merge the per-class point counts of two parts of a conversion, any of
+    them being possibly None
+    '''
+    if other is None:
+        return counts
+    if counts is None:
+        return other
+    return counts + other
+
+def class_report( counts ):
+    '''
+    Display the number of points of each classification value found
+    '''
+    for code in np.flatnonzero( counts ):
+        print( f'class {code:3d} : {counts[code]} points' )
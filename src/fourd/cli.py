@@ -0,0 +1,65 @@
+#  fourd - cli
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import argparse
+import importlib
+import sys
+
+# subcommands and the modules of their tools, imported only when run #
+cli_commands = {
+    'las'       : ( 'fourd.tools.las_to_uv3'      , 'convert a LAS file to uv3' ),
+    'las-batch' : ( 'fourd.tools.batch_las_uv3'   , 'convert a folder of LAS files to a single uv3 file' ),
+    'rgb'       : ( 'fourd.tools.rgb_from_geotiff', 'convert a RGB geotiff to uv3 points' ),
+    'z'         : ( 'fourd.tools.z_from_geotiff'  , 'convert a geotiff to uv3 points coloured by their value' ),
+    'rgbz'      : ( 'fourd.tools.rgb_z_uv3'       , 'convert a RGB geotiff to uv3 points with heights from a DEM' ),
+    'poly'      : ( 'fourd.tools.tiff_poly_uv3'   , 'convert a RGB geotiff to uv3 triangles' ),
+    'mesh'      : ( 'fourd.tools.mesh_to_uv3'     , 'convert a mesh to uv3 triangles' ),
+    'sort'      : ( 'fourd.tools.uv3_sort'        , 'sort a uv3 file along a morton curve' ),
+    'info'      : ( 'fourd.tools.uv3_info'        , 'inspect and check a uv3 file' ),
+    'diff'      : ( 'fourd.tools.uv3_diff'        , 'compare two uv3 files' ),
+    'compress'  : ( 'fourd.tools.uv3_compress'    , 'compress or decompress a uv3 file' ),
+}
+
+def cli_run( command, argv=None ):
+    '''
+    Run the tool of a subcommand with the given arguments, importing its
+    module, and so its own dependencies only, at this time. The end
+    message of the tool is returned
+    '''
+    module = importlib.import_module( cli_commands[command][0] )
+    return module.main( argv, prog='fourd ' + command )
+
+def main( argv=None ):
+    '''
+    Entry point of the fourd command
+    '''
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog='fourd', formatter_class=argparse.RawDescriptionHelpFormatter, epilog='commands:\n' + '\n'.join( '  %-10s %s' % ( name, command[1] ) for name, command in cli_commands.items() ) )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( 'command', choices=list( cli_commands ), metavar='command', help='tool to run, see below' )
+    pm_argparse.add_argument( 'arguments', nargs=argparse.REMAINDER, help='arguments of the tool, see fourd <command> -h' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # exit script #
+    sys.exit( cli_run( pm_args.command, pm_args.arguments ) )
@@ -0,0 +1,148 @@
+#  fourd - colormaps
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# matplotlib palettes sampled on palette_size colours, as 8 bits rgb triplets #
+colormaps_tables = {
+    'inferno' : (
+        '00000300000601010b02021004031606041b0906210d08280f092d130a34160b391a0b401f0c47220b4c270b522b0a56'
+        '300a5c34095f3909623e0966410967460a694a0b6a4f0d6c530e6d570f6d5b116e5f126e63146e66156e6b176e70196e'
+        '731a6d781c6d7b1d6c801f6b85206a88216a8d23699024689526669928649c2963a12b61a42c60a92e5eac2f5cb1315a'
+        'b53357b83556bd3753bf3951c43c4ec83e4bcb4049cf4446d14643d54940d74b3edb4f3ade5337e05634e45a31e65c2e'
+        'e8612beb6527ed6825ef6d21f0701ef2751af47a16f57e14f78310f8870df98c09f99008fa9506fb9b06fb9e07fba40a'
+        'fba80dfbae12fbb318fbb71cfabd23fac128f9c72ff8cb34f7d13cf5d745f4db4bf3e056f2e45df1e968f1ee74f1f27d'
+        'f3f689f5f891f9fc9dfcfea4'
+    ),
+    'viridis' : (
+        '44015444035745085b460b5e470f62471265471669481a6c481d6f482172482374472777472b7a462d7c46317e45347f'
+        '443781433a83423d844141864043873f47883e49893d4c893b508a3a528b39558b38578c365a8c355c8c345f8d32628d'
+        '31648d30678d2f698d2e6c8e2d6f8e2c718e2b748e2a768e29798e287b8e277d8e26808e25828e24858d23878d22898d'
+        '218c8d218e8c20918c1f938b1f968b1e998a1e9a891e9d881e9f881fa28620a48521a78423a98225ab8128ae7f2ab07e'
+        '2eb27c32b57a35b77839b9763dbb7442be7147c06e4bc26c51c46855c6665bc86260c96067cc5c6dce5872cf5579d151'
+        '7ed24e86d4498dd64492d7419ad83c9fd938a7db33addc30b5dd2bbdde26c2df22cae01ecfe11cd7e219dfe318e4e318'
+        'ece41af1e51cf8e621fde724'
+    ),
+    'magma' : (
+        '00000300000601010b02020f04041506051909071f0c09260e0a2a110c31140d35170f3c1b10441e1049221150251155'
+        '2a115c2d1060321067370f6c3b0f6f400f73430f754810784d117a50127b55137d58157e5d177e60187f651a80691c80'
+        '6c1d80711f817420817922817e24818125818526818928818d2980922b80952c809a2d7f9e2e7ea3307ea6317dab337c'
+        'b0347bb3357ab83778bb3877c03a75c53c74c83d72cd3f70d0416fd4436dd7456bdc4869e04b66e24d65e65162e85461'
+        'ec585fee5d5df0605df3655cf4685bf66e5bf7735cf8775cf97d5dfa805efb8660fb8a62fc9064fd9567fd9969fd9f6c'
+        'fda26ffea873feae76feb179feb77dfebb80fec085fec488fec98dfdcf92fdd295fdd89afddc9dfde1a3fce6a8fceaac'
+        'fcf0b1fcf3b5fbf9bbfbfcbf'
+    ),
+    'plasma' : (
+        '0c07861306891b068c1f058e2505912905932f04953404983804993d039b40039c45039e4a02a04e02a15201a35601a3'
+        '5a00a55e00a56200a66700a76a00a76f00a87200a87601a87b02a87e03a78204a78506a68908a58c0aa4900ea39511a1'
+        '9713a09b179e9e199ca21c9aa51f97a82296ac2593ae2791b12b8fb52e8cb7308aba3487bc3685bf3982c13c80c43f7e'
+        'c7427bc94579cc4876ce4a75d14e72d3516fd5536dd7576bd95969dc5d66dd5f65df6262e26660e3685ee56c5be76e5a'
+        'e97257eb7654ec7853ee7c50ef7e4ef1824cf38649f48947f58d45f68f43f79341f8963ff99a3cfa9f3afba238fca635'
+        'fca934fcad31fdb22ffdb52dfdb92bfdbc2afdc128fdc427fcc926fcce25fbd124fad624f9d924f8df24f6e425f5e726'
+        'f3ec26f2f026f0f525eff821'
+    ),
+    'cividis' : (
+        '00224d00235000265500275900295e002a62002c67002f6d00307000317008337011356f18376f1c386e213b6e243c6e'
+        '283e6d2b3f6d2f426c32446c35456c38476c3a486b3e4b6b414d6b434e6b46506b48516b4b546c4d556c4f576c52596c'
+        '545a6c575d6d595e6d5b606e5e626e60646e62666f64676f676970696b716b6d716e6f726f7073727374747475767676'
+        '7978777a7a777d7c787f7d788280788582788683788986788b87788e8978908b77938d77968f779891769b93769d9575'
+        'a09775a39a74a59b73a89e73aa9f72ada271b0a470b2a66fb5a86eb7aa6dbaac6cbcae6bbfb06ac3b368c5b567c8b765'
+        'cab964cdbc62d0be60d3c05fd6c35dd8c45bdbc759dec957e1cc54e4ce51e6d04fead34cecd54aefd846f3da42f5dc3f'
+        'f9df3afbe136fde534fde737'
+    ),
+    'turbo' : (
+        '30123b32184a36215f38266c3b2f7f3c358b3f3d9c4145ab424bb54353c24458cb4560d64668e0466de64675ed467af2'
+        '4682f84587fb438efd4096fe3e9bfe39a2fc36a8f931aff52bb6ef28bbeb23c2e420c6df1ccdd71ad1d218d7ca17dcc2'
+        '18e0bd1ae4b61de7b122eba929eea02ff09a38f4913ff58a4af88055fa765dfb6f69fd6571fd5f7cfe5684fe508efe48'
+        '98fe429efd3ea6fb3aacfa37b3f835bbf434c0f233c8ee33cdeb34d4e735d8e335dfde36e5d838e8d538edcf39f0cb3a'
+        'f4c43af8be39f9ba38fbb336fcae34fda631fe9e2efe982cfd8f28fc8926fb8022fa7a1ff7711bf56817f36315ef5a11'
+        'ed550fe94d0de5460ae24209dd3c07d93806d43205d02f04c92903c32402be2102b61c01b11901a91501a011019a0e01'
+        '910b018b09018106027a0402'
+    ),
+    'twilight' : (
+        'e1d8e2dfd9e1dbd8dfd7d7ddd2d5dacbd2d7c5cfd4bccad1b4c7ceadc3cca5bfca9ebbc897b6c790b2c589acc483a8c3'
+        '7ea3c2799ec1749ac17095c06c8fbf6989be6684bd647fbc637abb6174ba606eb85f68b65f62b45e5cb25e56af5e50ac'
+        '5e4aa95d43a45c3da05c379b5b3196592b90572589552182521b784e18704a156746135f4212573e114f3a1048361041'
+        '33113c3012383013363311373711383c113b41113d4612404c13425214455916475f174a67194c6e1b4e751e4f7b204f'
+        '8123508727508d2c5093304f98344f9c394fa13e4fa5434fa94950ad4f50b15551b45a53b76054ba6657bc6c59bf725c'
+        'c17960c37f65c5866ac68c6fc89275c9987bcb9f84cca58cceab94cfb19cd1b7a4d3bcadd6c1b5d8c7c0dbccc8ddd0cf'
+        'ded3d5e0d6dae1d8dee1d8e1'
+    ),
+    'terrain' : (
+        '3333992f399f2c40a62847ad254eb42155bb1e5cc21a63c91769cf1470d61077dd0d7ee40985eb068cf20293f90099fc'
+        '009eed00a4dd00a9ce00aebe00b3af00b89f00bd9000c28100c87102cc660cce6817d06a21d26c2bd46e36d67040d872'
+        '4ada7455dd775fdf7969e17b73e37d7ee57f88e78192e9839deb85a7ed87b1ef89bcf18bc6f38dd0f58fdaf791e5f993'
+        'effb95f9fd97fcfb97f7f594f2ee92ece78fe7e18ce2da89ddd486d8cd84d3c681cec07ec8b97bc3b379beac76b9a573'
+        'b49f70af986da9926ba48b689f85659a7e6295775f90715d8b6a5a856457805d548360598867608d6d6792746e977b74'
+        '9d817ba28882a78e89ac9590b19c97b6a29ebca9a5c1afacc6b6b3cbbdb9d0c3c0d5cac7dad0cee0d7d5e5dedceae4e3'
+        'efebeaf4f1f1f9f8f8ffffff'
+    ),
+    'gist_earth' : (
+        '00000001003e03005a050172060774080d740a13750c19750d1f760f2576112b77123077143678163b78184179194679'
+        '1b4b7a1d507a1e557a205a7b225f7b24637c25677c276b7d296f7d2a737e2c787e2e7c7f30807f31817c328379338476'
+        '34867236876f37886c388a69398b663a8d633c8e5f3d905c3e91593f935641945342965043974d449949489a464e9c47'
+        '539d48599f4a5fa04b65a24d6aa34e70a45076a5517ba6527fa85383a95487aa558cab5590ac5694ad5798ae589daf59'
+        'a1b159a5b25aa9b35baeb45cb2b55db6b65db7b45eb9b25fbab060bbae61bcab62bda962bea763bfa564c0a367c3a46d'
+        'c6a573c9a77acca980ceac86d1ae8dd4b093d7b299dab6a0ddbaa6e0bdade3c2b5e5c8bce8cdc4ebd2cceed7d4f1dddb'
+        'f4e4e3f7ecebfaf3f3fdfafa'
+    ),
+    'gnuplot' : (
+        '0000001900102400202c003033004039004f3e005e43006d48007b4c00895100975500a35800af5c00bb5f00c56300cf'
+        '6601d86901e06c01e76f01ee7202f37502f77802fb7a03fd7d03fe8004fe8204fe8505fc8705f98a06f58c07f08e07eb'
+        '9008e49309dc950ad4970bca990cc09b0db59d0eaaa00f9da21090a41282a61374a81466aa1657ab1747ad1938af1b28'
+        'b11d18b31e08b52000b72200b82400ba2700bc2900be2b00bf2e00c13000c33300c43500c63800c83b00c93e00cb4100'
+        'cd4400ce4800d04b00d14f00d35200d45600d65a00d75e00d96200da6600dc6a00dd6e00df7300e07700e27c00e38100'
+        'e58600e68b00e89000e99600ea9b00eca100eda700efad00f0b300f1b900f3bf00f4c600f5cc00f7d300f8da00f9e100'
+        'fbe800fcef00fdf700ffff00'
+    ),
+    'jet' : (
+        '00007f00008b0000960000a20000ae0000ba0000c50000d10000dd0000e80000f40000ff0000ff0006ff0010ff001bff'
+        '0025ff002fff0039ff0044ff004eff0058ff0063ff006dff0077ff0082ff008cff0096ff00a0ff00abff00b5ff00bfff'
+        '00caff00d4ff00defc02e9f30bf3eb13fde31bffda24ffd22cffca34ffc23dffb945ffb14dffa955ffa05eff9866ff90'
+        '6eff8777ff7f7fff7787ff6e90ff6698ff5ea0ff55a9ff4db1ff45b9ff3dc2ff34caff2cd2ff24daff1be3ff13ebff0b'
+        'f3f802fcef00ffe500ffdc00ffd200ffc900ffbf00ffb600ffac00ffa300ff9900ff8f00ff8600ff7c00ff7300ff6900'
+        'ff6000ff5600ff4d00ff4300ff3a00ff3000ff2700ff1d00ff1300f40a00e80000dd0000d10000c50000ba0000ae0000'
+        'a200009600008b00007f0000'
+    ),
+    'gray' : (
+        '0000000202020505050707070a0a0a0c0c0c0f0f0f1212121414141717171919191c1c1c1e1e1e212121242424262626'
+        '2929292b2b2b2e2e2e3030303333333636363838383b3b3b3d3d3d4040404242424545454848484a4a4a4d4d4d4f4f4f'
+        '5252525555555757575a5a5a5c5c5c5f5f5f6161616464646767676969696c6c6c6e6e6e717171737373767676797979'
+        '7b7b7b7e7e7e8080808383838585858888888b8b8b8d8d8d9090909292929595959797979a9a9a9d9d9d9f9f9fa2a2a2'
+        'a4a4a4a7a7a7aaaaaaacacacafafafb1b1b1b4b4b4b6b6b6b9b9b9bcbcbcbebebec1c1c1c3c3c3c6c6c6c8c8c8cbcbcb'
+        'cececed0d0d0d3d3d3d5d5d5d8d8d8dadadadddddde0e0e0e2e2e2e5e5e5e7e7e7eaeaeaecececefefeff2f2f2f4f4f4'
+        'f7f7f7f9f9f9fcfcfcffffff'
+    ),
+    'bone' : (
+        '00000002020304040606060909090c0b0b0f0d0d120f0f1512121914141c16161f1818221b1b251d1d281f1f2b21212f'
+        '2424322626352828382a2a3b2d2d3e2f2f4131314433334836364b38384e3a3a513c3c543f3f5741415a43435e454561'
+        '4848644a4a674c4c6a4e4e6d515170535473555775575a775a5d7a5c607c5e637e606680636983656c85677087697389'
+        '6c768c6e798e707c90727f927582957785977988997b8b9b7e8e9e8092a08295a28498a4879ba7899ea98ba1ab8da4ad'
+        '90a7b092aab294adb497b1b699b4b99bb7bb9dbabda0bdbfa2c0c2a4c3c4a6c6c6aac8c8aecbcbb1cdcdb5cfcfb8d1d1'
+        'bcd4d4bfd6d6c3d8d8c6dadacaddddcddfdfd1e1e1d4e3e3d8e6e6dbe8e8dfeaeae2ecece6efefe9f1f1edf3f3f0f5f5'
+        'f4f8f8f7fafafbfcfcffffff'
+    ),
+    'Reds' : (
+        'fff5f0fef3edfef1ebfeefe8feeee6feece3feeae1fee9dffee7dcfee5dafee4d7fee2d5fee0d2fddecffddbcbfdd8c7'
+        'fdd5c3fdd2bffdcfbbfcccb7fcc9b3fcc6affcc3abfcc0a7fcbda3fcbaa0fcb69cfcb398fcb094fcac90fca98dfca689'
+        'fca285fc9f81fc9c7dfc997afc9576fc9272fb8f6ffb8b6bfb8868fb8565fb8262fb7f5ffb7b5bfb7858fb7555fb7252'
+        'fb6e4efb6b4bfa6848f96446f86043f75c41f6583ff5553cf4513af34d37f24935f14532f04230ef3e2eee3a2beb372a'
+        'e83429e53228e22f26e02c25dd2924da2623d72422d42120d11e1fce1b1ecb181dc8171cc5161bc2161bbf151abc1419'
+        'b91319b61318b31217b01117ad1016a91016a60f15a30e149e0d14990c13940a128f09128a08118507108006107b040f'
+        '76030e71020e6c010d67000c'
+    ),
+}
@@ -0,0 +1,104 @@
+#  fourd - gps
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+# Borrowed and Adapted from Aaron Schmocker [aaron@duckpond.ch]
+# Source: http://www.swisstopo.admin.ch/internet/swisstopo/en/home/topics/survey/sys/refsys/projections.html (see PDFs under "Documentation")
+# github script: https://github.com/hurielreichel/Swisstopo-WGS84-LV03/blob/master/scripts/py/wgs84_ch1903.py
+class GPSConverter(object):
+    '''
+    GPS Converter class which is able to perform convertions between the 
+    CH1903 and WGS84 system. Coordinates are NumPy arrays (or scalars) and
+    the polynomials are evaluated on whole arrays, term by term in the
+    order of the scalar formulas. Powers are computed as products instead
+    of calls to the C library pow(), which is not always correctly
+    rounded: results match the scalar formulas but for rare values that
+    differ by at most two units in the last place.
+    '''
+    # Axiliary values (% Bern)
+    def CHtoAux(self, y, x):
+        y_aux = (np.asarray(y, dtype=np.float64) - 2600000) / 1000000
+        x_aux = (np.asarray(x, dtype=np.float64) - 1200000) / 1000000
+        return y_aux, x_aux
+
+    # Convert auxiliary y/x/h to WGS height
+    def AuxtoWGSheight(self, y_aux, x_aux, h, out=None):
+        out = np.add(h, 49.55, out=out)
+        out -= 12.60 * y_aux
+        out -= 22.64 * x_aux
+        return out
+
+    # Convert auxiliary y/x to WGS lat
+    def AuxtoWGSlat(self, y_aux, x_aux, out=None):
+        y_aux2 = y_aux * y_aux
+        # terms summed in the order of the scalar formula
+        out = np.multiply(x_aux, 3.238272, out=out)
+        out += 16.9023892
+        out -= 0.270978 * y_aux2
+        out -= 0.002528 * (x_aux * x_aux)
+        out -= 0.0447 * y_aux2 * x_aux
+        out -= 0.0140 * (x_aux * x_aux * x_aux)
+        # Unit 10000" to 1" and convert seconds to degrees (dec)
+        out *= 100
+        out /= 36
+        return out
+
+    # Convert auxiliary y/x to WGS long
+    def AuxtoWGSlng(self, y_aux, x_aux, out=None):
+        # terms summed in the order of the scalar formula
+        out = np.multiply(y_aux, 4.728982, out=out)
+        out += 2.6779094
+        out += 0.791484 * y_aux * x_aux
+        out += 0.1306 * y_aux * (x_aux * x_aux)
+        out -= 0.0436 * (y_aux * y_aux * y_aux)
+        # Unit 10000" to 1" and convert seconds to degrees (dec)
+        out *= 100
+        out /= 36
+        return out
+
+    # Convert CH y/x/h to WGS height
+    def CHtoWGSheight(self, y, x, h):
+        y_aux, x_aux = self.CHtoAux(y, x)
+        return self.AuxtoWGSheight(y_aux, x_aux, h)
+
+    # Convert CH y/x to WGS lat
+    def CHtoWGSlat(self, y, x):
+        y_aux, x_aux = self.CHtoAux(y, x)
+        return self.AuxtoWGSlat(y_aux, x_aux)
+
+    # Convert CH y/x to WGS long
+    def CHtoWGSlng(self, y, x):
+        y_aux, x_aux = self.CHtoAux(y, x)
+        return self.AuxtoWGSlng(y_aux, x_aux)
+
+    def LV03toWGS84(self, east, north, height, out=None):
+        '''
+        Convert LV03 to WGS84 Return a list of arrays that contain lat, long,
+        and height. When out is given as a (lat, long, height) tuple of
+        preallocated arrays, the results are written into them.
+        '''
+        if out is None:
+            out = (None, None, None)
+        y_aux, x_aux = self.CHtoAux(east, north)
+        d = []
+        d.append(self.AuxtoWGSlat(y_aux, x_aux, out=out[0]))
+        d.append(self.AuxtoWGSlng(y_aux, x_aux, out=out[1]))
+        d.append(self.AuxtoWGSheight(y_aux, x_aux, height, out=out[2]))
+        return d
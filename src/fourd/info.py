@@ -0,0 +1,215 @@
+#  fourd - info
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+
+from fourd.uv3 import uv3_dtype
+from fourd.uv3z import UV3ZReader, uv3z_check
+
+# records of each inspected chunk #
+info_chunk = 4 * 1024 * 1024
+
+# raw view of the records - seven 4-byte words, compared for byte-exact diff #
+info_raw = np.dtype( ( '<u4', uv3_dtype.itemsize // 4 ) )
+
+def info_map( path ):
+    '''
+    Map the complete records of a uv3 file in memory and return them with
+    the number of trailing bytes that don't make a complete record. The
+    records of a compressed uv3 file are given by a reader, read by
+    slices as the mapped ones
+    '''
+    size = os.path.getsize( path )
+    if size >= 4 and uv3z_check( path ):
+        return UV3ZReader( path ), 0
+    count = size // uv3_dtype.itemsize
+    if count == 0:
+        return np.empty( 0, dtype=uv3_dtype ), size
+    return np.memmap( path, dtype=uv3_dtype, mode='r', shape=( count, ) ), size - count * uv3_dtype.itemsize
+
+class UV3Statistics( object ):
+    '''
+    Streaming inspection of uv3 records. Records are given chunk by chunk,
+    in file order, and the counts of each primitive type, the bounds of
+    the coordinates, the histogram of each colour channel and the records
+    breaking the format are accumulated. Consecutive records of a same
+    type must come by complete primitives, so that runs of line and
+    triangle records whose length is not a multiple of two or three are
+    reported, as are records of unknown type and NaN coordinates.
+    '''
+    def __init__( self ):
+        self.count = 0
+        self.types = np.zeros( 256, dtype=np.int64 )
+        self.min = np.full( 3, np.inf )
+        self.max = np.full( 3, -np.inf )
+        self.colours = np.zeros( ( 3, 256 ), dtype=np.int64 )
+        self.nan = 0
+        self.first_nan = None
+        self.broken = {2 : 0, 3 : 0}
+        self.first_broken = {2 : None, 3 : None}
+
+        # run of same type records still open at the end of the last chunk #
+        self.run_type = None
+        self.run_start = 0
+        self.run_length = 0
+
+    def close_run( self, kind, start, length ):
+        if kind in self.broken and length % kind:
+            self.broken[kind] += 1
+            if self.first_broken[kind] is None:
+                self.first_broken[kind] = start
+
+    def update( self, records ):
+        if len( records ) == 0:
+            return
+        offset = self.count
+        self.count += len( records )
+
+        kind = records['t']
+        self.types += np.bincount( kind, minlength=256 )
+        for channel, field in enumerate( ( 'r', 'g', 'b' ) ):
+            self.colours[channel] += np.bincount( records[field], minlength=256 )
+
+        # coordinates bounds, NaN excluded #
+        invalid = np.zeros( len( records ), dtype=bool )
+        for field in ( 'x', 'y', 'z' ):
+            invalid |= np.isnan( records[field] )
+        nan = int( np.count_nonzero( invalid ) )
+        if nan:
+            if self.first_nan is None:
+                self.first_nan = offset + int( np.argmax( invalid ) )
+            self.nan += nan
+        if nan < len( records ):
+            for axis, field in enumerate( ( 'x', 'y', 'z' ) ):
+                values = records[field][~invalid] if nan else records[field]
+                self.min[axis] = min( self.min[axis], values.min() )
+                self.max[axis] = max( self.max[axis], values.max() )
+
+        # runs of same type records #
+        starts = np.concatenate( ( [ 0 ], np.flatnonzero( kind[1:] != kind[:-1] ) + 1 ) )
+        lengths = np.diff( np.append( starts, len( kind ) ) )
+        kinds = kind[starts]
+        starts = starts + offset
+        if kinds[0] == self.run_type:
+            starts[0] = self.run_start
+            lengths[0] += self.run_length
+        elif self.run_type is not None:
+            self.close_run( self.run_type, self.run_start, self.run_length )
+        for run_kind in self.broken:
+            broken = np.flatnonzero( ( kinds[:-1] == run_kind ) & ( lengths[:-1] % run_kind != 0 ) )
+            if len( broken ):
+                self.broken[run_kind] += len( broken )
+                if self.first_broken[run_kind] is None:
+                    self.first_broken[run_kind] = int( starts[broken[0]] )
+        self.run_type = int( kinds[-1] )
+        self.run_start = int( starts[-1] )
+        self.run_length = int( lengths[-1] )
+
+    def finish( self ):
+        '''
+        Close the last run of records, once every chunk was given
+        '''
+        if self.run_type is not None:
+            self.close_run( self.run_type, self.run_start, self.run_length )
+            self.run_type = None
+
+    def unknown( self ):
+        '''
+        Return the number of records of type other than point, line and
+        triangle
+        '''
+        return int( self.count - self.types[1:4].sum() )
+
+def info_scan( path, chunk=info_chunk ):
+    '''
+    Inspect a uv3 file chunk by chunk and return its statistics with the
+    number of trailing bytes of a truncated file
+    '''
+    records, trailing = info_map( path )
+    statistics = UV3Statistics()
+    for start in range( 0, len( records ), chunk ):
+        statistics.update( records[start:start + chunk] )
+    statistics.finish()
+    return statistics, trailing
+
+class UV3Difference( object ):
+    '''
+    Result of the comparison of two uv3 files: number of compared records,
+    number of records differing by at least one byte, index of the first
+    of them, number of differing records per field and largest coordinate
+    difference, ignoring NaN
+    '''
+    def __init__( self ):
+        self.compared = 0
+        self.records = 0
+        self.first = None
+        self.fields = dict.fromkeys( uv3_dtype.names, 0 )
+        self.distance = np.zeros( 3 )
+
+    def update( self, offset, records_a, records_b ):
+        differ = ( np.ascontiguousarray( records_a ).view( info_raw ) != np.ascontiguousarray( records_b ).view( info_raw ) ).any( axis=1 )
+        self.compared += len( differ )
+        count = int( np.count_nonzero( differ ) )
+        if count == 0:
+            return
+        if self.first is None:
+            self.first = offset + int( np.argmax( differ ) )
+        self.records += count
+
+        # fields of the differing records only #
+        index = np.flatnonzero( differ )
+        part_a = records_a[index]
+        part_b = records_b[index]
+        for axis, field in enumerate( uv3_dtype.names ):
+            values_a = part_a[field]
+            values_b = part_b[field]
+            if axis < 3:
+                self.fields[field] += int( np.count_nonzero( values_a.view( '<u8' ) != values_b.view( '<u8' ) ) )
+                distance = np.abs( values_a - values_b )
+                distance = distance[~np.isnan( distance )]
+                if len( distance ):
+                    self.distance[axis] = max( self.distance[axis], distance.max() )
+            else:
+                self.fields[field] += int( np.count_nonzero( values_a != values_b ) )
+
+def info_size( path, records ):
+    '''
+    Return the size of the records of a uv3 file, uncompressed, with its
+    trailing bytes
+    '''
+    if isinstance( records, UV3ZReader ):
+        return len( records ) * uv3_dtype.itemsize
+    return os.path.getsize( path )
+
+def info_diff( path_a, path_b, chunk=info_chunk ):
+    '''
+    Compare two uv3 files chunk by chunk, over their common records, and
+    return the differences with the sizes of both files, compressed files
+    being compared by their records
+    '''
+    records_a, _ = info_map( path_a )
+    records_b, _ = info_map( path_b )
+
+    difference = UV3Difference()
+    common = min( len( records_a ), len( records_b ) )
+    for start in range( 0, common, chunk ):
+        stop = min( start + chunk, common )
+        difference.update( start, records_a[start:stop], records_b[start:stop] )
+    return difference, info_size( path_a, records_a ), info_size( path_b, records_b )
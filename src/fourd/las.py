@@ -0,0 +1,221 @@
+#  fourd - las
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import os
+import numpy as np
+
+# estimated working set of one point during conversion, in bytes #
+las_point_bytes = 256
+
+def las_chunk_points( chunk_points, max_memory ):
+    '''
+    Return the number of points processed at once, either as given or
+    derived from a memory budget expressed in megabytes
+    '''
+    if max_memory is not None:
+        chunk_points = ( max_memory * 1024 * 1024 ) // las_point_bytes
+    return max( 1, int( chunk_points ) )
+
+def las_record_dtype( inFile ):
+    '''
+    Build the structured dtype of one point record from the header point
+    format, padded to the record length declared in the header
+    '''
+    names = []
+    formats = []
+    offsets = []
+    offset = 0
+    for spec in inFile.point_format.specs:
+        names.append( spec.name )
+        formats.append( spec.np_fmt )
+        offsets.append( offset )
+        offset += np.dtype( spec.np_fmt ).itemsize
+    return np.dtype( { 'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': max( offset, inFile.header.data_record_length ) } )
+
+def las_points( inFile ):
+    '''
+    Map the point data block of an uncompressed LAS file as a read-only
+    array of point records. Nothing is read until the records are used,
+    the operating system page cache being shared by every process mapping
+    the same file.
+    '''
+    pm_dtype = las_record_dtype( inFile )
+    pm_count = inFile.header.point_records_count
+    pm_size = inFile.header.data_offset + pm_count * pm_dtype.itemsize
+
+    if os.path.getsize( inFile.filename ) < pm_size:
+        raise ValueError( 'point records of ' + inFile.filename + ' are truncated or compressed' )
+
+    # empty files can't be mapped #
+    if pm_count == 0:
+        return np.empty( 0, dtype=pm_dtype )
+
+    return np.memmap( inFile.filename, dtype=pm_dtype, mode='r', offset=inFile.header.data_offset, shape=( pm_count, ) )
+
+def las_chunks( inFile, chunk_points, start=0, stop=None ):
+    '''
+    Iterate over the point records of a LAS file by chunks of at most
+    chunk_points points, from the start-th point up to the stop-th one
+    (excluded). Chunks are views of the mapped point records, so that
+    records are not copied and only the pages of the current chunk are
+    needed in memory.
+    '''
+    pm_points = las_points( inFile )
+    if stop is None or stop > len( pm_points ):
+        stop = len( pm_points )
+
+    for index in range( start, stop, chunk_points ):
+        yield pm_points[index:min( index + chunk_points, stop )]
+
+def las_scaled( inFile, chunk ):
+    '''
+    Apply the header scale and offset to the raw X, Y and Z integers of a
+    chunk and return the three coordinate arrays
+    '''
+    X = chunk['X'] * inFile.header.scale[0] + inFile.header.offset[0]
+    Y = chunk['Y'] * inFile.header.scale[1] + inFile.header.offset[1]
+    Z = chunk['Z'] * inFile.header.scale[2] + inFile.header.offset[2]
+    return X, Y, Z
+
+def las_colour_shift( inFile, chunk_points ):
+    '''
+    Return the right shift bringing the colours of a LAS file on 8 bits.
+    Colours are stored on 16 bits, but many files only use their lower 8
+    bits: the colours are scaled down only when one of them exceeds 255,
+    so that they are never truncated
+    '''
+    for chunk in las_chunks( inFile, chunk_points ):
+        if len( chunk ) > 0 and max( chunk['red'].max(), chunk['green'].max(), chunk['blue'].max() ) > 255:
+            return 8
+    return 0
+
+def las_classification( chunk ):
+    '''
+    Return the classification byte of the points of a chunk, as stored by
+    the point data format
+    '''
+    if 'raw_classification' in chunk.dtype.names:
+        return chunk['raw_classification']
+    if 'classification_byte' in chunk.dtype.names:
+        return chunk['classification_byte']
+    return chunk['classification']
+
+def las_class( chunk ):
+    '''
+    Return the class of the points of a chunk. The classification byte of
+    the point formats 0 to 5 also holds the synthetic, key-point and
+    withheld flags in its upper three bits, which are left out
+    '''
+    if 'raw_classification' in chunk.dtype.names:
+        return chunk['raw_classification'] & 0x1f
+    return las_classification( chunk )
+
+def las_returns( chunk ):
+    '''
+    Return the return number and the number of returns of the points of a
+    chunk, unpacked from their flag byte according to the point data format
+    '''
+    pm_flags = chunk['flag_byte']
+    if 'classification_byte' in chunk.dtype.names:
+        return pm_flags & 0x0f, pm_flags >> 4
+    return pm_flags & 0x07, ( pm_flags >> 3 ) & 0x07
+
+def las_filter( inFile, bbox=None, classes=None, returns=None, intensity=None ):
+    '''
+    Prepare the selection of the points of a LAS file, given as a bounding
+    box (xmin, ymin, xmax, ymax) in the file coordinates, a list of kept
+    classification values, the kept returns (first, last or a return
+    number) and an intensity (low, high) range, bounds being included. The
+    bounding box is translated into raw X and Y integers through the header
+    scale and offset, so that points are selected without being scaled.
+    None is returned when nothing is filtered.
+    '''
+    if bbox is None and classes is None and returns is None and intensity is None:
+        return None
+
+    # return numbers are given as text on the command line #
+    if returns is not None and returns not in ( 'first', 'last' ):
+        returns = int( returns )
+
+    pm_filter = { 'bbox' : None, 'classes' : None, 'returns' : returns, 'intensity' : intensity }
+
+    if bbox is not None:
+        pm_raw = []
+        for value, axis, upper in ( ( bbox[0], 0, False ), ( bbox[1], 1, False ), ( bbox[2], 0, True ), ( bbox[3], 1, True ) ):
+            scale = inFile.header.scale[axis]
+            offset = inFile.header.offset[axis]
+
+            # closest raw integer inside the box, checked against rounding #
+            raw = math.floor( ( value - offset ) / scale ) if upper else math.ceil( ( value - offset ) / scale )
+            while upper and raw * scale + offset > value:
+                raw -= 1
+            while not upper and raw * scale + offset < value:
+                raw += 1
+            pm_raw.append( raw )
+        pm_filter['bbox'] = tuple( pm_raw )
+
+    if classes is not None:
+        pm_filter['classes'] = np.zeros( 256, dtype=bool )
+        pm_filter['classes'][list( classes )] = True
+
+    return pm_filter
+
+def las_mask( pm_filter, chunk ):
+    '''
+    Return the mask of the points of a chunk kept by a filter prepared with
+    las_filter(), or None when every point is kept
+    '''
+    if pm_filter is None:
+        return None
+
+    pm_mask = np.ones( len( chunk ), dtype=bool )
+
+    if pm_filter['bbox'] is not None:
+        pm_x = chunk['X']
+        pm_y = chunk['Y']
+        pm_mask &= ( pm_x >= pm_filter['bbox'][0] ) & ( pm_x <= pm_filter['bbox'][2] )
+        pm_mask &= ( pm_y >= pm_filter['bbox'][1] ) & ( pm_y <= pm_filter['bbox'][3] )
+
+    if pm_filter['classes'] is not None:
+        pm_mask &= pm_filter['classes'][las_class( chunk )]
+
+    if pm_filter['returns'] is not None:
+        pm_number, pm_count = las_returns( chunk )
+        if pm_filter['returns'] == 'first':
+            pm_mask &= ( pm_number == 1 )
+        elif pm_filter['returns'] == 'last':
+            pm_mask &= ( pm_number == pm_count )
+        else:
+            pm_mask &= ( pm_number == pm_filter['returns'] )
+
+    if pm_filter['intensity'] is not None:
+        pm_intensity = chunk['intensity']
+        pm_mask &= ( pm_intensity >= pm_filter['intensity'][0] ) & ( pm_intensity <= pm_filter['intensity'][1] )
+
+    return pm_mask
+
+def las_filtered_chunks( inFile, chunk_points, pm_filter, start=0, stop=None ):
+    '''
+    Iterate over the chunks of a LAS file as las_chunks(), keeping only the
+    points selected by the filter
+    '''
+    for chunk in las_chunks( inFile, chunk_points, start, stop ):
+        pm_mask = las_mask( pm_filter, chunk )
+        yield chunk if pm_mask is None else chunk[pm_mask]
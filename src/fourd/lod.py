@@ -0,0 +1,147 @@
+#  fourd - lod
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import os
+import numpy as np
+
+from fourd.tiles import TileWriter, tiles_lod
+from fourd.uv3 import UV3Writer, uv3_dtype
+
+# uv3 record followed by its index in the output file and the indexes of its voxel at the finest level #
+lod_dtype = np.dtype( uv3_dtype.descr + [ ( 'n', '<i8' ), ( 'i', '<i4' ), ( 'j', '<i4' ), ( 'k', '<i4' ) ] )
+
+# bits of each voxel index in the voxel keys #
+lod_bits = 21
+
+def lod_voxels( X, Y, Z, origin, voxel ):
+    '''
+    Return the indexes of the voxels of the finest level holding the given
+    points, voxels being cubes of edge voxel starting at origin
+    '''
+    pm_index = []
+    for values, start in zip( ( X, Y, Z ), origin ):
+        index = np.floor( ( values - start ) / voxel ).astype( np.int64 )
+        if len( index ) and ( index.min() < 0 or index.max() >= ( 1 << lod_bits ) ):
+            raise ValueError( 'points are too far from the origin for the voxel size' )
+        pm_index.append( index )
+    return pm_index
+
+def lod_keys( records, level ):
+    '''
+    Return the keys of the voxels of the given level holding the records,
+    the edge of the voxels doubling from one level to the next
+    '''
+    pm_i = records['i'].astype( np.int64 ) >> level
+    pm_j = records['j'].astype( np.int64 ) >> level
+    pm_k = records['k'].astype( np.int64 ) >> level
+    return ( pm_i << ( 2 * lod_bits ) ) | ( pm_j << lod_bits ) | pm_k
+
+def lod_buckets( count, max_memory ):
+    '''
+    Return the number of buckets the records of a level are spread over, so
+    that the records of one bucket fit in the memory budget, in bytes
+    '''
+    return max( 1, math.ceil( ( 2 * count * lod_dtype.itemsize ) / max_memory ) )
+
+def lod_bucket_path( path, level, part, bucket ):
+    '''
+    Return the path of a bucket file of a level and of a part
+    '''
+    return os.path.join( path, '%02d-%s-%06d.lod' % ( level, part, bucket ) )
+
+def lod_output( output, level ):
+    '''
+    Return the path of the uv3 file of a level of detail, named after the
+    output file, levels being numbered from one
+    '''
+    return os.path.splitext( output )[0] + '.lod%d.uv3' % level
+
+def lod_split( path, level, part, records, buckets ):
+    '''
+    Append the records to the bucket files of a level, the bucket of each
+    record being given by a hash of its voxel key, so that all the records
+    of a voxel end in the same bucket. Each part of the conversion has its
+    own bucket files, so that parts can be split at the same time.
+    '''
+    pm_bucket = ( ( lod_keys( records, level ).astype( np.uint64 ) * np.uint64( 0x9e3779b97f4a7c15 ) ) >> np.uint64( 32 ) ) % np.uint64( buckets )
+
+    # group records by bucket, keeping their order #
+    pm_order = np.argsort( pm_bucket, kind='stable' )
+    pm_bucket = pm_bucket[pm_order]
+    pm_starts = np.concatenate( ( [ 0 ], np.flatnonzero( np.diff( pm_bucket ) ) + 1 ) ) if len( pm_bucket ) else []
+
+    for start, group in zip( pm_starts, np.split( pm_order, pm_starts[1:] ) ):
+        with open( lod_bucket_path( path, level, part, int( pm_bucket[start] ) ), mode='ab' ) as bucket:
+            records[group].tofile( bucket )
+
+def lod_build( path, parts, output, levels, count, max_memory, tiles=None ):
+    '''
+    Build the levels of detail out of the records split by lod_split() at
+    the first level. At each level, the first record of each voxel, in the
+    order of the output file, is kept and written in the uv3 file of the level, named after the output file
+    with its level number. The kept records are then split again for the
+    next level, whose voxels are twice as large, so that each level is a
+    subset of the previous one. Only one bucket is held in memory at once.
+    With tiles given as a size in degrees, output is a tiles directory and
+    each level is routed into the tiles of its own lodN directory in it.
+    Return the number of records of each level.
+    '''
+    pm_buckets = lod_buckets( count, max_memory )
+    pm_counts = []
+
+    for level in range( levels ):
+
+        pm_count = 0
+
+        with ( UV3Writer( lod_output( output, level + 1 ) ) if tiles is None else TileWriter( tiles_lod( output, level + 1 ), tiles ) ) as uv3:
+
+            for bucket in range( pm_buckets ):
+
+                # records of the bucket, in the order of the parts #
+                pm_records = []
+                for part in parts:
+                    pm_path = lod_bucket_path( path, level, part, bucket )
+                    if os.path.isfile( pm_path ):
+                        pm_records.append( np.fromfile( pm_path, dtype=lod_dtype ) )
+                        os.remove( pm_path )
+                if not pm_records:
+                    continue
+                pm_records = np.concatenate( pm_records )
+
+                # first record of each voxel, whatever the bucket it came in #
+                pm_keys = lod_keys( pm_records, level )
+                pm_order = np.lexsort( ( pm_records['n'], pm_keys ) )
+                pm_keys = pm_keys[pm_order]
+                pm_first = pm_order[np.concatenate( ( [ True ], pm_keys[1:] != pm_keys[:-1] ) )]
+                pm_records = pm_records[np.sort( pm_first )]
+
+                uv3.write( pm_records[list( uv3_dtype.names )].astype( uv3_dtype ) )
+                pm_count += len( pm_records )
+
+                # records kept for the next level, never more than this one #
+                if level + 1 < levels:
+                    lod_split( path, level + 1, 'level', pm_records, pm_buckets )
+
+        pm_counts.append( pm_count )
+
+        # the next level is made of the records kept at this one #
+        parts = [ 'level' ]
+
+    return pm_counts
@@ -0,0 +1,160 @@
+#  fourd - morton
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from fourd.uv3 import UV3Writer, uv3_dtype
+
+# bits of each coordinate in the morton keys #
+morton_bits = 21
+
+# default memory budget of the sort, in bytes #
+morton_memory = 1024 * 1024 * 1024
+
+# memory used by one record while sorting it, in bytes - record, key and order #
+morton_record_bytes = 64
+
+def morton_spread( values ):
+    '''
+    Spread the bits of 21 bits unsigned integers, so that two zero bits
+    separate each of them
+    '''
+    values = values.astype( np.uint64 ) & np.uint64( 0x1fffff )
+    values = ( values | ( values << np.uint64( 32 ) ) ) & np.uint64( 0x1f00000000ffff )
+    values = ( values | ( values << np.uint64( 16 ) ) ) & np.uint64( 0x1f0000ff0000ff )
+    values = ( values | ( values << np.uint64( 8 ) ) ) & np.uint64( 0x100f00f00f00f00f )
+    values = ( values | ( values << np.uint64( 4 ) ) ) & np.uint64( 0x10c30c30c30c30c3 )
+    values = ( values | ( values << np.uint64( 2 ) ) ) & np.uint64( 0x1249249249249249 )
+    return values
+
+def morton_bounds( records, chunk=1000000 ):
+    '''
+    Return the lower and upper bounds of the x, y and z coordinates of the
+    records, read chunk by chunk. Records of NaN or infinite coordinates
+    can't be placed on the curve and are rejected
+    '''
+    low = np.full( 3, np.inf )
+    high = np.full( 3, -np.inf )
+    for index in range( 0, len( records ), chunk ):
+        part = records[index:index + chunk]
+        for axis, name in enumerate( ( 'x', 'y', 'z' ) ):
+            values = part[name]
+            if not np.isfinite( values ).all():
+                raise ValueError( 'record %d has a non-finite coordinate and can\'t be sorted' % ( index + int( np.argmin( np.isfinite( values ) ) ) ) )
+            low[axis] = min( low[axis], values.min() )
+            high[axis] = max( high[axis], values.max() )
+    return low, high
+
+def morton_keys( records, bounds ):
+    '''
+    Return the morton (z-order) keys of the records, their longitude,
+    latitude and height being quantized over the given bounds
+    '''
+    keys = np.zeros( len( records ), dtype=np.uint64 )
+    scale = ( 1 << morton_bits ) - 1
+    for axis, name in enumerate( ( 'x', 'y', 'z' ) ):
+        span = bounds[1][axis] - bounds[0][axis]
+        if span > 0:
+            values = ( records[name] - bounds[0][axis] ) * ( scale / span )
+            np.clip( values, 0, scale, out=values )
+        else:
+            values = np.zeros( len( records ) )
+        keys |= morton_spread( values ) << np.uint64( axis )
+    return keys
+
+def morton_merge( runs, bounds, output, block ):
+    '''
+    Merge the sorted runs into the output writer, reading block records of
+    each run at once. Records of equal keys keep the order of the runs,
+    and their order inside each run.
+    '''
+    pm_index = [ 0 ] * len( runs )
+
+    while any( index < len( run ) for index, run in zip( pm_index, runs ) ):
+
+        pm_blocks = []
+        pm_keys = []
+        for index, run in zip( pm_index, runs ):
+            pm_blocks.append( run[index:index + block] )
+            pm_keys.append( morton_keys( pm_blocks[-1], bounds ) )
+
+        # records up to the smallest last key of the incomplete runs are final #
+        pm_limit = None
+        for index, run, keys in zip( pm_index, runs, pm_keys ):
+            if index + block < len( run ):
+                pm_limit = keys[-1] if pm_limit is None else min( pm_limit, keys[-1] )
+
+        # records of the limit key are final up to the first run whose block ends on it, as its next block may hold more of them #
+        pm_take = []
+        pm_blocked = False
+        for part, ( index, run, keys ) in enumerate( zip( pm_index, runs, pm_keys ) ):
+            if pm_limit is None:
+                count = len( keys )
+            elif pm_blocked:
+                count = int( np.searchsorted( keys, pm_limit, side='left' ) )
+            else:
+                count = int( np.searchsorted( keys, pm_limit, side='right' ) )
+                pm_blocked = ( index + block < len( run ) and count == len( keys ) )
+            pm_take.append( count )
+            pm_index[part] += count
+
+        pm_records = np.concatenate( [ records[:count] for records, count in zip( pm_blocks, pm_take ) ] )
+        pm_order = np.argsort( np.concatenate( [ keys[:count] for keys, count in zip( pm_keys, pm_take ) ] ), kind='stable' )
+        output.write( pm_records[pm_order] )
+
+def morton_sort( input, output, max_memory=morton_memory ):
+    '''
+    Sort the records of a uv3 file along the morton (z-order) curve of
+    their coordinates. Records are sorted by runs fitting in the memory
+    budget, in bytes, spilled next to the output file and merged back, so
+    that files larger than the memory can be sorted. The input and output
+    files can be the same. Records are sorted one by one, so that only
+    files made of points should be sorted.
+    '''
+    pm_records = np.memmap( input, dtype=uv3_dtype, mode='r' ) if os.path.getsize( input ) else np.empty( 0, dtype=uv3_dtype )
+    pm_bounds = morton_bounds( pm_records )
+    pm_run = max( 1, max_memory // morton_record_bytes )
+
+    pm_path = tempfile.mkdtemp( prefix='uv3-sort-', dir=os.path.dirname( os.path.abspath( output ) ) )
+
+    try:
+
+        # sorted runs #
+        pm_runs = []
+        for index in range( 0, len( pm_records ), pm_run ):
+            records = np.array( pm_records[index:index + pm_run] )
+            records = records[np.argsort( morton_keys( records, pm_bounds ), kind='stable' )]
+            pm_runs.append( os.path.join( pm_path, '%06d.uv3' % len( pm_runs ) ) )
+            records.tofile( pm_runs[-1] )
+        del pm_records
+
+        # merge of the runs, written aside before replacing the output #
+        pm_sorted = os.path.join( pm_path, 'sorted.uv3' )
+        with UV3Writer( pm_sorted ) as uv3:
+            runs = [ np.memmap( run, dtype=uv3_dtype, mode='r' ) for run in pm_runs ]
+            morton_merge( runs, pm_bounds, uv3, max( 1, pm_run // ( 2 * max( 1, len( runs ) ) ) ) )
+            del runs
+
+        os.replace( pm_sorted, output )
+
+    finally:
+        shutil.rmtree( pm_path, ignore_errors=True )
@@ -0,0 +1,73 @@
+#  fourd - palette
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from fourd.colormaps import colormaps_tables
+
+# number of colours sampled out of a palette #
+palette_size = 100
+
+# colour of no data values - same colour as eratosthene's background #
+palette_nodata = ( 7, 10, 12 )
+
+def palette_lut( palette, size=palette_size ):
+    '''
+    Sample a named matplotlib colour palette once into a size x 3 table of
+    8 bits colours, truncated the same way as the palette colours were.
+    The tables of the common palettes are bundled, so that matplotlib is
+    only imported for the other palettes
+    '''
+    if size == palette_size and palette in colormaps_tables:
+        return np.frombuffer( bytes.fromhex( colormaps_tables[palette] ), dtype=np.uint8 ).reshape( size, 3 ).copy()
+
+    # import on demand - loading matplotlib dominates the tools startup #
+    from matplotlib import cm
+
+    pal = cm.get_cmap( palette, size )
+    return ( pal( np.arange( size ) )[:, :3] * 255 ).astype( np.uint8 )
+
+def palette_colours( lut, values, vmin, vmax, nodata=None, nodata_colour=palette_nodata ):
+    '''
+    Map an array of scalar values to colours of a palette table. Values are
+    scaled on the [vmin, vmax] range, quantized on the table size and
+    clamped to its first and last colours, matching the matplotlib palette
+    sampling. NaN values are black, as with matplotlib, and values flagged
+    in the nodata mask are given the nodata colour
+    '''
+    size = len( lut )
+
+    # scaling and quantizing values #
+    with np.errstate( divide='ignore', invalid='ignore' ):
+        scaled = ( np.asarray( values, dtype=np.float64 ) - vmin ) / ( vmax - vmin )
+        scaled *= size
+
+    # clamping values and setting aside invalid ones #
+    bad = np.isnan( scaled )
+    scaled[bad] = 0
+    np.clip( scaled, 0, size - 1, out=scaled )
+
+    # gathering colours #
+    colours = lut[scaled.astype( np.intp )]
+    colours[bad] = 0
+
+    if nodata is not None:
+        colours[nodata] = nodata_colour
+
+    return colours
@@ -0,0 +1,47 @@
+#  fourd - parallel
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ProcessPoolExecutor
+
+# number of ranges given to each worker, for a better load balance #
+parallel_share = 4
+
+def parallel_ranges( count, workers ):
+    '''
+    Split the [0, count[ range of items into contiguous (start, stop)
+    ranges, a single one when working in one process
+    '''
+    parts = 1 if workers <= 1 else workers * parallel_share
+    parts = max( 1, min( parts, count ) )
+    bounds = [ ( count * part ) // parts for part in range( parts + 1 ) ]
+    return [ ( bounds[part], bounds[part + 1] ) for part in range( parts ) ]
+
+def parallel_run( function, ranges, workers, *args ):
+    '''
+    Call function( start, stop, *args ) for each range, in a pool of worker
+    processes when more than one worker is asked, and return the results in
+    the order of the ranges. Ranges may carry more values after their start
+    and stop, which are given to the function the same way
+    '''
+    if workers <= 1:
+        return [ function( *part, *args ) for part in ranges ]
+
+    with ProcessPoolExecutor( max_workers=workers ) as pool:
+        jobs = [ pool.submit( function, *part, *args ) for part in ranges ]
+        return [ job.result() for job in jobs ]
@@ -0,0 +1,255 @@
+#  fourd - raster
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import numpy as np
+
+from osgeo import gdal, osr
+
+# pixels read at once without memory budget #
+raster_pixels = 1000000
+
+# estimated working set of one pixel during conversion, in bytes #
+raster_pixel_bytes = 64
+
+# memory budget of the raster blocks kept by a block cache, in megabytes #
+raster_cache_memory = 256
+
+# WGS84 geographic coordinate system, expected by the uv3 format #
+raster_wgs84_wkt = """
+GEOGCS["WGS 84",
+    DATUM["WGS_1984",
+        SPHEROID["WGS 84",6378137,298.257223563,
+            AUTHORITY["EPSG","7030"]],
+        AUTHORITY["EPSG","6326"]],
+    PRIMEM["Greenwich",0,
+        AUTHORITY["EPSG","8901"]],
+    UNIT["degree",0.01745329251994328,
+        AUTHORITY["EPSG","9122"]],
+    AUTHORITY["EPSG","4326"]]"""
+
+def raster_open( path ):
+    '''
+    Open a geotiff file with GDAL, warping it on the fly to WGS84 when it
+    comes in another coordinate system. Opening the same path always gives
+    the same raster, so that worker processes can open it on their own.
+    '''
+
+    # GDAL configuration #
+    gdal.UseExceptions()
+
+    # GDAL open geotiff file #
+    pm_geotiff = gdal.Open( path )
+
+    # get the existing coordinate system
+    old_cs = osr.SpatialReference()
+    old_cs.ImportFromWkt(pm_geotiff.GetProjectionRef())
+
+    # create the new coordinate system
+    new_cs = osr.SpatialReference()
+    new_cs.ImportFromWkt(raster_wgs84_wkt)
+
+    if (old_cs != new_cs):
+        pm_geotiff = gdal.Warp('', pm_geotiff, dstSRS='EPSG:4326', format='VRT', outputType=gdal.GDT_Int16)
+
+    return pm_geotiff
+
+def raster_window_pixels( max_memory, pixel_bytes=raster_pixel_bytes ):
+    '''
+    Return the number of pixels read at once, either derived from a memory
+    budget expressed in megabytes or the default one, scaled down for the
+    conversions whose pixels need more bytes than estimated
+    '''
+    if max_memory is None:
+        return max( 1, ( raster_pixels * raster_pixel_bytes ) // pixel_bytes )
+    return max( 1, ( max_memory * 1024 * 1024 ) // pixel_bytes )
+
+def raster_windows( band, start, stop, order, pixels, overlap=0 ):
+    '''
+    Split the rows, or the columns, of a raster band from start to stop in
+    windows of about the given number of pixels. Window edges fall on the
+    edges of the native blocks along the split, whenever a block fits in
+    a window. This only spares reading blocks again when the blocks are
+    tiles: the blocks of a striped raster span whole rows, so that each
+    window of columns reads every strip of the raster, and such rasters
+    are best read by windows of rows. Each window is given by its first
+    line, its number of lines and the number of lines to read, which
+    carries the overlap with the next window, bounded by the raster size.
+    '''
+    if order == 'row':
+        line, size, block = band.XSize, band.YSize, band.GetBlockSize()[1]
+    else:
+        line, size, block = band.YSize, band.XSize, band.GetBlockSize()[0]
+
+    # whole number of blocks per window, when at least one fits #
+    count = max( 1, pixels // max( 1, line ) )
+    if count >= block > 0:
+        count -= count % block
+
+    first = start
+    while first < stop:
+        last = min( stop, ( first // count + 1 ) * count )
+        yield first, last - first, min( last + overlap, size ) - first
+        first = last
+
+def raster_read( band, order, first, count ):
+    '''
+    Read a window of rows, or of columns, of a raster band, indexed by row
+    then column as the whole raster would be
+    '''
+    if order == 'row':
+        return band.ReadAsArray( 0, first, band.XSize, count )
+    return band.ReadAsArray( first, 0, count, band.YSize )
+
+def raster_colours( rasters ):
+    '''
+    Check that the colour bands of a window fit the 8 bits colours of the
+    uv3 records, raising a ValueError rather than letting larger values
+    wrap around. Negative values are left to the tools, as no data
+    '''
+    for raster in rasters:
+        if raster.dtype != np.uint8 and raster.size > 0 and raster.max() > 255:
+            raise ValueError( 'colours above 255 don\'t fit the 8 bits colours of uv3 records - the raster needs to be scaled to bytes first, e.g. with gdal_translate -ot Byte -scale' )
+
+def raster_overview( band, pixels=raster_pixels ):
+    '''
+    Read a whole band at a reduced resolution of about the given number of
+    pixels, for cheap estimations over the raster. GDAL reads it out of
+    the closest overview of the band, when it has some.
+    '''
+    scale = max( 1.0, ( ( band.XSize * band.YSize ) / pixels ) ** 0.5 )
+    return band.ReadAsArray( 0, 0, band.XSize, band.YSize, buf_xsize=max( 1, int( band.XSize / scale ) ), buf_ysize=max( 1, int( band.YSize / scale ) ) )
+
+def raster_sample( raster, rows, columns, height, width, column=0, row=0 ):
+    '''
+    Bilinear interpolation of a raster at fractional pixel coordinates
+    given separably, as the rows of the lines and the columns of the
+    columns of a regular grid. Nodes are the truncated coordinates and
+    values are computed in the precision, and following the order, of the
+    per-pixel interpolation of the tools, so that heights are the same to
+    the bit. Grid points whose nodes fall outside of the raster, of the
+    given size, are masked and given zero. The raster may be a window of
+    the whole raster, starting at the given column and row. Return the
+    heights, indexed by grid line then grid column, and the mask of the
+    sampled points.
+    '''
+    rows = np.asarray( rows, dtype=np.float64 )
+    columns = np.asarray( columns, dtype=np.float64 )
+
+    # nodes of each line and column of the grid, inside the raster #
+    row_node = np.trunc( rows )
+    column_node = np.trunc( columns )
+    row_inside = ( row_node >= 0 ) & ( row_node + 1 < height )
+    column_inside = ( column_node >= 0 ) & ( column_node + 1 < width )
+
+    heights = np.zeros( ( len( rows ), len( columns ) ), dtype=np.float64 )
+    inside = row_inside[:, np.newaxis] & column_inside[np.newaxis, :]
+    if not inside.any():
+        return heights, inside
+    lines = np.flatnonzero( row_inside )
+    cells = np.flatnonzero( column_inside )
+
+    # precision of the interpolation, the one of a raster value divided by 1.0 #
+    precision = ( raster.dtype.type( 0 ) / 1.0 ).dtype
+
+    # interpolation nodes and parameters #
+    x1 = row_node[lines].astype( np.intp )[:, np.newaxis] - row
+    y1 = column_node[cells].astype( np.intp )[np.newaxis, :] - column
+    dx = ( rows[lines] - row_node[lines] ).astype( precision )[:, np.newaxis]
+    dy = ( columns[cells] - column_node[cells] ).astype( precision )[np.newaxis, :]
+
+    # node values #
+    x1y1 = raster[x1, y1].astype( precision )
+    x1y2 = raster[x1, y1 + 1].astype( precision )
+    x2y1 = raster[x1 + 1, y1].astype( precision )
+    x2y2 = raster[x1 + 1, y1 + 1].astype( precision )
+
+    # interpolated values #
+    dfx = x2y1 - x1y1
+    dfy = x1y2 - x1y1
+    dfxy = x1y1 + x2y2 - x2y1 - x1y2
+    heights[np.ix_( lines, cells )] = dfx * dx + dfy * dy + dfxy * dx * dy + x1y1
+
+    return heights, inside
+
+class RasterCache(object):
+    '''
+    Reader of the windows of a raster band, gathered from its native
+    blocks. Blocks are kept in memory, the least recently used ones being
+    dropped beyond the byte budget, so that a raster read again and again
+    by neighbouring windows, or by the conversion of several files, is
+    read from its file once. Each block is given to prepare, when given,
+    once read. The number of blocks found in memory and read from the
+    raster are kept in hits and misses.
+    '''
+    def __init__(self, band, budget=raster_cache_memory * 1024 * 1024, prepare=None):
+        self.band = band
+        self.width = band.XSize
+        self.height = band.YSize
+        self.block_width, self.block_height = band.GetBlockSize()
+        self.budget = budget
+        self.prepare = prepare
+        self.blocks = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def block(self, column, row):
+        '''
+        Return the block of the given column and row of blocks
+        '''
+        key = (column, row)
+        if key in self.blocks:
+            self.hits += 1
+            self.blocks.move_to_end(key)
+            return self.blocks[key]
+
+        self.misses += 1
+        x = column * self.block_width
+        y = row * self.block_height
+        data = self.band.ReadAsArray(x, y, min(self.block_width, self.width - x), min(self.block_height, self.height - y))
+        if self.prepare is not None:
+            data = self.prepare(data)
+
+        # least recently used blocks dropped, the new one being kept #
+        self.blocks[key] = data
+        self.bytes += data.nbytes
+        while self.bytes > self.budget and len(self.blocks) > 1:
+            _, dropped = self.blocks.popitem(last=False)
+            self.bytes -= dropped.nbytes
+        return data
+
+    def read(self, x, y, width, height):
+        '''
+        Return a window of the raster, indexed by row then column
+        '''
+        window = None
+        for row in range(y // self.block_height, (y + height - 1) // self.block_height + 1):
+            for column in range(x // self.block_width, (x + width - 1) // self.block_width + 1):
+                data = self.block(column, row)
+                if window is None:
+                    window = np.empty((height, width), dtype=data.dtype)
+
+                # part of the block inside of the window #
+                x1 = max(x, column * self.block_width)
+                y1 = max(y, row * self.block_height)
+                x2 = min(x + width, (column + 1) * self.block_width)
+                y2 = min(y + height, (row + 1) * self.block_height)
+                window[y1 - y:y2 - y, x1 - x:x2 - x] = data[y1 - row * self.block_height:y2 - row * self.block_height, x1 - column * self.block_width:x2 - column * self.block_width]
+        return window
@@ -0,0 +1,89 @@
+#  fourd - stats
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+# number of histogram bins used for percentiles estimation #
+stats_bins = 65536
+
+class RangeStatistics(object):
+    '''
+    Streaming reduction of the range of a scalar attribute. Values are
+    given chunk by chunk and only the extrema and, when histogram bounds
+    are given, a fixed-size histogram are kept, so that memory doesn't
+    depend on the number of values. Values outside of the histogram
+    bounds are counted in its first or last bin.
+    '''
+    def __init__(self, bounds=None, bins=stats_bins):
+        self.min = None
+        self.max = None
+        self.count = 0
+        self.bounds = bounds
+        self.histogram = None
+        if bounds is not None:
+            self.histogram = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        low = values.min()
+        high = values.max()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.count += len(values)
+        if self.histogram is not None:
+            bins = len(self.histogram)
+            index = (np.asarray(values, dtype=np.float64) - self.bounds[0]) * (bins / (self.bounds[1] - self.bounds[0]))
+            np.clip(index, 0, bins - 1, out=index)
+            self.histogram += np.bincount(index.astype(np.intp), minlength=bins)
+
+    def merge(self, other):
+        '''
+        Add the values reduced by another reduction, with the same
+        histogram bounds
+        '''
+        if other.count == 0:
+            return
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.count += other.count
+        if self.histogram is not None:
+            self.histogram += other.histogram
+
+    def percentile(self, q):
+        '''
+        Return the lower edge of the histogram bin holding the q-th
+        percentile, bounded by the extrema
+        '''
+        if self.histogram is None:
+            raise ValueError('percentiles require histogram bounds')
+        bins = len(self.histogram)
+        rank = (q / 100) * (self.count - 1)
+        index = np.searchsorted(np.cumsum(self.histogram), rank, side='right')
+        value = self.bounds[0] + index * ((self.bounds[1] - self.bounds[0]) / bins)
+        return min(max(value, self.min), self.max)
+
+    def range(self, clip=None):
+        '''
+        Return the range of the values, either as their extrema or, with
+        clip given as a (low, high) couple of percentiles, as a robust range
+        '''
+        if clip is None:
+            return self.min, self.max
+        return self.percentile(clip[0]), self.percentile(clip[1])
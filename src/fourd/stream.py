@@ -0,0 +1,106 @@
+#  fourd - stream
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import contextlib
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+from fourd.uv3 import uv3_append
+
+# buffer of the socket streams - records are sent by whole writer buffers #
+stream_buffer = 8 * 1024 * 1024
+
+def stream_path( output ):
+    '''
+    Return whether an output is a stream rather than a file : the standard
+    output (-), a tcp://host:port or unix:///path socket, or a named pipe
+    '''
+    if not isinstance( output, str ):
+        return False
+    if output == '-' or output.startswith( ( 'tcp://', 'unix://' ) ):
+        return True
+    return os.path.exists( output ) and stat.S_ISFIFO( os.stat( output ).st_mode )
+
+def stream_messages( output ):
+    '''
+    Return the context in which the tools run : their messages are sent to
+    the standard error while the output is streamed to the standard
+    output, which is given back to the caller at its end
+    '''
+    if output == '-':
+        return contextlib.redirect_stdout( sys.stderr )
+    return contextlib.nullcontext()
+
+def stream_open( output ):
+    '''
+    Open an output stream and return it as a binary file. Sockets are
+    connected, the conversion being sent to the listening side; writes
+    block while the reader doesn't keep up, so that the conversion waits
+    for it instead of filling the memory
+    '''
+    if output == '-':
+        return sys.__stdout__.buffer
+
+    if output.startswith( 'tcp://' ):
+        host, port = output[len( 'tcp://' ):].rsplit( ':', 1 )
+        connection = socket.create_connection( ( host.strip( '[]' ), int( port ) ) )
+        connection.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+
+    elif output.startswith( 'unix://' ):
+        connection = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+        connection.connect( output[len( 'unix://' ):] )
+
+    else:
+        return open( output, mode='wb' )
+
+    connection.setsockopt( socket.SOL_SOCKET, socket.SO_SNDBUF, stream_buffer )
+
+    # the socket is closed along with its file #
+    stream = connection.makefile( mode='wb', buffering=stream_buffer )
+    connection.close()
+    return stream
+
+def stream_close( stream ):
+    '''
+    Flush an output stream and close it, the standard output excepted
+    '''
+    stream.flush()
+    if stream is not sys.__stdout__.buffer:
+        stream.close()
+
+def stream_temporary():
+    '''
+    Return the path of a temporary uv3 file, for the conversions that
+    can't be streamed in order
+    '''
+    handle, path = tempfile.mkstemp( prefix='uv3-stream-', suffix='.uv3' )
+    os.close( handle )
+    return path
+
+def stream_send( path, stream ):
+    '''
+    Send a uv3 file to an output stream and remove it
+    '''
+    with open( path, mode='rb' ) as source:
+        uv3_append( stream, source )
+    os.remove( path )
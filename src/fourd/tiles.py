@@ -0,0 +1,230 @@
+#  fourd - tiles
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import math
+import os
+import shutil
+import numpy as np
+from collections import OrderedDict
+
+from fourd.morton import morton_memory, morton_sort
+from fourd.uv3 import uv3_append, uv3_dtype
+
+# name of the manifest file of a tiles directory #
+tiles_manifest = 'tiles.json'
+
+# prefix of the directories of the tiles written by each part of a conversion #
+tiles_prefix = '.part-'
+
+# default number of tile files kept open at once #
+tiles_handles = 64
+
+# size of the buffer of each opened tile file, in bytes #
+tiles_buffer = 1024 * 1024
+
+# number of records routed at once when routing a file #
+tiles_chunk = 1000000
+
+class TileWriter(object):
+    '''
+    Route uv3 records into the tiles of a grid of longitude and latitude
+    cells of size degrees, each tile being its own uv3 file in the given
+    directory. Primitives are routed as a whole, according to the cell of
+    their first vertex, and keep their order in their tile. Only a bounded
+    pool of tile files is kept open, the least recently used one being
+    closed when a new one is needed. Closing the writer writes a manifest
+    of the extent, in degrees, the bounds of the records and the number of
+    records of each tile. The writer is written like a uv3 file writer,
+    so that converters route their records as they are converted.
+    '''
+    def __init__(self, path, size, handles=tiles_handles, buffer=tiles_buffer):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.size = size
+        self.handles = max(1, handles)
+        self.buffer = buffer
+        self.files = OrderedDict()
+        self.opened = set()
+        self.tiles = {}
+
+    def tile(self, name):
+        '''
+        Return the opened file of a tile, opening it if needed
+        '''
+        if name in self.files:
+            self.files.move_to_end(name)
+            return self.files[name]
+        if len(self.files) >= self.handles:
+            self.files.popitem(last=False)[1].close()
+        self.files[name] = open(os.path.join(self.path, name + '.uv3'), mode='ab' if name in self.opened else 'wb', buffering=self.buffer)
+        self.opened.add(name)
+        return self.files[name]
+
+    def write(self, records):
+        if len(records) == 0:
+            return
+
+        # records of each primitive, given by the type of the first one #
+        primitive = max(1, int(records['t'][0]))
+        if len(records) % primitive:
+            raise ValueError('records are not made of whole primitives')
+
+        # cell of the first vertex of each primitive #
+        first = records[::primitive]
+        cell_x = np.floor(np.degrees(first['x']) / self.size).astype(np.int64)
+        cell_y = np.floor(np.degrees(first['y']) / self.size).astype(np.int64)
+
+        # primitives grouped by cell, keeping their order #
+        cells, inverse = np.unique(np.stack((cell_x, cell_y), axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(cells)))[:-1]
+
+        for (x, y), group in zip(cells, np.split(order, bounds)):
+            index = (group[:, np.newaxis] * primitive + np.arange(primitive)).reshape(-1)
+            part = records[index]
+
+            name = '%d_%d' % (x, y)
+            self.tiles.setdefault(name, {
+                'cell' : [int(x), int(y)],
+                'extent_deg' : [float(x * self.size), float(y * self.size), float((x + 1) * self.size), float((y + 1) * self.size)],
+                'min' : [math.inf] * 3,
+                'max' : [-math.inf] * 3,
+                'count' : 0,
+            })
+            tiles_bounds(self.tiles[name], [float(part[field].min()) for field in ('x', 'y', 'z')], [float(part[field].max()) for field in ('x', 'y', 'z')], len(part))
+
+            part.tofile(self.tile(name))
+
+    def route(self, path, chunk=tiles_chunk):
+        '''
+        Route the records of a uv3 file, read chunk by chunk
+        '''
+        if os.path.getsize(path) == 0:
+            return
+        records = np.memmap(path, dtype=uv3_dtype, mode='r')
+
+        # chunks made of whole primitives #
+        chunk = chunk - (chunk % max(1, int(records['t'][0])))
+        for index in range(0, len(records), chunk):
+            self.write(records[index:index + chunk])
+        del records
+
+    def close(self):
+        '''
+        Close the tile files and write the manifest of the tiles, returning
+        the number of tiles
+        '''
+        while self.files:
+            self.files.popitem()[1].close()
+        tiles_save(self.path, self.size, self.tiles)
+        return len(self.tiles)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def tiles_bounds( tile, low, high, count ):
+    '''
+    Extend the bounds and the number of records of a tile of a manifest
+    '''
+    for axis in range( 3 ):
+        tile['min'][axis] = min( tile['min'][axis], low[axis] )
+        tile['max'][axis] = max( tile['max'][axis], high[axis] )
+    tile['count'] += count
+
+def tiles_save( path, size, tiles ):
+    '''
+    Write the manifest of the tiles of a directory. The extent of the
+    tiles is given in degrees, as their size, and the bounds of their
+    records in the units of the records: radians and metres
+    '''
+    manifest = { 'size_deg' : size, 'tiles' : [ dict( tiles[name], file=name + '.uv3' ) for name in sorted( tiles ) ] }
+    with open( os.path.join( path, tiles_manifest ), mode='w' ) as stream:
+        json.dump( manifest, stream, indent=1 )
+
+def tiles_load( path ):
+    '''
+    Read the manifest of the tiles of a directory and return the tile
+    entries by name
+    '''
+    with open( os.path.join( path, tiles_manifest ), mode='r' ) as stream:
+        manifest = json.load( stream )
+    return { os.path.splitext( tile['file'] )[0] : tile for tile in manifest['tiles'] }
+
+def tiles_files( path ):
+    '''
+    Return the paths of the tile files of a directory, given by its
+    manifest
+    '''
+    return [ os.path.join( path, name + '.uv3' ) for name in sorted( tiles_load( path ) ) ]
+
+def tiles_part( path, part ):
+    '''
+    Return the directory of the tiles written by a part of a conversion,
+    named after the part, in the tiles directory
+    '''
+    return os.path.join( path, tiles_prefix + part )
+
+def tiles_lod( path, level ):
+    '''
+    Return the tiles directory of a level of detail, in the tiles directory
+    '''
+    return os.path.join( path, 'lod%d' % level )
+
+def tiles_gather( path, parts, size ):
+    '''
+    Gather the tiles written by the parts of a conversion, given in their
+    order, into the tiles directory and remove the parts directories. A
+    tile written by a single part is moved, the tiles written by several
+    parts are appended one after the other in the order of the parts, so
+    that their records keep the order of the conversion. Return the number
+    of tiles.
+    '''
+    os.makedirs( path, exist_ok=True )
+    tiles = {}
+
+    for part in parts:
+        if not os.path.isfile( os.path.join( part, tiles_manifest ) ):
+            continue
+        for name, tile in sorted( tiles_load( part ).items() ):
+            source = os.path.join( part, tile.pop( 'file' ) )
+            target = os.path.join( path, name + '.uv3' )
+            if name not in tiles:
+                os.replace( source, target )
+                tiles[name] = tile
+            else:
+                with open( target, mode='ab' ) as uv3, open( source, mode='rb' ) as stream:
+                    uv3_append( uv3, stream )
+                tiles_bounds( tiles[name], tile['min'], tile['max'], tile['count'] )
+        shutil.rmtree( part, ignore_errors=True )
+
+    tiles_save( path, size, tiles )
+    return len( tiles )
+
+def tiles_sort( path, max_memory=morton_memory ):
+    '''
+    Sort the records of each tile of a directory along the morton
+    (z-order) curve of the tile, with a memory budget in bytes
+    '''
+    for tile in tiles_files( path ):
+        morton_sort( tile, tile, max_memory )
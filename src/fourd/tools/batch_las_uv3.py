@@ -0,0 +1,445 @@
+#  fourd - batch-las-uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Alessandro Cerioni - alessandro.cerioni@etat.ge.ch
+#     Copyright (c) 2020 STDL, Swiss Territorial Data Lab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from laspy.file import File
+
+import argparse
+import math
+import sys
+import os
+import time
+import hashlib
+import json
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from fourd.cache import cache_entry, cache_load, cache_save
+from fourd.classes import class_counts, class_counts_merge, class_lut, class_report
+from fourd.gps import GPSConverter
+from fourd.las import las_chunk_points, las_classification, las_colour_shift, las_filter, las_filtered_chunks, las_point_bytes, las_scaled
+from fourd.morton import morton_sort
+from fourd.palette import palette_colours, palette_lut
+from fourd.parallel import parallel_run
+from fourd.stats import RangeStatistics
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path, stream_send, stream_temporary
+from fourd.tiles import TileWriter, tiles_files, tiles_gather, tiles_part, tiles_sort
+from fourd.uv3 import UV3Writer, uv3_concatenate, uv3_dtype
+from fourd.uv3z import uv3z_compress, uv3z_output, uv3z_path
+
+# Conversion of one LAS file, appended to the output writer
+def las_file_to_uv3(lasfile, uv3, colouring, colours, colour_range, filters, chunk_points):
+
+        inFile = File(lasfile, mode='r')
+
+        # points selection
+        pm_filter = las_filter(inFile, **filters)
+
+        # coordinate system converter
+        converter = GPSConverter()
+
+        # per-class point counts
+        counts = None
+
+        # 16 bits colours brought on 8 bits
+        if (colouring == 'rgb'):
+                colour_shift = las_colour_shift(inFile, chunk_points)
+
+        for chunk in las_filtered_chunks(inFile, chunk_points, pm_filter):
+
+                # chunks without selected points
+                if (len(chunk) == 0):
+                        continue
+
+                # uv3 records - one primitive per point
+                uv3_records = np.empty( len( chunk ), dtype=uv3_dtype )
+                uv3_records['t'] = 1
+
+                # scaling coordinates
+                X, Y, Z = las_scaled(inFile, chunk)
+
+                # An argument shall be passed to this coordinate system conversion step  
+                converter.LV03toWGS84(X, Y, Z, out=(uv3_records['y'], uv3_records['x'], uv3_records['z']))
+
+                # converting from degrees to radians
+                uv3_records['x'] *= (math.pi / 180) 
+                uv3_records['y'] *= (math.pi / 180) 
+                Z = uv3_records['z']
+
+                # colouring based on elevation
+                if (colouring == 'elevation'):
+
+                        pal = palette_colours(colours, Z, colour_range[0], colour_range[1])
+
+                        uv3_records['r'] = pal[:, 0]
+                        uv3_records['g'] = pal[:, 1]
+                        uv3_records['b'] = pal[:, 2]
+
+                # colouring based on given RGB values
+                elif (colouring == 'rgb'):
+
+                        uv3_records['r'] = chunk['red'] >> colour_shift
+                        uv3_records['g'] = chunk['green'] >> colour_shift
+                        uv3_records['b'] = chunk['blue'] >> colour_shift
+
+                # colouring based on raw classification
+                elif (colouring == 'classification'):
+
+                        C = las_classification(chunk)
+                        col = colours[C]
+                        counts = class_counts(C, counts)
+
+                        uv3_records['r'] = col[:, 0]
+                        uv3_records['g'] = col[:, 1]
+                        uv3_records['b'] = col[:, 2]
+
+                # colouring by intensity
+                else :
+
+                        pal = palette_colours(colours, chunk['intensity'], colour_range[0], colour_range[1])
+
+                        uv3_records['r'] = pal[:, 0]
+                        uv3_records['g'] = pal[:, 1]
+                        uv3_records['b'] = pal[:, 2]
+
+                # write chunk records in bulk #
+                uv3.write( uv3_records )
+
+        # the file is only open while it is converted
+        inFile.close()
+
+        return counts
+
+# Conversion of one LAS file into its own uv3 shard, run by the worker processes
+def las_file_to_shard(lasfile, shard, colouring, colours, colour_range, filters, chunk_points, tiles=None):
+
+        # shard file, or tiles directory of the file the records are routed into
+        with ( UV3Writer( shard ) if tiles is None else TileWriter( shard, tiles ) ) as uv3:
+                return las_file_to_uv3(lasfile, uv3, colouring, colours, colour_range, filters, chunk_points)
+
+# Conversion of the index-th LAS file into its shard, as a range of files
+def las_file_to_shard_at(start, stop, las_file_list, shards, colouring, colours, colour_range, filters, chunk_points):
+
+        return las_file_to_shard(las_file_list[start], shards[start], colouring, colours, colour_range, filters, chunk_points)
+
+# Values the colours are stretched over, chunk by chunk - the file is open while they are read
+def las_file_values(lasfile, colouring, filters, chunk_points):
+
+        inFile = File(lasfile, mode='r')
+
+        try:
+                for chunk in las_filtered_chunks(inFile, chunk_points, las_filter(inFile, **filters)):
+
+                        if (colouring == 'elevation'):
+                                X, Y, Z = las_scaled(inFile, chunk)
+                                yield (Z + 49.55) - (12.60 * ((Y - 2600000) / 1000000)) - (22.64 * ((X - 1200000) / 1000000))
+
+                        else :
+                                yield chunk['intensity']
+
+        finally:
+                inFile.close()
+
+# Main function
+def las_to_uv3(input, output, classification, intensity, rgb, class_palette, chunk_points, stats, clip, workers, cache, filters, sort, tiles, codec='zlib'):
+
+        # conversion written in a plain file, compressed at the end if asked
+        compressed = None
+        if (uv3z_path(output) and tiles is None):
+                compressed, output = output, uv3z_output(output)
+
+        # conversion streamed file after file, or written in a temporary file sent at the end when sorted
+        stream = None
+        if (stream_path(output)):
+                stream = stream_open(output)
+                output = stream if sort != 1 else stream_temporary()
+
+        # defining colouring mode
+        if (rgb == 0 and classification == 0 and intensity == 0):
+                colouring = 'elevation'
+        elif (rgb == 1 and classification == 0 and intensity == 0):
+                colouring = 'rgb'
+        elif (rgb == 0 and classification == 1 and intensity == 0 ):
+                colouring = 'classification'
+        else :
+                colouring = 'intensity'
+
+        # defining colour pallete
+        colours = palette_lut('inferno')
+        colour_range = None
+
+        # reading LiDAR data - files are processed in filename order
+        las_file_list = []
+        path  = input
+        files = sorted(os.listdir(path))
+    
+        for file in files:
+    	        if file.lower().endswith('.las'):
+       		        las_file_list.append(path + file)
+
+        # previous conversions, and whether the files changed since them
+        if (cache is not None):
+                manifest = cache_load(cache)
+                entries = []
+                for lasfile in las_file_list:
+                        entries.append(cache_entry(lasfile, manifest['files'].get(os.path.basename(lasfile))))
+
+        # Colours based on height
+        if (colouring == 'elevation'):
+        
+                print("colouring by elevation... ")
+
+                # bounds of the heights given by the headers - heights decrease with x and y
+                header_h = None
+                for lasfile in las_file_list:
+
+                        # files are opened one at a time, for their header only
+                        inFile = File(lasfile, mode='r')
+                        min_x, min_y, min_z = inFile.header.min
+                        max_x, max_y, max_z = inFile.header.max
+                        inFile.close()
+
+                        low = (min_z + 49.55) - (12.60 * ((max_y - 2600000) / 1000000)) - (22.64 * ((max_x - 1200000) / 1000000))
+                        high = (max_z + 49.55) - (12.60 * ((min_y - 2600000) / 1000000)) - (22.64 * ((min_x - 1200000) / 1000000))
+                        header_h = (low, high) if header_h is None else (min(header_h[0], low), max(header_h[1], high))
+
+                # defining values for the colour pallete
+                if (stats == 'header' and clip is None):
+                        colour_range = header_h
+
+        # Colours based on given RGB values
+        elif (colouring == 'rgb'):
+        
+                print("colouring by given RGB... ")
+
+        # Colours based on raw classification
+        elif (colouring == 'classification'):
+        
+                print("colouring by classification... ")
+
+                # colour of each classification value
+                colours = class_lut(class_palette)
+
+        # Colours based on intensity - intensities are 16 bits integers, binned one by one
+        else :
+                print("colouring by intensity... ")
+
+        # defining values for the colour pallete, out of the points
+        if (colouring == 'intensity' or (colouring == 'elevation' and colour_range is None)):
+
+                # range of each file, kept in the cache for the unchanged ones
+                if (cache is not None and clip is None):
+                        colour_range = None
+                        key = json.dumps({ 'colouring' : colouring, 'filters' : filters }, sort_keys=True)
+                        for lasfile, (entry, changed) in zip(las_file_list, entries):
+                                ranges = entry.setdefault('ranges', {})
+                                if (changed or key not in ranges):
+                                        values = RangeStatistics()
+                                        for chunk_values in las_file_values(lasfile, colouring, filters, chunk_points):
+                                                values.update(chunk_values)
+                                        ranges[key] = None if values.count == 0 else [float(values.min), float(values.max)]
+                                if (ranges[key] is not None):
+                                        colour_range = tuple(ranges[key]) if colour_range is None else (min(colour_range[0], ranges[key][0]), max(colour_range[1], ranges[key][1]))
+
+                else:
+                        values = RangeStatistics((header_h if colouring == 'elevation' else (0, 65536)) if clip is not None else None)
+                        for lasfile in las_file_list:
+                                for chunk_values in las_file_values(lasfile, colouring, filters, chunk_points):
+                                        values.update(chunk_values)
+
+                        colour_range = values.range(clip) if values.count > 0 else None
+
+                # no point selected - the output is empty and the range unused
+                if (colour_range is None):
+                        print("no point selected by the filters... ")
+                        colour_range = (0.0, 1.0)
+
+                if (colouring == 'intensity'):
+                        colour_range = (float( colour_range[0] ), float( colour_range[1] ))
+
+        # per-class point counts
+        counts = None
+
+        # converting files one after another, in a single output stream #
+        if (workers <= 1 and cache is None):
+
+                with ( UV3Writer( output ) if tiles is None else TileWriter( output, tiles ) ) as uv3:
+
+                        for lasfile in las_file_list:
+
+                                print(os.path.basename( lasfile ))
+
+                                counts = class_counts_merge(counts, las_file_to_uv3(lasfile, uv3, colouring, colours, colour_range, filters, chunk_points))
+
+        # converting files one by one into the uv3 shards kept in the cache, only when needed #
+        elif (cache is not None):
+
+                # settings all the shards have to be converted with
+                settings = { 'colouring' : colouring, 'colours' : hashlib.sha256(colours.tobytes()).hexdigest(), 'range' : None if colour_range is None else [float(colour_range[0]), float(colour_range[1])], 'filters' : filters }
+                if (settings != manifest['settings']):
+                        print("conversion settings changed, converting all files... ")
+
+                shards = [os.path.join(cache, os.path.basename(lasfile) + '.uv3') for lasfile in las_file_list]
+                todo = [index for index, (entry, changed) in enumerate(entries) if (changed or settings != manifest['settings'] or 'counts' not in entry or not os.path.isfile(shards[index]))]
+
+                # shards of files removed from the directory
+                names = set(os.path.basename(lasfile) for lasfile in las_file_list)
+                for name in manifest['files']:
+                        if name not in names and os.path.isfile(os.path.join(cache, name + '.uv3')):
+                                os.remove(os.path.join(cache, name + '.uv3'))
+
+                results = parallel_run(las_file_to_shard_at, [(index, index + 1) for index in todo], workers, las_file_list, shards, colouring, colours, colour_range, filters, chunk_points)
+
+                for index, result in zip(todo, results):
+                        print(os.path.basename( las_file_list[index] ))
+                        entries[index][0]['counts'] = None if result is None else result.tolist()
+
+                manifest = { 'settings' : settings, 'files' : { os.path.basename(lasfile) : entry for lasfile, (entry, changed) in zip(las_file_list, entries) } }
+                cache_save(cache, manifest)
+
+                print("%d file(s) converted, %d unchanged" % (len(todo), len(las_file_list) - len(todo)))
+
+                for entry, changed in entries:
+                        if (entry['counts'] is not None):
+                                counts = class_counts_merge(counts, np.asarray(entry['counts'], dtype=np.int64))
+
+                # shards assembled in order, or routed into the tiles
+                if (tiles is None):
+                        uv3_concatenate(output, shards)
+                else:
+                        with TileWriter(output, tiles) as uv3:
+                                for shard in shards:
+                                        uv3.route(shard)
+
+        # converting files in parallel, one uv3 shard per file, concatenated in order #
+        else:
+
+                # shards directory, only needed when the shards are not tiles
+                shard_path = None
+
+                try:
+                        # shard of each file, or tiles directory of each file
+                        if (tiles is None):
+                                shard_path = tempfile.mkdtemp(prefix='uv3-shards-', dir=None if output is stream else os.path.dirname(os.path.abspath(output)))
+                                shards = [os.path.join(shard_path, '%06d.uv3' % index) for index in range(len(las_file_list))]
+                        else:
+                                shards = [tiles_part(output, '%06d' % index) for index in range(len(las_file_list))]
+
+                        with ProcessPoolExecutor(max_workers=workers) as pool:
+                                jobs = [pool.submit(las_file_to_shard, lasfile, shard, colouring, colours, colour_range, filters, chunk_points, tiles) for lasfile, shard in zip(las_file_list, shards)]
+
+                                for lasfile, shard, job in zip(las_file_list, shards, jobs):
+                                        counts = class_counts_merge(counts, job.result())
+                                        print(os.path.basename( lasfile ))
+
+                                        # shards streamed in order, as soon as converted
+                                        if (output is stream):
+                                                stream_send(shard, stream)
+
+                        if (tiles is not None):
+                                tiles_gather(output, shards, tiles)
+                        elif (output is not stream):
+                                uv3_concatenate(output, shards)
+
+                finally:
+                        if (shard_path is not None):
+                                shutil.rmtree(shard_path, ignore_errors=True)
+
+        # display per-class point counts
+        if (colouring == 'classification'):
+                class_report(counts)
+
+        # spatial sort of the output, or of each tile #
+        if (sort == 1):
+                print("sorting points... ")
+                if (tiles is None):
+                        morton_sort(output, output, chunk_points * las_point_bytes)
+                else:
+                        tiles_sort(output, chunk_points * las_point_bytes)
+
+        # compression of the output #
+        if (compressed is not None):
+                uv3z_compress(output, compressed, codec)
+
+        # tiles written in the output directory #
+        if (tiles is not None):
+                print("%d tiles written" % len(tiles_files(output)))
+
+        # conversion sent to the output stream #
+        if (stream is not None):
+                if (output is not stream):
+                        stream_send(output, stream)
+                stream_close(stream)
+
+def main( argv=None, prog=None ):
+
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str  , help='las folder path'    )
+    pm_argparse.add_argument( '-o', '--output' , type=str  , help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-r', '--rgb', type=int, default = 0, help='whether rgb values are recorded in the las file. Default to False' )
+    pm_argparse.add_argument( '-c', '--classification', type=int, default = 0, help='whether colours should refer to point classification. Default to False' )
+    pm_argparse.add_argument( '-k', '--class-palette', type=str, default=None, help='JSON or TOML file giving the colour of each classification value. Default to the LAS classes colours' )
+    pm_argparse.add_argument( '-t', '--intensity', type=int, default=0, help='whether colours should refer to intensity. Default to False' )
+    pm_argparse.add_argument( '--stats', type=str, default='exact', choices=['exact', 'header'], help='whether the elevation colour range is computed out of the points (exact) or out of the LAS headers bounds, without reading points (header). Default to exact' )
+    pm_argparse.add_argument( '--clip', type=float, nargs=2, default=None, metavar=('LOW', 'HIGH'), help='percentiles bounding the colour range, e.g. 2 98 for a robust colour stretching. Default to the whole range' )
+    pm_argparse.add_argument( '--bbox', type=float, nargs=4, default=None, metavar=('XMIN', 'YMIN', 'XMAX', 'YMAX'), help='only convert the points inside this box, given in the las files coordinates. Default to all points' )
+    pm_argparse.add_argument( '--classes', type=int, nargs='+', default=None, help='only convert the points of these classification values, e.g. 2 6 for ground and buildings. Default to all points' )
+    pm_argparse.add_argument( '--returns', type=str, default=None, help='only convert the first, the last or the given number of return of the pulses (first, last or a number). Default to all points' )
+    pm_argparse.add_argument( '--intensity-range', type=int, nargs=2, default=None, metavar=('LOW', 'HIGH'), help='only convert the points whose intensity is within this range. Default to all points' )
+    pm_argparse.add_argument( '--sort', type=int, default=0, help='whether the output points are sorted along a morton (z-order) curve. Default to False' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '-w', '--workers', type=int, default=1, help='number of processes converting files in parallel. Default to 1' )
+    pm_argparse.add_argument( '--cache', type=str, default=None, help='directory keeping the uv3 conversion of each file, so that only new or changed files are converted again. Default to no cache' )
+    pm_argparse.add_argument( '--chunk-points', type=int, default=1000000, help='number of points read, converted and written at once. Default to 1000000' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes from which the chunk size is derived, overriding --chunk-points' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )      
+
+    # tiles are files, written in the output directory #
+    if stream_path( pm_args.output ) and pm_args.tiles is not None:
+        pm_argparse.error( 'tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # points selection #
+        pm_filters = { 'bbox' : pm_args.bbox, 'classes' : pm_args.classes, 'returns' : pm_args.returns, 'intensity' : pm_args.intensity_range }
+
+        # display message #
+        print( 'Processing files... ')
+
+        tic = time.time()
+
+        # process file #
+        las_to_uv3( pm_args.input, pm_args.output, pm_args.classification, pm_args.intensity, pm_args.rgb, pm_args.class_palette, las_chunk_points( pm_args.chunk_points, pm_args.max_memory ), pm_args.stats, pm_args.clip, pm_args.workers, pm_args.cache, pm_filters, pm_args.sort, pm_args.tiles, pm_args.codec )
+
+        toc = time.time()
+
+        # exit message #
+        return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
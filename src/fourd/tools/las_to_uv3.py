@@ -0,0 +1,384 @@
+#  fourd - las-to-uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Alessandro Cerioni - alessandro.cerioni@etat.ge.ch
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from laspy.file import File
+
+import argparse
+import math
+import sys
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+
+from fourd.classes import class_counts, class_counts_merge, class_lut, class_report
+from fourd.gps import GPSConverter
+from fourd.las import las_chunk_points, las_chunks, las_classification, las_colour_shift, las_filter, las_filtered_chunks, las_mask, las_point_bytes, las_scaled
+from fourd.lod import lod_buckets, lod_build, lod_dtype, lod_output, lod_split, lod_voxels
+from fourd.morton import morton_sort
+from fourd.palette import palette_colours, palette_lut
+from fourd.parallel import parallel_ranges, parallel_run
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path, stream_send, stream_temporary
+from fourd.tiles import TileWriter, tiles_gather, tiles_lod, tiles_part, tiles_sort
+from fourd.uv3 import UV3Writer, uv3_allocate, uv3_dtype
+from fourd.uv3z import uv3z_compress, uv3z_extension, uv3z_output, uv3z_path
+
+# Conversion of a range of points, written at their place in the output file
+def las_range_to_uv3(start, stop, index, input, output, colouring, colours, colour_range, colour_shift, swiss, filters, chunk_points, lod, tiles=None):
+
+    # reading LiDAR data
+    inFile = File(input, mode='r')
+
+    try:
+
+        # points selection
+        pm_filter = las_filter(inFile, **filters)
+
+        # coordinate system converter
+        converter = GPSConverter()
+
+        # per-class point counts
+        counts = None
+
+        # open output stream - records are written at their own offset, or routed into the tiles of the range #
+        with ( UV3Writer( output, index ) if tiles is None else TileWriter( tiles_part( output, '%012d' % start ), tiles ) ) as uv3:
+
+            for chunk in las_filtered_chunks(inFile, chunk_points, pm_filter, start, stop):
+
+                # chunks without selected points
+                if len(chunk) == 0:
+                    continue
+
+                # uv3 records - one primitive per point
+                uv3_records = np.empty( len( chunk ), dtype=uv3_dtype )
+                uv3_records['t'] = 1
+
+                # scaling coordinates
+                X, Y, Z = las_scaled(inFile, chunk)
+
+                # voxels of the points, in the las file coordinates
+                if lod is not None:
+                    I, J, K = lod_voxels(X, Y, Z, lod['origin'], lod['voxel'])
+
+                # if statement for converting from CH1903+ to WGS84, written straight into the records
+                if (swiss == 1):
+                    converter.LV03toWGS84(X, Y, Z, out=(uv3_records['y'], uv3_records['x'], uv3_records['z']))
+
+                else:
+                    uv3_records['x'] = X
+                    uv3_records['y'] = Y
+                    uv3_records['z'] = Z
+
+                # converting from degrees to radians
+                uv3_records['x'] *= (math.pi / 180) 
+                uv3_records['y'] *= (math.pi / 180) 
+                Z = uv3_records['z']
+
+                # colouring based on elevation
+                if (colouring == 'elevation'):
+
+                    col = palette_colours(colours, Z, colour_range[0], colour_range[1])
+
+                    uv3_records['r'] = col[:, 0]
+                    uv3_records['g'] = col[:, 1]
+                    uv3_records['b'] = col[:, 2]
+
+                # colouring based on given RGB values
+                elif (colouring == 'rgb'):
+
+                    uv3_records['r'] = chunk['red'] >> colour_shift
+                    uv3_records['g'] = chunk['green'] >> colour_shift
+                    uv3_records['b'] = chunk['blue'] >> colour_shift
+
+                # colouring based on raw classification
+                elif (colouring == 'classification'):
+
+                    C = las_classification(chunk)
+                    col = colours[C]
+                    counts = class_counts(C, counts)
+
+                    uv3_records['r'] = col[:, 0]
+                    uv3_records['g'] = col[:, 1]
+                    uv3_records['b'] = col[:, 2]
+
+                # colouring by intensity
+                else :
+
+                    col = palette_colours(colours, chunk['intensity'], colour_range[0], colour_range[1])
+
+                    uv3_records['r'] = col[:, 0]
+                    uv3_records['g'] = col[:, 1]
+                    uv3_records['b'] = col[:, 2]
+
+                # write chunk records in bulk, at their offset #
+                uv3.write( uv3_records )
+
+                # records spread over the voxels of the first level of detail
+                if lod is not None:
+                    lod_records = np.empty( len( chunk ), dtype=lod_dtype )
+                    for name in uv3_dtype.names:
+                        lod_records[name] = uv3_records[name]
+                    lod_records['n'] = np.arange( index, index + len( chunk ) )
+                    lod_records['i'] = I
+                    lod_records['j'] = J
+                    lod_records['k'] = K
+                    lod_split( lod['path'], 0, '%012d' % start, lod_records, lod['buckets'] )
+                index += len( chunk )
+
+        return counts
+
+    finally:
+        inFile.close()
+
+# Number of points of a range kept by the filters
+def las_range_count(start, stop, input, filters, chunk_points):
+
+    inFile = File(input, mode='r')
+
+    try:
+        pm_filter = las_filter(inFile, **filters)
+        return sum(int(np.count_nonzero(las_mask(pm_filter, chunk))) for chunk in las_chunks(inFile, chunk_points, start, stop))
+
+    finally:
+        inFile.close()
+
+# Main function
+def las_to_uv3(input, output, classification, intensity, rgb, palette, swiss, class_palette, chunk_points, workers, filters, lod_levels, lod_voxel, sort, tiles, codec='zlib'):
+    
+    # conversion written in a plain file, compressed at the end if asked
+    compressed = None
+    if uv3z_path( output ) and tiles is None:
+        compressed, output = output, uv3z_output( output )
+
+    # conversion streamed in order by a single process, or written in a temporary file sent at the end
+    stream = None
+    if stream_path( output ):
+        stream = stream_open( output )
+        output = stream if ( workers <= 1 and sort != 1 ) else stream_temporary()
+
+    # reading LiDAR data
+    inFile = File(input, mode='r')
+
+    # points selection
+    pm_filter = las_filter(inFile, **filters)
+
+    # defining colour palette, sampled once
+    colours = palette_lut(palette)
+    colour_range = None
+    colour_shift = 0
+    
+    # Colours based on height
+    if (rgb == 0 and classification == 0 and intensity == 0):
+        
+        print("colouring by elevation")
+        colouring = 'elevation'
+
+        # defining values for the colour pallete, reduced chunk by chunk
+        min_h = None
+        max_h = None
+        for chunk in las_filtered_chunks(inFile, chunk_points, pm_filter):
+            if len(chunk) == 0:
+                continue
+            X, Y, Z = las_scaled(inFile, chunk)
+            h = (Z + 49.55) - (12.60 * ((Y - 2600000) / 1000000)) - (22.64 * ((X - 1200000) / 1000000))
+            min_h = h.min() if min_h is None else min(min_h, h.min())
+            max_h = h.max() if max_h is None else max(max_h, h.max())
+
+        # no point selected - the output is empty and the range unused
+        if min_h is None:
+            print("no point selected by the filters")
+            min_h, max_h = 0.0, 1.0
+
+        colour_range = (min_h, max_h)
+    
+    # Colours based on given RGB values
+    elif (rgb == 1 and classification == 0 and intensity == 0):
+        
+        print("colouring by given RGB")
+        colouring = 'rgb'
+
+        # 16 bits colours brought on 8 bits
+        colour_shift = las_colour_shift(inFile, chunk_points)
+        if (colour_shift > 0):
+            print("16 bits colours scaled to 8 bits")
+         
+    # Colours based on raw classification
+    elif (rgb == 0 and classification == 1 and intensity == 0 ):
+        
+        print("colouring by classification")
+        colouring = 'classification'
+
+        # colour of each classification value
+        colours = class_lut(class_palette)
+    
+    # Colours based on intensity
+    else :
+       
+        print("colouring by intensity")
+        colouring = 'intensity'
+
+        # defining values for the colour pallete, reduced chunk by chunk
+        min_t = None
+        max_t = None
+        for chunk in las_filtered_chunks(inFile, chunk_points, pm_filter):
+            if len(chunk) == 0:
+                continue
+            I = chunk['intensity']
+            min_t = I.min() if min_t is None else min(min_t, I.min())
+            max_t = I.max() if max_t is None else max(max_t, I.max())
+        if max_t is not None:
+            max_t = max_t / 100
+
+        # no point selected - the output is empty and the range unused
+        else:
+            print("no point selected by the filters")
+            min_t, max_t = 0.0, 1.0
+
+        colour_range = (min_t, max_t)
+
+    # ranges of points, converted in parallel if asked #
+    ranges = parallel_ranges( inFile.header.point_records_count, workers )
+
+    # number of points of each range written in the output file #
+    if pm_filter is None:
+        sizes = [ stop - start for start, stop in ranges ]
+    else:
+        sizes = parallel_run( las_range_count, ranges, workers, input, filters, chunk_points )
+
+    # place of the first point of each range in the output file #
+    indexes = np.concatenate( ( [ 0 ], np.cumsum( sizes, dtype=np.int64 ) ) )
+
+    # create output file, sized for one record per kept point #
+    if output is not stream and tiles is None:
+        uv3_allocate( output, int( indexes[-1] ) )
+
+    # levels of detail - voxels start at the lower corner of the las file #
+    lod = None
+    if lod_levels > 0:
+        lod = { 'path' : tempfile.mkdtemp( prefix='uv3-lod-', dir=os.path.dirname( os.path.abspath( output ) ) ), 'origin' : tuple( inFile.header.min ), 'voxel' : lod_voxel, 'buckets' : lod_buckets( int( indexes[-1] ), chunk_points * las_point_bytes ) }
+
+    # the ranges open the las file on their own
+    inFile.close()
+
+    try:
+
+        # convert ranges of points #
+        ranges = [ ( start, stop, int( index ) ) for ( start, stop ), index in zip( ranges, indexes ) ]
+        results = parallel_run( las_range_to_uv3, ranges, workers, input, output, colouring, colours, colour_range, colour_shift, swiss, filters, chunk_points, lod, tiles )
+
+        # tiles of the ranges gathered in the output directory #
+        if tiles is not None:
+            print( "%d tiles written" % tiles_gather( output, [ tiles_part( output, '%012d' % start ) for start, stop, index in ranges ], tiles ) )
+
+        # keep one point per voxel, level after level #
+        if lod is not None:
+            lod_counts = lod_build( lod['path'], [ '%012d' % start for start, stop, index in ranges ], output, lod_levels, int( indexes[-1] ), chunk_points * las_point_bytes, tiles )
+            for level, count in enumerate( lod_counts ):
+                print( "level of detail %d : %d points" % ( level + 1, count ) )
+
+    finally:
+        if lod is not None:
+            shutil.rmtree( lod['path'], ignore_errors=True )
+
+    # display per-class point counts
+    if (colouring == 'classification'):
+        counts = None
+        for result in results:
+            counts = class_counts_merge(counts, result)
+        class_report(counts)
+
+    # spatial sort of the output and levels of detail, or of each of their tiles #
+    if sort == 1:
+        print( "sorting points..." )
+        if tiles is None:
+            for path in [ output ] + [ lod_output( output, level + 1 ) for level in range( lod_levels ) ]:
+                morton_sort( path, path, chunk_points * las_point_bytes )
+        else:
+            for path in [ output ] + [ tiles_lod( output, level + 1 ) for level in range( lod_levels ) ]:
+                tiles_sort( path, chunk_points * las_point_bytes )
+
+    # compression of the output and levels of detail #
+    if compressed is not None:
+        uv3z_compress( output, compressed, codec )
+        for level in range( lod_levels ):
+            uv3z_compress( lod_output( output, level + 1 ), os.path.splitext( lod_output( compressed, level + 1 ) )[0] + uv3z_extension, codec )
+
+    # conversion sent to the output stream #
+    if stream is not None:
+        if output is not stream:
+            stream_send( output, stream )
+        stream_close( stream )
+    
+def main( argv=None, prog=None ):
+
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str  , help='las file path'    )
+    pm_argparse.add_argument( '-o', '--output' , type=str  , help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-r', '--rgb', type=int, default = 0, help='whether rgb values are recorded in the las file. Default to False' )
+    pm_argparse.add_argument( '-c', '--classification', type=int, default = 0, help='whether colours should refer to point classification. Default to False' )
+    pm_argparse.add_argument( '-k', '--class-palette', type=str, default=None, help='JSON or TOML file giving the colour of each classification value. Default to the LAS classes colours' )
+    pm_argparse.add_argument( '-t', '--intensity', type=int, default=0, help='whether colours should refer to intensity. Default to False' )
+    pm_argparse.add_argument( '-p', '--palette', type=str, default='inferno' , help='matplotlib colour palette name')
+    pm_argparse.add_argument( '-s', '--swiss', type=int, default=0 , help='if set as true (1), this is converting data from the swiss coordinate system CH1093+ (EPSG:2056) to WGS84')
+    pm_argparse.add_argument( '--bbox', type=float, nargs=4, default=None, metavar=('XMIN', 'YMIN', 'XMAX', 'YMAX'), help='only convert the points inside this box, given in the las file coordinates. Default to all points' )
+    pm_argparse.add_argument( '--classes', type=int, nargs='+', default=None, help='only convert the points of these classification values, e.g. 2 6 for ground and buildings. Default to all points' )
+    pm_argparse.add_argument( '--returns', type=str, default=None, help='only convert the first, the last or the given number of return of the pulses (first, last or a number). Default to all points' )
+    pm_argparse.add_argument( '--intensity-range', type=int, nargs=2, default=None, metavar=('LOW', 'HIGH'), help='only convert the points whose intensity is within this range. Default to all points' )
+    pm_argparse.add_argument( '--lod', type=int, default=0, help='number of levels of detail written next to the output file, each one keeping a single point per voxel. Default to 0' )
+    pm_argparse.add_argument( '--lod-voxel', type=float, default=1.0, help='edge of the voxels of the first level of detail, in the las file coordinates units, doubling from one level to the next. Default to 1' )
+    pm_argparse.add_argument( '--sort', type=int, default=0, help='whether the output points are sorted along a morton (z-order) curve. Default to False' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '-w', '--workers', type=int, default=1, help='number of processes converting ranges of points in parallel. Default to 1' )
+    pm_argparse.add_argument( '--chunk-points', type=int, default=1000000, help='number of points read, converted and written at once. Default to 1000000' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes from which the chunk size is derived, overriding --chunk-points' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )      
+
+    # levels of detail and tiles are files, written next to the output #
+    if stream_path( pm_args.output ) and ( pm_args.lod > 0 or pm_args.tiles is not None ):
+        pm_argparse.error( 'levels of detail and tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # points selection #
+        pm_filters = { 'bbox' : pm_args.bbox, 'classes' : pm_args.classes, 'returns' : pm_args.returns, 'intensity' : pm_args.intensity_range }
+
+        # display message #
+        print( 'Processing file : ' + os.path.basename( pm_args.input ) + '...' )
+
+        tic = time.time()
+
+        # process file #
+        las_to_uv3( pm_args.input, pm_args.output, pm_args.classification, pm_args.intensity, pm_args.rgb, pm_args.palette, pm_args.swiss, pm_args.class_palette, las_chunk_points( pm_args.chunk_points, pm_args.max_memory ), pm_args.workers, pm_filters, pm_args.lod, pm_args.lod_voxel, pm_args.sort, pm_args.tiles, pm_args.codec )
+
+        toc = time.time()
+
+        # exit message #
+        return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
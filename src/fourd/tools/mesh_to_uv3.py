@@ -0,0 +1,116 @@
+#  fourd - mesh-to-uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com     
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pymesh
+import argparse
+import math
+import sys
+import numpy as np
+
+from fourd.gps import GPSConverter
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path
+from fourd.tiles import TileWriter
+from fourd.uv3 import uv3_dtype
+from fourd.uv3z import uv3z_writer
+
+def mesh_to_uv3(mesh_path, output, swiss, scaling, tiles, codec='zlib'):
+
+    # conversion sent to an output stream as it is written
+    stream = None
+    if (stream_path(output)):
+        stream = output = stream_open(output)
+
+    mesh = pymesh.load_mesh(mesh_path)
+
+    # vertices coordinates - conversion is done once per vertex, not once per triangle corner
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+
+    if (scaling != 0):
+
+        #scaling of the coordinates - This is most probably changing from file to file. The usage below referes to SITG's datasets
+        conv_x = (vertices[:, 0] - 2480000) * -1
+        conv_y = (vertices[:, 1] - 1109000) * -1
+        conv_z = vertices[:, 2]
+
+    else:
+
+        conv_x = vertices[:, 0]
+        conv_y = vertices[:, 1]
+        conv_z = vertices[:, 2]
+
+    # uv3 records of every vertex
+    vertex_records = np.empty(len(vertices), dtype=uv3_dtype)
+
+    if (swiss != 0):
+
+        #conversion to WGS84 from the swiss coordinate system CH1903+
+        converter = GPSConverter()
+        converter.LV03toWGS84(conv_x, conv_y, conv_z, out=(vertex_records['y'], vertex_records['x'], vertex_records['z']))
+
+    else:
+
+        vertex_records['x'] = conv_y
+        vertex_records['y'] = conv_x
+        vertex_records['z'] = conv_z
+
+    #conversion to radians
+    vertex_records['x'] *= (math.pi/180)
+    vertex_records['y'] *= (math.pi/180)
+
+    #triangles primitive and colour
+    vertex_records['t'] = 3
+    vertex_records['r'] = 173
+    vertex_records['g'] = 73
+    vertex_records['b'] = 74
+
+    # output stream, compressed if asked, or tiles the records are routed into
+    with ( uv3z_writer( output, codec ) if tiles is None else TileWriter( output, tiles ) ) as uv3:
+
+        #writing the uv3 file - three records per triangle, gathered from the faces indices
+        uv3.write( vertex_records[np.asarray(mesh.faces).reshape(-1)] )
+
+    # end of the output stream
+    if (stream is not None):
+        stream_close(stream)
+
+def main(argv=None, prog=None):
+
+    t_argparse = argparse.ArgumentParser(prog=prog)
+    t_argparse.add_argument( '-i', '--mesh', type=str  , help='mesh path' )
+    t_argparse.add_argument( '-o', '--uv3', type=str  , help='uv3 file path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    t_argparse.add_argument( '-s', '--swiss', type=int, default=0, help='whether coordinates are in the swiss system CH1903+ (1), or not (0). Default to zero')
+    t_argparse.add_argument( '--scaling', type=int, default=0, help='whether SITG Scaling should be applied (1) or not(0). Default to zero')
+    t_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    t_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+    t_args = t_argparse.parse_args(argv)
+
+    # tiles are files, written in the output directory
+    if (stream_path(t_args.uv3) and t_args.tiles is not None):
+        t_argparse.error('tiles require an output path, not a stream')
+
+    # messages kept off the output while it is streamed to stdout
+    with stream_messages(t_args.uv3):
+        mesh_to_uv3(t_args.mesh, t_args.uv3, t_args.swiss, t_args.scaling, t_args.tiles, t_args.codec)
+
+        return 'Done'
+
+if __name__ == '__main__':
+
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#  fourd - rgb-from-geotiff
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import math
+import sys
+import os
+import numpy as np
+
+from fourd.morton import morton_memory, morton_sort
+from fourd.parallel import parallel_ranges, parallel_run
+from fourd.raster import raster_colours, raster_open, raster_read, raster_window_pixels, raster_windows
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path, stream_send, stream_temporary
+from fourd.tiles import TileWriter, tiles_gather, tiles_part, tiles_sort
+from fourd.uv3 import UV3Writer, uv3_allocate, uv3_dtype
+from fourd.uv3z import uv3z_compress, uv3z_output, uv3z_path
+
+# Borrowed and Adapted from Aaron Schmocker [aaron@duckpond.ch]
+# Source: http://www.swisstopo.admin.ch/internet/swisstopo/en/home/topics/survey/sys/refsys/projections.html (see PDFs under "Documentation")
+# guthub script: https://github.com/hurielreichel/Swisstopo-WGS84-LV03/blob/master/scripts/py/wgs84_ch1903.py
+
+def pm_assign_rgb( pm_1, pm_2, pm_input, pm_output, pm_bands, pm_x, pm_y, pm_pw, pm_ph, pm_w, pm_h, pm_order, pm_pixels, pm_tiles=None ): 
+
+        # open raster in this process #
+        pm_geotiff = raster_open( pm_input )
+        pm_bands = [ pm_geotiff.GetRasterBand( pm_band ) for pm_band in pm_bands ]
+
+        # raster columns and rows positions, shared by every block #
+        pm_rx = ( ( np.arange( pm_w ) * pm_pw ) + pm_x ) * ( math.pi/180 )
+        pm_ry = ( pm_y - ( np.arange( pm_h ) * pm_ph ) ) * ( math.pi/180 )
+
+        # open output stream - pixels are written at their own offset, or routed into the tiles of the range #
+        with ( UV3Writer( pm_output, pm_1 * ( pm_w if ( pm_order == 'row' ) else pm_h ) ) if pm_tiles is None else TileWriter( tiles_part( pm_output, '%012d' % pm_1 ), pm_tiles ) ) as uv3:
+
+           # the range is made of rows, or of columns, read by windows of whole raster blocks #
+           for pm_b1, pm_count, _ in raster_windows( pm_bands[0], pm_1, pm_2, pm_order, pm_pixels ):
+               pm_b2 = pm_b1 + pm_count
+
+               # read the window of each band - pixels are written row by row, or column by column #
+               pm_rgb = [ raster_read( pm_band, pm_order, pm_b1, pm_count ) for pm_band in pm_bands ]
+               if ( pm_order == 'column' ):
+                   pm_rgb = [ pm_raster.T for pm_raster in pm_rgb ]
+
+               # colours larger than a byte are rejected, negative values are given eratosthene's background colour #
+               raster_colours( pm_rgb )
+               pm_nodata = ( pm_rgb[0] < 0 ) | ( pm_rgb[1] < 0 ) | ( pm_rgb[2] < 0 )
+
+               pm_records = np.empty( pm_rgb[0].shape, dtype=uv3_dtype )
+               if ( pm_order == 'row' ):
+                   pm_records['x'] = pm_rx[np.newaxis, :]
+                   pm_records['y'] = pm_ry[pm_b1:pm_b2, np.newaxis]
+               else:
+                   pm_records['x'] = pm_rx[pm_b1:pm_b2, np.newaxis]
+                   pm_records['y'] = pm_ry[np.newaxis, :]
+               pm_records['z'] = 0
+               pm_records['t'] = 1
+               for pm_field, pm_raster, pm_background in zip( ( 'r', 'g', 'b' ), pm_rgb, ( 7, 10, 12 ) ):
+                   pm_records[pm_field] = np.where( pm_nodata, pm_background, pm_raster )
+               uv3.write( pm_records.reshape( -1 ) )
+                
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str  , help='geotiff path'    )
+    pm_argparse.add_argument( '-o', '--output' , type=str  , help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-r', '--red' , type=int, default=1, help='integer refering to the number of the band to replace (or not) the red band, default being 1' )
+    pm_argparse.add_argument( '-g', '--green' , type=int, default=2, help='integer refering to the number of the band to replace (or not) the green band, default being 2' )
+    pm_argparse.add_argument( '-b', '--blue' , type=int, default=3, help='integer refering to the number of the band to replace (or not) the blue band, default being 3' )
+    pm_argparse.add_argument( '--order', type=str, default='row', choices=['row', 'column'], help='whether pixels are written row by row, following the raster, or column by column, as by the former versions of the tool. Default to row' )
+    pm_argparse.add_argument( '--sort', type=int, default=0, help='whether the output points are sorted along a morton (z-order) curve. Default to False' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes of each process, from which the number of raster rows or columns read at once, and the runs of the spatial sort, are derived. Default to about a million pixels at once' )
+    pm_argparse.add_argument( '-w', '--workers', type=int, default=1, help='number of processes converting ranges of rows, or of columns, in parallel. Default to 1' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # tiles are files, written in the output directory #
+    if ( stream_path( pm_args.output ) and pm_args.tiles is not None ):
+        pm_argparse.error( 'tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # GDAL open geotiff file, in WGS84 #
+        pm_geotiff = raster_open( pm_args.input )
+
+        # extract raster resolution #
+        pm_width = pm_geotiff.RasterXSize
+        pm_height = pm_geotiff.RasterYSize
+
+        # retrieve raster transformation #
+        pm_gtrans = pm_geotiff.GetGeoTransform()
+
+        # retrieve raster geographic parameters #
+        pm_x = pm_gtrans[0] # origin x #
+        pm_y = pm_gtrans[3] # origin y #
+        pm_pw = pm_gtrans[1] # pixel width #
+        pm_ph = -pm_gtrans[5] # pixel height #
+
+        # display message #
+        print( 'Processing file : ' + os.path.basename( pm_args.input ) + '...' )
+
+        # conversion written in a plain file, compressed at the end if asked #
+        pm_output = pm_args.output
+        if ( uv3z_path( pm_output ) and pm_args.tiles is None ):
+            pm_output = uv3z_output( pm_output )
+
+        # conversion streamed in order by a single process, or written in a temporary file sent at the end #
+        pm_stream = None
+        if ( stream_path( pm_output ) ):
+            pm_stream = stream_open( pm_output )
+            pm_output = pm_stream if ( pm_args.workers <= 1 and pm_args.sort != 1 ) else stream_temporary()
+
+        # create output file, sized for one record per pixel #
+        if ( pm_output is not pm_stream and pm_args.tiles is None ):
+            uv3_allocate( pm_output, pm_width * pm_height )
+
+        # process file, by ranges of rows or of columns #
+        pm_ranges = parallel_ranges( pm_height if ( pm_args.order == 'row' ) else pm_width, pm_args.workers )
+        parallel_run( pm_assign_rgb, pm_ranges, pm_args.workers, pm_args.input, pm_output, ( pm_args.red, pm_args.green, pm_args.blue ), pm_x, pm_y, pm_pw, pm_ph, pm_width, pm_height, pm_args.order, raster_window_pixels( pm_args.max_memory ), pm_args.tiles )
+
+        # tiles of the ranges gathered in the output directory #
+        if ( pm_args.tiles is not None ):
+            tiles_gather( pm_output, [ tiles_part( pm_output, '%012d' % pm_1 ) for pm_1, pm_2 in pm_ranges ], pm_args.tiles )
+
+        # spatial sort of the output, or of each tile #
+        if ( pm_args.sort == 1 ):
+            pm_memory = morton_memory if ( pm_args.max_memory is None ) else pm_args.max_memory * 1024 * 1024
+            if ( pm_args.tiles is None ):
+                morton_sort( pm_output, pm_output, pm_memory )
+            else:
+                tiles_sort( pm_output, pm_memory )
+
+        # compression of the output #
+        if ( uv3z_path( pm_args.output ) and pm_args.tiles is None ):
+            uv3z_compress( pm_output, pm_args.output, pm_args.codec )
+
+        # conversion sent to the output stream #
+        if ( pm_stream is not None ):
+            if ( pm_output is not pm_stream ):
+                stream_send( pm_output, pm_stream )
+            stream_close( pm_stream )
+
+        # exit message #
+        return 'Done'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
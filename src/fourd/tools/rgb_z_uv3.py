@@ -0,0 +1,198 @@
+#  fourd - rgb-z-uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import math
+import sys
+import os
+import numpy as np
+
+from fourd.raster import RasterCache, raster_cache_memory, raster_colours, raster_open, raster_pixels, raster_read, raster_sample, raster_window_pixels, raster_windows
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path
+from fourd.tiles import TileWriter
+from fourd.uv3 import uv3_dtype
+from fourd.uv3z import uv3z_writer
+
+PM_R2D = ( 180. / math.pi )
+
+def pm_dem_nodata( pm_raster_z ):
+
+    # replace no data value #
+    return np.where( pm_raster_z < -34020000000, int( 0 ), pm_raster_z)
+
+def pm_rgb_plus_z(uv3, pm_cache, pm_band_r, pm_band_g, pm_band_b, pm_x, pm_y, pm_pw, pm_ph, pm_w, pm_h, pm_ztif_x, pm_ztif_y, pm_ztif_pw, pm_ztif_ph, pm_pixels=raster_pixels, pm_order='row'):
+
+        # geographical coordinates of the raster columns and rows, shared by every window #
+        pm_rx = ( ( np.arange( pm_w ) * pm_pw ) + pm_x ) * ( math.pi/180 )
+        pm_ry = ( pm_y - ( np.arange( pm_h ) * pm_ph ) ) * ( math.pi/180 )
+
+        # pixels are written row by row, or column by column, read by windows of rows or of columns #
+        for pm_b1, pm_count, _ in raster_windows( pm_band_r, 0, pm_h if ( pm_order == 'row' ) else pm_w, pm_order, pm_pixels ):
+
+            # read the window lines only, indexed by row then column #
+            pm_raster_r = raster_read( pm_band_r, pm_order, pm_b1, pm_count )
+            pm_raster_g = raster_read( pm_band_g, pm_order, pm_b1, pm_count )
+            pm_raster_b = raster_read( pm_band_b, pm_order, pm_b1, pm_count )
+
+            # geographical coordinates of the window columns and rows #
+            if ( pm_order == 'row' ):
+                pm_wx, pm_wy = pm_rx, pm_ry[pm_b1:pm_b1 + pm_count]
+            else:
+                pm_wx, pm_wy = pm_rx[pm_b1:pm_b1 + pm_count], pm_ry
+
+            # pixel coordinates on the z-value-tif, computed separably for the columns and the rows #
+            pm_zx = ( ( pm_wx * 180/math.pi ) - pm_ztif_x ) / pm_ztif_pw
+            pm_zy = ( pm_ztif_y - ( pm_wy * 180/math.pi ) ) / pm_ztif_ph
+
+            # elevation model window under the raster window, with the next column and row for the interpolation #
+            pm_z1 = max( 0, int( pm_zx.min() ) )
+            pm_z2 = min( pm_cache.width, int( pm_zx.max() ) + 2 )
+            pm_l1 = max( 0, int( pm_zy.min() ) )
+            pm_l2 = min( pm_cache.height, int( pm_zy.max() ) + 2 )
+
+            # format raster pm_raster_z, out of the cached elevation model blocks #
+            pm_raster_z = None
+            if pm_z1 < pm_z2 and pm_l1 < pm_l2:
+                pm_raster_z = pm_cache.read( pm_z1, pm_l1, pm_z2 - pm_z1, pm_l2 - pm_l1 )
+
+            # interpolated heights #
+            pm_z, _ = raster_sample( pm_raster_z, pm_zy, pm_zx, pm_cache.height, pm_cache.width, pm_z1, pm_l1 )
+
+            # colours larger than a byte are rejected, negative values are given eratosthene's background colour #
+            pm_rgb = [ pm_raster_r, pm_raster_g, pm_raster_b ]
+            raster_colours( pm_rgb )
+            pm_nodata_rgb = ( pm_rgb[0] < 0 ) | ( pm_rgb[1] < 0 ) | ( pm_rgb[2] < 0 )
+
+            pm_records = np.empty( pm_z.shape, dtype=uv3_dtype )
+            pm_records['x'] = pm_wx[np.newaxis, :]
+            pm_records['y'] = pm_wy[:, np.newaxis]
+            pm_records['z'] = pm_z
+            pm_records['t'] = 1
+            for pm_field, pm_raster, pm_background in zip( ( 'r', 'g', 'b' ), pm_rgb, ( 7, 10, 12 ) ):
+                pm_records[pm_field] = np.where( pm_nodata_rgb, pm_background, pm_raster )
+
+            # records of the window reordered in memory when pixels are written column by column #
+            if ( pm_order == 'column' ):
+                pm_records = pm_records.T
+            uv3.write( pm_records.reshape( -1 ) )
+   
+def pm_rgb_z_uv3( pm_inputs, pm_dem, pm_output, pm_bands, pm_tiles, pm_codec='zlib', pm_max_memory=None, pm_dem_memory=raster_cache_memory, pm_order='row' ):
+
+    # several rgb geotiff can be draped over the same elevation model #
+    if isinstance( pm_inputs, str ):
+        pm_inputs = [ pm_inputs ]
+
+    # GDAL open geotiff file, in WGS84 #
+    pm_dem = raster_open( pm_dem )
+
+    # retrieve raster data #
+    pm_band_z = pm_dem.GetRasterBand(1)
+    pm_nodata_z = pm_band_z.SetNoDataValue(0)
+
+    pm_gtrans = pm_dem.GetGeoTransform()
+
+    pm_ztif_x = pm_gtrans[0] # origin x #
+    pm_ztif_y = pm_gtrans[3] # origin y #
+    pm_ztif_pw = pm_gtrans[1] # pixel width #
+    pm_ztif_ph = -pm_gtrans[5] # pixel height #
+
+    # elevation model read by blocks, kept in memory for the next windows and files #
+    pm_cache = RasterCache( pm_band_z, pm_dem_memory * 1024 * 1024, pm_dem_nodata if pm_nodata_z is not None else None )
+
+    # conversion sent to an output stream as it is written #
+    pm_stream = None
+    if stream_path( pm_output ):
+        pm_stream = pm_output = stream_open( pm_output )
+
+    # create output stream, compressed if asked, or tiles the records are routed into #
+    with ( uv3z_writer( pm_output, pm_codec ) if pm_tiles is None else TileWriter( pm_output, pm_tiles ) ) as uv3:
+
+        for pm_input in pm_inputs:
+
+            # GDAL open geotiff file, in WGS84 #
+            pm_geotiff = raster_open( pm_input )
+
+            # retrieve raster data #
+            pm_band_r = pm_geotiff.GetRasterBand(pm_bands[0])
+            pm_band_g = pm_geotiff.GetRasterBand(pm_bands[1])
+            pm_band_b = pm_geotiff.GetRasterBand(pm_bands[2])
+
+            # retrieve raster transformation #
+            pm_gtrans = pm_geotiff.GetGeoTransform()
+
+            # retrieve raster geographic parameters #
+            pm_x = pm_gtrans[0] # origin x #
+            pm_y = pm_gtrans[3] # origin y #
+            pm_pw = pm_gtrans[1] # pixel width #
+            pm_ph = -pm_gtrans[5] # pixel height #
+
+            # process file #
+            pm_rgb_plus_z(uv3, pm_cache, pm_band_r, pm_band_g, pm_band_b, pm_x, pm_y, pm_pw, pm_ph, pm_geotiff.RasterXSize, pm_geotiff.RasterYSize, pm_ztif_x, pm_ztif_y, pm_ztif_pw, pm_ztif_ph, raster_window_pixels( pm_max_memory ), pm_order)
+
+    # display elevation model reading #
+    print( 'elevation model blocks : %d read, %d reused' % ( pm_cache.misses, pm_cache.hits ) )
+
+    # end of the output stream #
+    if pm_stream is not None:
+        stream_close( pm_stream )
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str, nargs='+', help='input rgb geotiff path(s), draped one after the other over the same elevation model' )
+    pm_argparse.add_argument( '-d', '--dem', type=str  , help='input digital elevation model geotiff path'    )
+    pm_argparse.add_argument( '-o', '--output' , type=str  , help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-r', '--red' , type=int, default=1, help='integer refering to the number of the band to replace (or not) the red band, default being 1' )
+    pm_argparse.add_argument( '-g', '--green' , type=int, default=2, help='integer refering to the number of the band to replace (or not) the green band, default being 2' )
+    pm_argparse.add_argument( '-b', '--blue' , type=int, default=3, help='integer refering to the number of the band to replace (or not) the blue band, default being 3' )
+    pm_argparse.add_argument( '--order', type=str, default='row', choices=['row', 'column'], help='whether pixels are written row by row, following the raster, or column by column, as by the former versions of the tool. Default to row' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes from which the number of raster rows or columns read at once is derived. Default to about a million pixels at once' )
+    pm_argparse.add_argument( '--dem-memory', type=int, default=raster_cache_memory, help='memory budget in megabytes of the elevation model blocks kept in memory, so that they are read once. Default to %d' % raster_cache_memory )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # tiles are files, written in the output directory #
+    if ( stream_path( pm_args.output ) and pm_args.tiles is not None ):
+        pm_argparse.error( 'tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # display message #
+        print( 'Processing files : ' + ', '.join( os.path.basename( pm_input ) for pm_input in pm_args.input ) + ' and ' + os.path.basename( pm_args.dem ) + '...' )
+
+        # process files #
+        pm_rgb_z_uv3( pm_args.input, pm_args.dem, pm_args.output, ( pm_args.red, pm_args.green, pm_args.blue ), pm_args.tiles, pm_args.codec, pm_args.max_memory, pm_args.dem_memory, pm_args.order )
+
+        # exit message #
+        return 'Done'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
@@ -0,0 +1,230 @@
+#  fourd - tiff-poly-uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import math
+import sys
+import os
+import numpy as np
+
+from fourd.raster import RasterCache, raster_cache_memory, raster_colours, raster_open, raster_pixel_bytes, raster_read, raster_sample, raster_window_pixels, raster_windows
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path
+from fourd.tiles import TileWriter
+from fourd.uv3 import uv3_dtype
+from fourd.uv3z import uv3z_writer
+
+PM_R2D = ( 180. / math.pi )
+
+def pm_dem_nodata( pm_raster_z ):
+
+    # replace no data value #
+    return np.where( pm_raster_z < -34020000000, int( 0 ), pm_raster_z)
+
+def pm_tiff_poly_raster( uv3, pm_input, pm_bands, pm_cache, pm_ztif_x, pm_ztif_y, pm_ztif_pw, pm_ztif_ph, pm_max_memory=None, pm_order='row' ):
+
+    # GDAL open geotiff file, in WGS84 #
+    pm_geotiff = raster_open( pm_input )
+
+    # retrieve raster data #
+    pm_band_r = pm_geotiff.GetRasterBand(pm_bands[0])
+    pm_band_g = pm_geotiff.GetRasterBand(pm_bands[1])
+    pm_band_b = pm_geotiff.GetRasterBand(pm_bands[2])
+
+    # extract raster resolution #
+    pm_width = pm_geotiff.RasterXSize
+    pm_height = pm_geotiff.RasterYSize
+
+    # retrieve raster transformation #
+    pm_gtrans = pm_geotiff.GetGeoTransform()
+
+    # retrieve raster geographic parameters #
+    pm_x = pm_gtrans[0] # origin x #
+    pm_y = pm_gtrans[3] # origin y #
+    pm_pw = pm_gtrans[1] # pixel width #
+    pm_ph = -pm_gtrans[5] # pixel height #
+
+    # triangles need two rows and two columns of pixels #
+    if pm_height < 2 or pm_width < 2:
+        return
+
+    # bytes of each pixel, converted into six records #
+    pm_pixel_bytes = raster_pixel_bytes + 6 * uv3_dtype.itemsize
+
+    # corners geographical coordinates, of the raster columns and rows #
+    pm_rx = ( ( np.arange( pm_width ) * pm_pw ) + pm_x ) * ( math.pi/180 )
+    pm_ry = ( pm_y - ( np.arange( pm_height ) * pm_ph ) ) * ( math.pi/180 )
+
+    # pixels are parsed row by row, or column by column, read by windows of rows or of columns, with the next line #
+    for pm_b1, pm_count, pm_read in raster_windows( pm_band_r, 0, ( pm_height if ( pm_order == 'row' ) else pm_width ) - 1, pm_order, raster_window_pixels( pm_max_memory, pm_pixel_bytes ), 1 ):
+
+        # read the window lines only, indexed by row then column #
+        pm_rgb = [ raster_read( pm_band, pm_order, pm_b1, pm_read ) for pm_band in ( pm_band_r, pm_band_g, pm_band_b ) ]
+
+        # corner colours, larger than a byte being rejected and negative values given eratosthene's background colour #
+        raster_colours( pm_rgb )
+        pm_nodata_rgb = ( pm_rgb[0] < 0 ) | ( pm_rgb[1] < 0 ) | ( pm_rgb[2] < 0 )
+        pm_rgb = [ np.where( pm_nodata_rgb, pm_background, pm_raster ) for pm_raster, pm_background in zip( pm_rgb, ( 7, 10, 12 ) ) ]
+
+        # corners geographical coordinates of the window, and its rows and columns of pixels #
+        if ( pm_order == 'row' ):
+            pm_wx, pm_wy = pm_rx, pm_ry[pm_b1:pm_b1 + pm_read]
+            pm_rows, pm_columns = pm_count, pm_width - 1
+        else:
+            pm_wx, pm_wy = pm_rx[pm_b1:pm_b1 + pm_read], pm_ry
+            pm_rows, pm_columns = pm_height - 1, pm_count
+
+        # two triangles per pixel, of corners 3 2 1 and 4 3 1, corner 1 being the pixel and corner 3 the opposite one #
+        pm_records = np.empty( ( pm_rows, pm_columns, 6 ), dtype=uv3_dtype )
+        for pm_corner, ( pm_dx, pm_dy ) in enumerate( ( ( 1, 1 ), ( 1, 0 ), ( 0, 0 ), ( 0, 1 ), ( 1, 1 ), ( 0, 0 ) ) ):
+            pm_records['x'][:, :, pm_corner] = pm_wx[np.newaxis, pm_dx:pm_dx + pm_columns]
+            pm_records['y'][:, :, pm_corner] = pm_wy[pm_dy:pm_dy + pm_rows, np.newaxis]
+            pm_records['r'][:, :, pm_corner] = pm_rgb[0][pm_dy:pm_dy + pm_rows, pm_dx:pm_dx + pm_columns]
+            pm_records['g'][:, :, pm_corner] = pm_rgb[1][pm_dy:pm_dy + pm_rows, pm_dx:pm_dx + pm_columns]
+            pm_records['b'][:, :, pm_corner] = pm_rgb[2][pm_dy:pm_dy + pm_rows, pm_dx:pm_dx + pm_columns]
+        pm_records['t'] = 3
+
+        # pixels of the window, all of them without elevation model #
+        pm_inside = None
+
+        if pm_cache is not None:
+
+            # pixel coordinates on the z-value-tif of corner 4, computed separably for the columns and the rows #
+            pm_zx = ( ( pm_wx[:pm_columns] * 180/math.pi ) - pm_ztif_x ) / pm_ztif_pw
+            pm_zy = ( pm_ztif_y - ( pm_wy[1:pm_rows + 1] * 180/math.pi ) ) / pm_ztif_ph
+
+            # elevation model window under the raster window, with the next column and row for the interpolation #
+            pm_z1 = max( 0, int( pm_zx.min() ) )
+            pm_z2 = min( pm_cache.width, int( pm_zx.max() ) + 2 )
+            pm_l1 = max( 0, int( pm_zy.min() ) )
+            pm_l2 = min( pm_cache.height, int( pm_zy.max() ) + 2 )
+
+            # format raster pm_raster_z, out of the cached elevation model blocks #
+            pm_raster_z = None
+            if pm_z1 < pm_z2 and pm_l1 < pm_l2:
+                pm_raster_z = pm_cache.read( pm_z1, pm_l1, pm_z2 - pm_z1, pm_l2 - pm_l1 )
+
+            # interpolated height of each pixel, the pixels outside of the elevation model being left out #
+            pm_z, pm_inside = raster_sample( pm_raster_z, pm_zy, pm_zx, pm_cache.height, pm_cache.width, pm_z1, pm_l1 )
+            pm_records['z'] = pm_z[:, :, np.newaxis]
+
+        else:
+            pm_records['z'] = 0.0
+
+        # records of the window reordered in memory when pixels are parsed column by column #
+        if ( pm_order == 'column' ):
+            pm_records = pm_records.transpose( 1, 0, 2 )
+            pm_inside = None if pm_inside is None else pm_inside.T
+
+        uv3.write( ( pm_records if pm_inside is None else pm_records[pm_inside] ).reshape( -1 ) )
+
+def pm_tiff_poly_uv3( pm_inputs, pm_dem, pm_output, pm_bands, pm_tiles, pm_codec='zlib', pm_max_memory=None, pm_dem_memory=raster_cache_memory, pm_order='row' ):
+
+    # several rgb geotiff can be draped over the same elevation model #
+    if isinstance( pm_inputs, str ):
+        pm_inputs = [ pm_inputs ]
+
+    # GDAL open geotiff file, in WGS84 #
+    pm_cache = None
+    pm_ztif_x = pm_ztif_y = pm_ztif_pw = pm_ztif_ph = None
+    if pm_dem is not None:
+        pm_dem_raster = raster_open( pm_dem )
+
+        # retrieve raster data #
+        pm_band_z = pm_dem_raster.GetRasterBand(1)
+        pm_nodata_z = pm_band_z.SetNoDataValue(0)
+
+        pm_gtrans = pm_dem_raster.GetGeoTransform()
+
+        pm_ztif_x = pm_gtrans[0] # origin x #
+        pm_ztif_y = pm_gtrans[3] # origin y #
+        pm_ztif_pw = pm_gtrans[1] # pixel width #
+        pm_ztif_ph = -pm_gtrans[5] # pixel height #
+
+        # elevation model read by blocks, kept in memory for the next windows and files #
+        pm_cache = RasterCache( pm_band_z, pm_dem_memory * 1024 * 1024, pm_dem_nodata if pm_nodata_z is not None else None )
+
+    # conversion sent to an output stream as it is written #
+    pm_stream = None
+    if stream_path( pm_output ):
+        pm_stream = pm_output = stream_open( pm_output )
+
+    # create output stream, compressed if asked, or tiles the records are routed into #
+    with ( uv3z_writer( pm_output, pm_codec ) if pm_tiles is None else TileWriter( pm_output, pm_tiles ) ) as uv3:
+
+        # process files #
+        for pm_input in pm_inputs:
+            pm_tiff_poly_raster( uv3, pm_input, pm_bands, pm_cache, pm_ztif_x, pm_ztif_y, pm_ztif_pw, pm_ztif_ph, pm_max_memory, pm_order )
+
+    # display elevation model reading #
+    if pm_cache is not None:
+        print( 'elevation model blocks : %d read, %d reused' % ( pm_cache.misses, pm_cache.hits ) )
+
+    # end of the output stream #
+    if pm_stream is not None:
+        stream_close( pm_stream )
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input' , type=str, nargs='+', help='input rgb geotiff path(s), converted one after the other over the same elevation model')
+    pm_argparse.add_argument( '-d', '--dem', type=str, help='input dem geotiff path')
+    pm_argparse.add_argument( '-o', '--output', type=str, help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-r', '--red' , type=int, default=1, help='integer refering to the number of the band to replace (or not) the red band, default being 1' )
+    pm_argparse.add_argument( '-g', '--green' , type=int, default=2, help='integer refering to the number of the band to replace (or not) the green band, default being 2' )
+    pm_argparse.add_argument( '-b', '--blue' , type=int, default=3, help='integer refering to the number of the band to replace (or not) the blue band, default being 3' )
+    pm_argparse.add_argument( '--order', type=str, default='row', choices=['row', 'column'], help='whether pixels are converted row by row, following the raster, or column by column, as by the former versions of the tool. Default to row' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes from which the number of raster rows or columns read at once is derived. Default to about a million pixels at once' )
+    pm_argparse.add_argument( '--dem-memory', type=int, default=raster_cache_memory, help='memory budget in megabytes of the elevation model blocks kept in memory, so that they are read once. Default to %d' % raster_cache_memory )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # tiles are files, written in the output directory #
+    if ( stream_path( pm_args.output ) and pm_args.tiles is not None ):
+        pm_argparse.error( 'tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # display message #
+        pm_names = ', '.join( os.path.basename( pm_input ) for pm_input in pm_args.input )
+        if pm_args.dem is not None:
+            print( 'Processing files : ' + pm_names + ' and ' + os.path.basename( pm_args.dem ) + '...' )
+
+        else:
+            print( 'Processing file : ' + pm_names)
+
+        # process files #
+        pm_tiff_poly_uv3( pm_args.input, pm_args.dem, pm_args.output, ( pm_args.red, pm_args.green, pm_args.blue ), pm_args.tiles, pm_args.codec, pm_args.max_memory, pm_args.dem_memory, pm_args.order )
+
+        # exit message #
+        return 'Done'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
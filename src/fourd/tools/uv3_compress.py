@@ -0,0 +1,79 @@
+#  fourd - uv3-compress
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import os
+import time
+
+from fourd.uv3z import uv3z_compress, uv3z_decompress, uv3z_extension
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str, help='uv3 input path' )
+    pm_argparse.add_argument( '-o', '--output', type=str, default=None, help='output path. Default to the input path with the .uv3z extension, or the .uv3 one when decompressing' )
+    pm_argparse.add_argument( '-d', '--decompress', type=int, default=0, help='whether the input is decompressed (1) instead of compressed (0). Default to 0' )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the blocks. Default to zlib' )
+    pm_argparse.add_argument( '--level', type=int, default=None, help='compression level of the codec. Default to 6 for zlib and 1 for lzma' )
+    pm_argparse.add_argument( '--threads', type=int, default=None, help='number of threads compressing or decompressing blocks. Default to the number of processors' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # default output next to the input #
+    pm_output = pm_args.output
+    if pm_output is None:
+        pm_output = os.path.splitext( pm_args.input )[0] + ( '.uv3' if pm_args.decompress == 1 else uv3z_extension )
+
+    tic = time.time()
+
+    if pm_args.decompress == 1:
+
+        # display message #
+        print( 'Decompressing file : ' + os.path.basename( pm_args.input ) + '...' )
+
+        # decompress file #
+        uv3z_decompress( pm_args.input, pm_output, pm_args.threads )
+
+    else:
+
+        # display message #
+        print( 'Compressing file : ' + os.path.basename( pm_args.input ) + '...' )
+
+        # compress file, keeping the input #
+        pm_records, pm_size = uv3z_compress( pm_args.input, pm_output, pm_args.codec, pm_args.level, pm_args.threads, remove=False )
+        print( '%d records, %.1f%% of the input size' % ( pm_records, 100 * pm_size / max( 1, os.path.getsize( pm_args.input ) ) ) )
+
+    toc = time.time()
+
+    # exit message #
+    return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
@@ -0,0 +1,72 @@
+#  fourd - uv3-diff
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import os
+import time
+
+from fourd.info import info_diff, info_chunk
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-a', '--first', type=str, help='first uv3 input path' )
+    pm_argparse.add_argument( '-b', '--second', type=str, help='second uv3 input path' )
+    pm_argparse.add_argument( '--chunk-points', type=int, default=info_chunk, help='number of records compared at once. Default to 4194304' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # display message #
+    print( 'Comparing files : ' + os.path.basename( pm_args.first ) + ' ' + os.path.basename( pm_args.second ) + '...' )
+
+    tic = time.time()
+
+    # compare files #
+    pm_diff, pm_size_a, pm_size_b = info_diff( pm_args.first, pm_args.second, pm_args.chunk_points )
+
+    # display differences #
+    print( 'compared  : ' + str( pm_diff.compared ) + ' records' )
+    if pm_size_a != pm_size_b:
+        print( 'size      : ' + str( pm_size_a ) + ' and ' + str( pm_size_b ) + ' bytes' )
+    if pm_diff.records > 0:
+        print( 'differ    : ' + str( pm_diff.records ) + ' records, first at record ' + str( pm_diff.first ) )
+        for pm_field, pm_count in pm_diff.fields.items():
+            print( '  ' + pm_field + '       : ' + str( pm_count ) )
+        print( 'distance  : ' + ' '.join( str( pm_value ) for pm_value in pm_diff.distance ) )
+
+    toc = time.time()
+
+    # exit message #
+    if pm_diff.records > 0 or pm_size_a != pm_size_b:
+        return f'Files differ. Elapsed time = {(toc-tic):.2f} seconds.'
+    return f'Identical files. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
@@ -0,0 +1,96 @@
+#  fourd - uv3-info
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import os
+import time
+import numpy as np
+
+from fourd.info import info_scan, info_chunk
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str, help='uv3 input path' )
+    pm_argparse.add_argument( '--bins', type=int, default=8, help='number of bins of the displayed colour histograms. Default to 8' )
+    pm_argparse.add_argument( '--chunk-points', type=int, default=info_chunk, help='number of records inspected at once. Default to 4194304' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # display message #
+    print( 'Inspecting file : ' + os.path.basename( pm_args.input ) + '...' )
+
+    tic = time.time()
+
+    # inspect file #
+    pm_stats, pm_trailing = info_scan( pm_args.input, pm_args.chunk_points )
+
+    # display records #
+    print( 'records   : ' + str( pm_stats.count ) )
+    print( 'points    : ' + str( pm_stats.types[1] ) )
+    print( 'lines     : ' + str( pm_stats.types[2] // 2 ) + ' (' + str( pm_stats.types[2] ) + ' records)' )
+    print( 'triangles : ' + str( pm_stats.types[3] // 3 ) + ' (' + str( pm_stats.types[3] ) + ' records)' )
+
+    # display bounds - longitude and latitude in degrees #
+    if pm_stats.min[0] <= pm_stats.max[0]:
+        print( 'longitude : ' + str( np.degrees( pm_stats.min[0] ) ) + ' ' + str( np.degrees( pm_stats.max[0] ) ) )
+        print( 'latitude  : ' + str( np.degrees( pm_stats.min[1] ) ) + ' ' + str( np.degrees( pm_stats.max[1] ) ) )
+        print( 'height    : ' + str( pm_stats.min[2] ) + ' ' + str( pm_stats.max[2] ) )
+
+    # display colour histograms #
+    if pm_stats.count > 0:
+        pm_width = 256 // pm_args.bins + ( 256 % pm_args.bins > 0 )
+        for pm_channel, pm_name in enumerate( ( 'red', 'green', 'blue' ) ):
+            pm_histogram = np.add.reduceat( pm_stats.colours[pm_channel], np.arange( 0, 256, pm_width ) )
+            print( ( pm_name + ' ' * 10 )[:10] + ': ' + ' '.join( str( pm_count ) for pm_count in pm_histogram ) )
+
+    # display format errors #
+    pm_errors = []
+    if pm_trailing > 0:
+        pm_errors.append( 'truncated file - ' + str( pm_trailing ) + ' trailing bytes' )
+    if pm_stats.nan > 0:
+        pm_errors.append( str( pm_stats.nan ) + ' records with NaN coordinates, first at record ' + str( pm_stats.first_nan ) )
+    if pm_stats.unknown() > 0:
+        pm_errors.append( str( pm_stats.unknown() ) + ' records of unknown type' )
+    for pm_type, pm_name in ( ( 2, 'lines' ), ( 3, 'triangles' ) ):
+        if pm_stats.broken[pm_type] > 0:
+            pm_errors.append( str( pm_stats.broken[pm_type] ) + ' runs of ' + pm_name + ' records not a multiple of ' + str( pm_type ) + ', first at record ' + str( pm_stats.first_broken[pm_type] ) )
+    for pm_error in pm_errors:
+        print( 'error     : ' + pm_error )
+
+    toc = time.time()
+
+    # exit message #
+    if pm_errors:
+        return f'Invalid file. Elapsed time = {(toc-tic):.2f} seconds.'
+    return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
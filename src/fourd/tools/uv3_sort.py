@@ -0,0 +1,60 @@
+#  fourd - uv3-sort
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import os
+import time
+
+from fourd.morton import morton_sort
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str, help='uv3 input path' )
+    pm_argparse.add_argument( '-o', '--output', type=str, default=None, help='uv3 output path. Default to the input file, sorted in place' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=1024, help='memory budget of the sort in megabytes. Default to 1024' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # display message #
+    print( 'Sorting file : ' + os.path.basename( pm_args.input ) + '...' )
+
+    tic = time.time()
+
+    # sort file #
+    morton_sort( pm_args.input, pm_args.output if pm_args.output is not None else pm_args.input, pm_args.max_memory * 1024 * 1024 )
+
+    toc = time.time()
+
+    # exit message #
+    return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
@@ -0,0 +1,280 @@
+#  fourd - z-from-geotiff
+#
+#     Huriel Reichel - huriel.ruan@gmail.com     
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     
+#     Copyright (c) 2020 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import math
+import sys
+import os
+import numpy as np
+import time
+
+from fourd.morton import morton_memory, morton_sort
+from fourd.palette import palette_colours, palette_lut
+from fourd.parallel import parallel_ranges, parallel_run
+from fourd.raster import raster_open, raster_overview, raster_read, raster_window_pixels, raster_windows
+from fourd.stats import RangeStatistics
+from fourd.stream import stream_close, stream_messages, stream_open, stream_path, stream_send, stream_temporary
+from fourd.tiles import TileWriter, tiles_files, tiles_gather, tiles_part, tiles_sort
+from fourd.uv3 import UV3Writer, uv3_allocate, uv3_dtype
+from fourd.uv3z import uv3z_compress, uv3z_output, uv3z_path
+
+def pm_assign_z_range( pm_1, pm_2, pm_input, pm_output, pm_x, pm_y, pm_pw, pm_ph, pm_w, pm_h, pm_order, pal, min_z, max_z, height, pm_pixels, pm_bounds=None, pm_tiles=None ):
+
+    # open raster in this process #
+    pm_band_z = raster_open( pm_input ).GetRasterBand(1)
+
+    # retrieve raster no data value #
+    pm_band_z.SetNoDataValue(-4e38)
+    pm_nodata = pm_band_z.GetNoDataValue()
+
+    # range of the heights, reduced while converting when it isn't known yet #
+    pm_stats = RangeStatistics( pm_bounds )
+
+    # raster columns and rows positions, shared by every window #
+    pm_rx = ( ( np.arange( pm_w ) * pm_pw ) + pm_x ) * ( math.pi/180 )
+    pm_ry = ( pm_y - ( np.arange( pm_h ) * pm_ph ) ) * ( math.pi/180 )
+        
+    # open output stream - pixels are written at their own offset, or routed into the tiles of the range #
+    with ( UV3Writer( pm_output, pm_1 * ( pm_w if ( pm_order == 'row' ) else pm_h ) ) if pm_tiles is None else TileWriter( tiles_part( pm_output, '%012d' % pm_1 ), pm_tiles ) ) as uv3:
+
+       # the range is made of rows, or of columns, read by windows #
+       for pm_b1, pm_count, _ in raster_windows( pm_band_z, pm_1, pm_2, pm_order, pm_pixels ):
+           pm_b2 = pm_b1 + pm_count
+
+           # read the window lines only #
+           pm_raster_z = raster_read( pm_band_z, pm_order, pm_b1, pm_count )
+
+           # check no data value #
+           if pm_nodata is not None:
+
+               # replace no data value #
+               pm_raster_z = np.where( pm_raster_z < -3e38, -4e38, pm_raster_z.astype( np.float64 ) )
+
+           # pixels are written row by row, or column by column #
+           pm_z = pm_raster_z if ( pm_order == 'row' ) else pm_raster_z.T
+
+           # colouring, setting no data as black / same colour as eratosthene's background
+           if ( min_z is not None ):
+               col = palette_colours( pal, pm_z, min_z, max_z, nodata=( pm_z <= -4e38 ) )
+
+           # heights kept in the records until they are coloured #
+           else:
+               pm_stats.update( pm_z[pm_z > -4e38] )
+               col = np.zeros( pm_z.shape + ( 3, ), dtype=np.uint8 )
+
+           pm_records = np.empty( pm_z.shape, dtype=uv3_dtype )
+           if ( pm_order == 'row' ):
+               pm_records['x'] = pm_rx[np.newaxis, :]
+               pm_records['y'] = pm_ry[pm_b1:pm_b2, np.newaxis]
+           else:
+               pm_records['x'] = pm_rx[pm_b1:pm_b2, np.newaxis]
+               pm_records['y'] = pm_ry[np.newaxis, :]
+           pm_records['z'] = pm_z if ( height == 1 or min_z is None ) else 0
+           pm_records['t'] = 1
+           pm_records['r'] = col[..., 0]
+           pm_records['g'] = col[..., 1]
+           pm_records['b'] = col[..., 2]
+           uv3.write( pm_records.reshape( -1 ) )
+
+    return pm_stats
+
+def pm_colour_z_range( pm_1, pm_2, pm_output, pal, min_z, max_z, height, pm_pixels ):
+
+    # records of the range, mapped in memory #
+    pm_records = np.memmap( pm_output, dtype=uv3_dtype, mode='r+' )
+
+    # colour the records by chunks, from the heights they keep #
+    for pm_c1 in range( pm_1, pm_2, pm_pixels ):
+        pm_chunk = pm_records[pm_c1:min( pm_c1 + pm_pixels, pm_2 )]
+        pm_z = pm_chunk['z']
+
+        # colouring, setting no data as black / same colour as eratosthene's background
+        col = palette_colours( pal, pm_z, min_z, max_z, nodata=( pm_z <= -4e38 ) )
+        pm_chunk['r'] = col[..., 0]
+        pm_chunk['g'] = col[..., 1]
+        pm_chunk['b'] = col[..., 2]
+        if ( height != 1 ):
+            pm_chunk['z'] = 0
+
+    pm_records.flush()
+
+def pm_colour_z_tiles( pm_1, pm_2, pm_files, pal, min_z, max_z, height, pm_pixels ):
+
+    # colour the tiles of the range, one after the other #
+    for pm_file in pm_files[pm_1:pm_2]:
+        pm_colour_z_range( 0, os.path.getsize( pm_file ) // uv3_dtype.itemsize, pm_file, pal, min_z, max_z, height, pm_pixels )
+
+def pm_assign_z( pm_input, pm_output, pm_band_z, pm_x, pm_y, pm_pw, pm_ph, pm_w, pm_h, palette, height, workers, sort, tiles, codec='zlib', max_memory=None, stats='exact', clip=None, order='row' ): 
+
+    # heights of an overview of the raster, for the colour range or the percentiles bounds #
+    pm_overview = None
+    if ( stats == 'overview' or clip is not None ):
+        pm_overview = raster_overview( pm_band_z ).astype( np.float64 ).ravel()
+        pm_overview = pm_overview[pm_overview > -3e38]
+
+    # defining minimum and maximum values for the three dimensional variable, out of the overview #
+    min_z = None
+    max_z = None
+    pm_bounds = None
+    if ( pm_overview is not None and len( pm_overview ) > 0 ):
+        pm_bounds = ( pm_overview.min(), pm_overview.max() ) if ( pm_overview.min() < pm_overview.max() ) else None
+        if ( stats == 'overview' ):
+            pm_stats = RangeStatistics( pm_bounds if clip is not None else None )
+            pm_stats.update( pm_overview )
+            min_z, max_z = pm_stats.range( clip if pm_bounds is not None else None )
+
+    # defining colour palette, sampled once
+    pal = palette_lut(palette)
+    
+    if ( height == 1 ):
+    
+        print( "computing heights and colours")
+
+    else:
+        
+        print( "not computing heights, only colours")
+
+    # conversion written in a plain file, compressed at the end if asked #
+    pm_compressed = None
+    if ( uv3z_path( pm_output ) and tiles is None ):
+        pm_compressed, pm_output = pm_output, uv3z_output( pm_output )
+
+    # conversion streamed in order by a single process, or written in a temporary file sent at the end #
+    pm_stream = None
+    if ( stream_path( pm_output ) ):
+        pm_stream = stream_open( pm_output )
+        pm_output = pm_stream if ( workers <= 1 and sort != 1 and min_z is not None ) else stream_temporary()
+
+    # create output file, sized for one record per pixel #
+    if ( pm_output is not pm_stream and tiles is None ):
+        uv3_allocate( pm_output, pm_w * pm_h )
+
+    # convert ranges of rows, or of columns, in parallel if asked #
+    pm_ranges = parallel_ranges( pm_h if ( order == 'row' ) else pm_w, workers )
+    pm_results = parallel_run( pm_assign_z_range, pm_ranges, workers, pm_input, pm_output, pm_x, pm_y, pm_pw, pm_ph, pm_w, pm_h, order, pal, min_z, max_z, height, raster_window_pixels( max_memory ), pm_bounds, tiles )
+
+    # tiles of the ranges gathered in the output directory #
+    if ( tiles is not None ):
+        print( "%d tiles written" % tiles_gather( pm_output, [ tiles_part( pm_output, '%012d' % pm_1 ) for pm_1, pm_2 in pm_ranges ], tiles ) )
+
+    # colour the converted heights, once their range is known - the raster isn't read again #
+    if ( min_z is None and pm_w * pm_h > 0 ):
+        pm_stats = RangeStatistics( pm_bounds )
+        for pm_result in pm_results:
+            pm_stats.merge( pm_result )
+        min_z, max_z = pm_stats.range( clip if pm_bounds is not None else None )
+        if ( min_z is None ):
+            min_z = max_z = 0.0
+        if ( tiles is None ):
+            parallel_run( pm_colour_z_range, parallel_ranges( pm_w * pm_h, workers ), workers, pm_output, pal, min_z, max_z, height, raster_window_pixels( max_memory ) )
+        else:
+            pm_files = tiles_files( pm_output )
+            parallel_run( pm_colour_z_tiles, parallel_ranges( len( pm_files ), workers ), workers, pm_files, pal, min_z, max_z, height, raster_window_pixels( max_memory ) )
+
+    # spatial sort of the output, or of each tile #
+    if ( sort == 1 ):
+        print( "sorting points" )
+        pm_memory = morton_memory if ( max_memory is None ) else max_memory * 1024 * 1024
+        if ( tiles is None ):
+            morton_sort( pm_output, pm_output, pm_memory )
+        else:
+            tiles_sort( pm_output, pm_memory )
+
+    # compression of the output #
+    if ( pm_compressed is not None ):
+        uv3z_compress( pm_output, pm_compressed, codec )
+
+    # conversion sent to the output stream #
+    if ( pm_stream is not None ):
+        if ( pm_output is not pm_stream ):
+            stream_send( pm_output, pm_stream )
+        stream_close( pm_stream )
+
+#
+#   source - main function
+#
+
+def main( argv=None, prog=None ):
+
+    # create argument parser #
+    pm_argparse = argparse.ArgumentParser( prog=prog )
+
+    # argument and parameter directive #
+    pm_argparse.add_argument( '-i', '--input', type=str  , help='geotiff path'    )
+    pm_argparse.add_argument( '-o', '--output' , type=str  , help='uv3 output path, or stream: - for the standard output, tcp://host:port, unix:///path/to/socket or a named pipe' )
+    pm_argparse.add_argument( '-p', '--palette', default='inferno', type=str , help='matplotlib colour palette name')
+    pm_argparse.add_argument( '-height', '--height', default=1, type=int, help='whether height should be assigned (1) or not (0)')
+    pm_argparse.add_argument( '--order', type=str, default='row', choices=['row', 'column'], help='whether pixels are written row by row, following the raster, or column by column, as by the former versions of the tool. Default to row' )
+    pm_argparse.add_argument( '--stats', type=str, default='exact', choices=['exact', 'overview'], help='whether the colour range is computed out of the heights while converting them (exact), or out of an overview of the raster before (overview). Default to exact' )
+    pm_argparse.add_argument( '--clip', type=float, nargs=2, default=None, metavar=('LOW', 'HIGH'), help='percentiles bounding the colour range, e.g. 2 98 for a robust colour stretching. Default to the whole range' )
+    pm_argparse.add_argument( '--sort', type=int, default=0, help='whether the output points are sorted along a morton (z-order) curve. Default to False' )
+    pm_argparse.add_argument( '--tiles', type=float, default=None, help='size, in degrees, of the longitude and latitude cells the output is split in, the output path being then a directory of tiles. Default to a single output file' )
+    pm_argparse.add_argument( '--codec', type=str, default='zlib', choices=['zlib', 'lzma'], help='compression of the output when its path ends with .uv3z. Default to zlib' )
+    pm_argparse.add_argument( '--max-memory', type=int, default=None, help='memory budget in megabytes of each process, from which the number of raster rows or columns read at once, and the runs of the spatial sort, are derived. Default to about a million pixels at once' )
+    pm_argparse.add_argument( '-w', '--workers', type=int, default=1, help='number of processes converting ranges of rows, or of columns, in parallel. Default to 1' )
+
+    # read argument and parameters #
+    pm_args = pm_argparse.parse_args( argv )
+
+    # tiles are files, written in the output directory #
+    if ( stream_path( pm_args.output ) and pm_args.tiles is not None ):
+        pm_argparse.error( 'tiles require an output path, not a stream' )
+
+    # messages kept off the output while it is streamed to stdout #
+    with stream_messages( pm_args.output ):
+        # GDAL open geotiff file, in WGS84 #
+        pm_geotiff = raster_open( pm_args.input )
+
+        # retrieve raster data #
+        pm_band_z = pm_geotiff.GetRasterBand(1)
+
+        # retrieve raster no data value #
+        pm_band_z.SetNoDataValue(-4e38)
+
+        # extract raster resolution #
+        pm_width = pm_geotiff.RasterXSize
+        pm_height = pm_geotiff.RasterYSize
+
+        # retrieve raster transformation #
+        pm_gtrans = pm_geotiff.GetGeoTransform()
+
+        # retrieve raster geographic parameters #
+        pm_x = pm_gtrans[0] # origin x #
+        pm_y = pm_gtrans[3] # origin y #
+        pm_pw = pm_gtrans[1] # pixel width #
+        pm_ph = -pm_gtrans[5] # pixel height #
+
+        # display message #
+        print( 'Processing file : ' + os.path.basename( pm_args.input ) + '...' )
+
+        tic = time.time()
+
+        # process file #
+        pm_assign_z( pm_args.input, pm_args.output, pm_band_z, pm_x, pm_y, pm_pw, pm_ph, pm_width, pm_height, pm_args.palette, pm_args.height, pm_args.workers, pm_args.sort, pm_args.tiles, pm_args.codec, pm_args.max_memory, pm_args.stats, pm_args.clip, pm_args.order )
+
+        toc = time.time()
+
+        # exit message #
+        return f'Done. Elapsed time = {(toc-tic):.2f} seconds.'
+
+if __name__ == '__main__':
+
+    # exit script #
+    sys.exit( main() )
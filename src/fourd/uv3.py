@@ -0,0 +1,196 @@
+#  fourd - uv3
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import queue
+import shutil
+import threading
+import numpy as np
+
+# UV3 record layout - three little-endian doubles followed by type and colour bytes #
+uv3_dtype = np.dtype( [ ( 'x', '<f8' ), ( 'y', '<f8' ), ( 'z', '<f8' ), ( 't', 'u1' ), ( 'r', 'u1' ), ( 'g', 'u1' ), ( 'b', 'u1' ) ] )
+
+# records of each writer buffer - a multiple of 1024 records keeps buffers aligned on 4096 bytes #
+uv3_buffer = 256 * 1024
+
+# number of full buffers waiting to be written #
+uv3_depth = 4
+
+def uv3_allocate( output, count ):
+    '''
+    Create the output file with the size of count records, so that parts of
+    it can be written at their own offset, possibly by different processes,
+    with UV3Writer
+    '''
+    with open( output, mode='wb' ) as uv3:
+        uv3.truncate( count * uv3_dtype.itemsize )
+
+class UV3Writer( object ):
+    '''
+    Buffered writer of uv3 records. Records are given as structured arrays,
+    or one by one, and collected into large buffers. Full buffers are
+    handed to a background thread through a bounded queue, so that records
+    can be computed while previous ones are written. The output is either
+    a path or an opened binary stream, written from its position; with
+    index given, the records of an existing file are overwritten from the
+    index-th one, so that several processes can write their own part of
+    a preallocated file. The numbers of records and bytes written are
+    kept in records and bytes.
+    '''
+    def __init__( self, output, index=None, buffer=uv3_buffer, depth=uv3_depth ):
+        if hasattr( output, 'write' ):
+            self.stream = output
+            self.owned = False
+        else:
+            self.stream = open( output, mode='wb' if index is None else 'r+b' )
+            self.owned = True
+            if index is not None:
+                self.stream.seek( index * uv3_dtype.itemsize )
+
+        self.records = 0
+        self.bytes = 0
+        self.error = None
+
+        # buffers are recycled once written #
+        self.free = queue.Queue()
+        for _ in range( depth + 1 ):
+            self.free.put( np.empty( buffer, dtype=uv3_dtype ) )
+        self.full = queue.Queue( maxsize=depth )
+        self.buffer = self.free.get()
+        self.count = 0
+
+        self.thread = threading.Thread( target=self.run, daemon=True )
+        self.thread.start()
+
+    def run( self ):
+        while True:
+            item = self.full.get()
+            if item is None:
+                return
+            buffer, count = item
+            try:
+                if self.error is None:
+                    self.stream.write( memoryview( buffer[:count] ).cast( 'B' ) )
+            except BaseException as error:
+                self.error = error
+            self.free.put( buffer )
+
+    def check( self ):
+        if self.error is not None:
+            raise self.error
+
+    def push( self ):
+        '''
+        Hand the current buffer to the writing thread
+        '''
+        self.check()
+        self.full.put( ( self.buffer, self.count ) )
+        self.buffer = self.free.get()
+        self.count = 0
+
+    def write( self, records ):
+        '''
+        Write an array of uv3 records
+        '''
+        start = 0
+        while start < len( records ):
+            size = min( len( records ) - start, len( self.buffer ) - self.count )
+            self.buffer[self.count:self.count + size] = records[start:start + size]
+            self.count += size
+            start += size
+            if self.count == len( self.buffer ):
+                self.push()
+        self.records += len( records )
+        self.bytes += len( records ) * uv3_dtype.itemsize
+
+    def record( self, x, y, z, t, r, g, b ):
+        '''
+        Write a single uv3 record
+        '''
+        self.buffer[self.count] = ( x, y, z, t, r, g, b )
+        self.count += 1
+        if self.count == len( self.buffer ):
+            self.push()
+        self.records += 1
+        self.bytes += uv3_dtype.itemsize
+
+    def close( self ):
+        '''
+        Write the remaining records and wait for the writing thread
+        '''
+        if self.thread is None:
+            return
+
+        # records left out once writing failed, the thread being stopped all the same #
+        if self.count and self.error is None:
+            self.push()
+        self.full.put( None )
+        self.thread.join()
+        self.thread = None
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+        self.check()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *args ):
+        self.close()
+
+def uv3_append( uv3, source ):
+    '''
+    Append the content of an opened source file to an opened uv3 stream,
+    letting the kernel copy the data when possible
+    '''
+    uv3.flush()
+    size = os.fstat( source.fileno() ).st_size
+    offset = 0
+
+    while offset < size:
+        try:
+            if hasattr( os, 'copy_file_range' ):
+                sent = os.copy_file_range( source.fileno(), uv3.fileno(), size - offset, offset )
+            else:
+                sent = os.sendfile( uv3.fileno(), source.fileno(), offset, size - offset )
+        except ( AttributeError, OSError ):
+            sent = 0
+        if sent == 0:
+            break
+        offset += sent
+
+    # user space copy of whatever the kernel didn't copy #
+    if offset < size:
+        source.seek( offset )
+        shutil.copyfileobj( source, uv3, 16 * 1024 * 1024 )
+
+def uv3_concatenate( output, shards ):
+    '''
+    Write the uv3 shards, in the given order, one after the other into the
+    output file, or into an opened binary stream
+    '''
+    if hasattr( output, 'write' ):
+        for shard in shards:
+            with open( shard, mode='rb' ) as source:
+                uv3_append( output, source )
+        return
+
+    with open( output, mode='wb' ) as uv3:
+        uv3_concatenate( uv3, shards )
@@ -0,0 +1,355 @@
+#  fourd - uv3z
+#
+#     Huriel Reichel - huriel.ruan@gmail.com
+#     Nils Hamel - nils.hamel@bluewin.ch
+#     Copyright (c) 2021 Republic and Canton of Geneva
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections
+import lzma
+import os
+import struct
+import zlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from fourd.uv3 import UV3Writer, uv3_buffer, uv3_dtype
+
+# extension of the compressed uv3 files #
+uv3z_extension = '.uv3z'
+
+# header - magic, version, codec, filter and records per block #
+uv3z_header = struct.Struct( '<4sBBBxI' )
+uv3z_magic = b'UV3Z'
+uv3z_version = 1
+
+# trailer - offset of the block index, number of blocks and of records #
+uv3z_trailer = struct.Struct( '<QQQ4s' )
+uv3z_index_magic = b'UV3I'
+
+# block index - offset and compressed size of each block, with its number of records #
+uv3z_index_dtype = np.dtype( [ ( 'offset', '<u8' ), ( 'size', '<u8' ), ( 'records', '<u4' ) ] )
+
+# records of each block - blocks are compressed and read independently #
+uv3z_block = uv3_buffer
+
+# compression codecs, and their default level #
+uv3z_codecs = { 'zlib' : 1, 'lzma' : 2 }
+uv3z_levels = { 'zlib' : 6, 'lzma' : 1 }
+
+# filters of the coordinates, applied before compression #
+uv3z_delta = 1
+uv3z_shuffle = 2
+
+def uv3z_path( path ):
+    '''
+    Return whether an output path asks for a compressed uv3 file
+    '''
+    return isinstance( path, str ) and path.endswith( uv3z_extension )
+
+def uv3z_check( path ):
+    '''
+    Return whether a file is a compressed uv3 file, after its header
+    '''
+    with open( path, mode='rb' ) as stream:
+        return stream.read( len( uv3z_magic ) ) == uv3z_magic
+
+def uv3z_pack( records, filters ):
+    '''
+    Split a block of records into columns. The bits of each coordinate are
+    replaced by their difference with the previous record and the bytes
+    of the coordinates are grouped by significance, so that the slowly
+    varying high bytes of neighbouring points form long repeated runs
+    '''
+    parts = []
+    for field in ( 'x', 'y', 'z' ):
+        bits = np.ascontiguousarray( records[field] ).view( '<u8' )
+        if filters & uv3z_delta:
+            bits = np.concatenate( ( bits[:1], bits[1:] - bits[:-1] ) )
+        if filters & uv3z_shuffle:
+            bits = bits.view( np.uint8 ).reshape( -1, 8 ).T
+        parts.append( np.ascontiguousarray( bits ).tobytes() )
+    for field in ( 't', 'r', 'g', 'b' ):
+        parts.append( np.ascontiguousarray( records[field] ).tobytes() )
+    return b''.join( parts )
+
+def uv3z_unpack( data, count, filters ):
+    '''
+    Rebuild a block of records out of its columns
+    '''
+    records = np.empty( count, dtype=uv3_dtype )
+    offset = 0
+    for field in ( 'x', 'y', 'z' ):
+        if filters & uv3z_shuffle:
+            bits = np.frombuffer( data, dtype=np.uint8, count=count * 8, offset=offset ).reshape( 8, count ).T.copy().view( '<u8' ).reshape( -1 )
+        else:
+            bits = np.frombuffer( data, dtype='<u8', count=count, offset=offset )
+        if filters & uv3z_delta:
+            bits = np.cumsum( bits, dtype=np.uint64 )
+        records[field] = bits.view( '<f8' )
+        offset += count * 8
+    for field in ( 't', 'r', 'g', 'b' ):
+        records[field] = np.frombuffer( data, dtype=np.uint8, count=count, offset=offset )
+        offset += count
+    return records
+
+def uv3z_compress_block( records, codec, level, filters ):
+    '''
+    Filter and compress a block of records - both zlib and lzma release
+    the interpreter lock while compressing, so that blocks are compressed
+    by concurrent threads
+    '''
+    data = uv3z_pack( records, filters )
+    if codec == 'zlib':
+        return zlib.compress( data, level )
+    return lzma.compress( data, preset=level )
+
+def uv3z_decompress_block( data, count, codec, filters ):
+    '''
+    Decompress and rebuild a block of records
+    '''
+    if codec == 'zlib':
+        data = zlib.decompress( data )
+    else:
+        data = lzma.decompress( data )
+    return uv3z_unpack( data, count, filters )
+
+class UV3ZWriter( object ):
+    '''
+    Writer of compressed uv3 files, with the interface of UV3Writer.
+    Records are collected into fixed-size blocks, filtered and compressed
+    independently by a pool of threads, and written in order. The index
+    of the blocks is written at the end of the file, followed by a fixed
+    size trailer giving its place, so that readers can reach any block.
+    '''
+    def __init__( self, output, codec='zlib', level=None, block=uv3z_block, threads=None, filters=uv3z_delta | uv3z_shuffle ):
+        if codec not in uv3z_codecs:
+            raise ValueError( 'unknown uv3 compression codec : %s' % codec )
+        if hasattr( output, 'write' ):
+            self.stream = output
+            self.owned = False
+        else:
+            self.stream = open( output, mode='wb' )
+            self.owned = True
+        self.codec = codec
+        self.level = uv3z_levels[codec] if level is None else level
+        self.filters = filters
+        self.threads = threads or os.cpu_count() or 1
+
+        self.records = 0
+        self.bytes = 0
+        self.index = []
+
+        self.stream.write( uv3z_header.pack( uv3z_magic, uv3z_version, uv3z_codecs[codec], filters, block ) )
+        self.offset = uv3z_header.size
+
+        # blocks being compressed, written in order once done #
+        self.pool = ThreadPoolExecutor( max_workers=self.threads )
+        self.pending = collections.deque()
+        self.buffer = np.empty( block, dtype=uv3_dtype )
+        self.count = 0
+
+    def drain( self, depth ):
+        '''
+        Write the compressed blocks until at most depth are pending
+        '''
+        while len( self.pending ) > depth:
+            job, count = self.pending.popleft()
+            data = job.result()
+            self.stream.write( data )
+            self.index.append( ( self.offset, len( data ), count ) )
+            self.offset += len( data )
+            self.bytes += len( data )
+
+    def push( self ):
+        '''
+        Hand the current block to the compression threads
+        '''
+        self.pending.append( ( self.pool.submit( uv3z_compress_block, self.buffer[:self.count], self.codec, self.level, self.filters ), self.count ) )
+        self.buffer = np.empty( len( self.buffer ), dtype=uv3_dtype )
+        self.count = 0
+        self.drain( 2 * self.threads )
+
+    def write( self, records ):
+        '''
+        Write an array of uv3 records
+        '''
+        start = 0
+        while start < len( records ):
+            size = min( len( records ) - start, len( self.buffer ) - self.count )
+            self.buffer[self.count:self.count + size] = records[start:start + size]
+            self.count += size
+            start += size
+            if self.count == len( self.buffer ):
+                self.push()
+        self.records += len( records )
+
+    def record( self, x, y, z, t, r, g, b ):
+        '''
+        Write a single uv3 record
+        '''
+        self.buffer[self.count] = ( x, y, z, t, r, g, b )
+        self.count += 1
+        if self.count == len( self.buffer ):
+            self.push()
+        self.records += 1
+
+    def close( self ):
+        '''
+        Write the remaining blocks, the block index and the trailer
+        '''
+        if self.pool is None:
+            return
+        if self.count:
+            self.push()
+        self.drain( 0 )
+        self.pool.shutdown()
+        self.pool = None
+
+        index = np.array( self.index, dtype=uv3z_index_dtype )
+        self.stream.write( index.tobytes() )
+        self.stream.write( uv3z_trailer.pack( self.offset, len( index ), self.records, uv3z_index_magic ) )
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *args ):
+        self.close()
+
+class UV3ZReader( object ):
+    '''
+    Reader of compressed uv3 files. The records are given by slices, as
+    with a mapped uv3 file, only the blocks holding them being read and
+    decompressed; the last decompressed block is kept for the next slice.
+    Whole blocks are read in order by chunks, decompressed ahead by a
+    pool of threads.
+    '''
+    def __init__( self, path, threads=None ):
+        self.stream = open( path, mode='rb' )
+        magic, version, codec, self.filters, self.block = uv3z_header.unpack( self.stream.read( uv3z_header.size ) )
+        if magic != uv3z_magic or version != uv3z_version:
+            raise ValueError( 'not a compressed uv3 file : %s' % path )
+        self.codec = { value : name for name, value in uv3z_codecs.items() }[codec]
+        self.threads = threads or os.cpu_count() or 1
+
+        self.stream.seek( -uv3z_trailer.size, os.SEEK_END )
+        offset, blocks, self.count, magic = uv3z_trailer.unpack( self.stream.read( uv3z_trailer.size ) )
+        if magic != uv3z_index_magic:
+            raise ValueError( 'truncated compressed uv3 file : %s' % path )
+        self.stream.seek( offset )
+        self.index = np.frombuffer( self.stream.read( blocks * uv3z_index_dtype.itemsize ), dtype=uv3z_index_dtype )
+
+        # first record of each block #
+        self.starts = np.concatenate( ( [ 0 ], np.cumsum( self.index['records'], dtype=np.int64 ) ) )
+        self.cached = None
+
+    def __len__( self ):
+        return int( self.count )
+
+    def read( self, block ):
+        '''
+        Return the compressed data of a block
+        '''
+        self.stream.seek( int( self.index['offset'][block] ) )
+        return self.stream.read( int( self.index['size'][block] ) )
+
+    def decompress( self, block ):
+        '''
+        Return the records of a block
+        '''
+        if self.cached is None or self.cached[0] != block:
+            self.cached = ( block, uv3z_decompress_block( self.read( block ), int( self.index['records'][block] ), self.codec, self.filters ) )
+        return self.cached[1]
+
+    def __getitem__( self, item ):
+        start, stop, step = item.indices( len( self ) )
+        if step != 1:
+            raise ValueError( 'compressed uv3 records are only read by contiguous slices' )
+        if start >= stop:
+            return np.empty( 0, dtype=uv3_dtype )
+        first = int( np.searchsorted( self.starts, start, side='right' ) ) - 1
+        last = int( np.searchsorted( self.starts, stop, side='left' ) )
+        parts = [ self.decompress( block ) for block in range( first, last ) ]
+        records = parts[0] if len( parts ) == 1 else np.concatenate( parts )
+        return records[start - self.starts[first]:stop - self.starts[first]]
+
+    def blocks( self ):
+        '''
+        Yield the records of each block in order, the next blocks being
+        decompressed in the background
+        '''
+        with ThreadPoolExecutor( max_workers=self.threads ) as pool:
+            pending = collections.deque()
+            for block in range( len( self.index ) ):
+                pending.append( pool.submit( uv3z_decompress_block, self.read( block ), int( self.index['records'][block] ), self.codec, self.filters ) )
+                if len( pending ) > self.threads:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def close( self ):
+        self.stream.close()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *args ):
+        self.close()
+
+def uv3z_writer( output, codec='zlib' ):
+    '''
+    Open a writer of the records of a conversion, compressing them when
+    the output path ends with the compressed uv3 extension
+    '''
+    if uv3z_path( output ):
+        return UV3ZWriter( output, codec )
+    return UV3Writer( output )
+
+def uv3z_output( path ):
+    '''
+    Return the path of the plain uv3 file a conversion is written in
+    before being compressed into the given path
+    '''
+    return os.path.splitext( path )[0] + '.part.uv3'
+
+def uv3z_compress( input, output, codec='zlib', level=None, threads=None, remove=True ):
+    '''
+    Compress a uv3 file, reading it by blocks, and remove it unless asked
+    otherwise. Return the number of records and the compressed size.
+    '''
+    size = os.path.getsize( input ) // uv3_dtype.itemsize
+    records = np.memmap( input, dtype=uv3_dtype, mode='r', shape=( size, ) ) if size else np.empty( 0, dtype=uv3_dtype )
+
+    with UV3ZWriter( output, codec, level, threads=threads ) as uv3:
+        for index in range( 0, len( records ), uv3z_block ):
+            uv3.write( records[index:index + uv3z_block] )
+    del records
+
+    if remove:
+        os.remove( input )
+    return uv3.records, os.path.getsize( output )
+
+def uv3z_decompress( input, output, threads=None ):
+    '''
+    Write the records of a compressed uv3 file into a plain uv3 file
+    '''
+    with UV3ZReader( input, threads ) as reader, UV3Writer( output ) as uv3:
+        for records in reader.blocks():
+            uv3.write( records )
@@ -0,0 +1,69 @@
+import numpy as np
+
+from fourd.gps import GPSConverter
+
+# scalar formulas of the swisstopo documentation, as converted point by point before #
+def scalar_lat( y, x ):
+    y_aux = (y - 2600000) / 1000000
+    x_aux = (x - 1200000) / 1000000
+    lat = (16.9023892 + (3.238272 * x_aux)) + \
+            - (0.270978 * pow(y_aux, 2)) + \
+            - (0.002528 * pow(x_aux, 2)) + \
+            - (0.0447 * pow(y_aux, 2) * x_aux) + \
+            - (0.0140 * pow(x_aux, 3))
+    return (lat * 100) / 36
+
+def scalar_lng( y, x ):
+    y_aux = (y - 2600000) / 1000000
+    x_aux = (x - 1200000) / 1000000
+    lng = (2.6779094 + (4.728982 * y_aux) + \
+            + (0.791484 * y_aux * x_aux) + \
+            + (0.1306 * y_aux * pow(x_aux, 2))) + \
+            - (0.0436 * pow(y_aux, 3))
+    return (lng * 100) / 36
+
+def scalar_height( y, x, h ):
+    y_aux = (y - 2600000) / 1000000
+    x_aux = (x - 1200000) / 1000000
+    return (h + 49.55) - (12.60 * y_aux) - (22.64 * x_aux)
+
+def ch1903_grid():
+    # centimetric coordinates covering Switzerland in CH1903+ #
+    east, north = np.meshgrid( np.arange( 2480000, 2840001, 1501.37 ), np.arange( 1070000, 1300001, 997.03 ) )
+    east = np.round( east.ravel(), 2 )
+    north = np.round( north.ravel(), 2 )
+    height = np.linspace( 190.0, 4634.0, len( east ) )
+    return east, north, height
+
+def ulp_distance( values, reference ):
+    return np.abs( values - reference ) / np.spacing( np.abs( reference ) )
+
+def test_lv03_to_wgs84_matches_scalar_formulas():
+    east, north, height = ch1903_grid()
+    lat, lng, alt = GPSConverter().LV03toWGS84( east, north, height )
+
+    ref_lat = np.array( [ scalar_lat( float( e ), float( n ) ) for e, n in zip( east, north ) ] )
+    ref_lng = np.array( [ scalar_lng( float( e ), float( n ) ) for e, n in zip( east, north ) ] )
+    ref_alt = np.array( [ scalar_height( float( e ), float( n ), float( h ) ) for e, n, h in zip( east, north, height ) ] )
+
+    # powers are products, the C library pow() being off by a unit in rare cases #
+    assert ulp_distance( lat, ref_lat ).max() <= 2
+    assert ulp_distance( lng, ref_lng ).max() <= 2
+    np.testing.assert_array_equal( alt, ref_alt )
+
+def test_lv03_to_wgs84_writes_into_given_arrays():
+    east, north, height = ch1903_grid()
+    converter = GPSConverter()
+    expected = converter.LV03toWGS84( east, north, height )
+
+    out = ( np.empty( len( east ) ), np.empty( len( east ) ), np.empty( len( east ) ) )
+    result = converter.LV03toWGS84( east, north, height, out=out )
+    for array, given, values in zip( result, out, expected ):
+        assert array is given
+        np.testing.assert_array_equal( array, values )
+
+def test_lv03_to_wgs84_scalars():
+    lat, lng, alt = GPSConverter().LV03toWGS84( 2600000.0, 1200000.0, 500.0 )
+    assert float( lat ) == scalar_lat( 2600000.0, 1200000.0 )
+    assert float( lng ) == scalar_lng( 2600000.0, 1200000.0 )
+    assert float( alt ) == scalar_height( 2600000.0, 1200000.0, 500.0 )
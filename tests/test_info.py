@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from fourd.info import UV3Difference, UV3Statistics, info_diff, info_scan
+from fourd.uv3 import uv3_dtype
+
+def records_of( types ):
+    records = np.zeros( len( types ), dtype=uv3_dtype )
+    records['x'] = np.arange( len( types ) ) * 0.5
+    records['y'] = -np.arange( len( types ) ) * 0.25
+    records['z'] = np.arange( len( types ) ) + 100.0
+    records['t'] = types
+    records['r'] = np.arange( len( types ) ) % 3
+    records['g'] = 7
+    records['b'] = 255
+    return records
+
+# a line of three records from 2, a complete triangle, a line, a triangle of two records from 11, and an unknown type #
+inspected_types = [ 1, 1, 2, 2, 2, 3, 3, 3, 1, 2, 2, 3, 3, 7, 1 ]
+
+def inspect( records, chunk ):
+    statistics = UV3Statistics()
+    for start in range( 0, len( records ), chunk ):
+        statistics.update( records[start:start + chunk] )
+    statistics.finish()
+    return statistics
+
+@pytest.mark.parametrize( 'chunk', [ 1, 2, 3, 100 ] )
+def test_statistics_across_chunks( chunk ):
+    records = records_of( inspected_types )
+    records['x'][4] = np.nan
+    records['z'][9] = np.nan
+
+    statistics = inspect( records, chunk )
+
+    assert statistics.count == 15
+    assert list( statistics.types[1:4] ) == [ 4, 5, 5 ]
+    assert statistics.types[7] == 1
+    assert statistics.unknown() == 1
+
+    # bounds of the records without NaN coordinates #
+    valid = np.ones( 15, dtype=bool )
+    valid[[ 4, 9 ]] = False
+    assert list( statistics.min ) == [ records['x'][valid].min(), records['y'][valid].min(), records['z'][valid].min() ]
+    assert list( statistics.max ) == [ records['x'][valid].max(), records['y'][valid].max(), records['z'][valid].max() ]
+    assert ( statistics.nan, statistics.first_nan ) == ( 2, 4 )
+
+    assert statistics.broken == { 2 : 1, 3 : 1 }
+    assert statistics.first_broken == { 2 : 2, 3 : 11 }
+
+    assert list( statistics.colours[0][:3] ) == [ 5, 5, 5 ]
+    assert statistics.colours[1][7] == 15
+    assert statistics.colours[2][255] == 15
+
+@pytest.mark.parametrize( 'chunk', [ 1, 2, 3 ] )
+def test_statistics_of_runs_ending_the_records( chunk ):
+
+    # runs still open at the end are only checked once finished #
+    statistics = UV3Statistics()
+    records = records_of( [ 3, 3, 3, 3, 2, 2, 2, 2, 2 ] )
+    for start in range( 0, len( records ), chunk ):
+        statistics.update( records[start:start + chunk] )
+    assert statistics.broken == { 2 : 0, 3 : 1 }
+
+    statistics.finish()
+    assert statistics.broken == { 2 : 1, 3 : 1 }
+    assert statistics.first_broken == { 2 : 4, 3 : 0 }
+
+def test_statistics_of_complete_primitives():
+    statistics = inspect( records_of( [ 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 1 ] ), 3 )
+    assert statistics.broken == { 2 : 0, 3 : 0 }
+    assert statistics.first_broken == { 2 : None, 3 : None }
+    assert ( statistics.nan, statistics.first_nan ) == ( 0, None )
+
+def test_statistics_of_no_records():
+    statistics = inspect( np.empty( 0, dtype=uv3_dtype ), 1 )
+    assert statistics.count == 0
+    assert statistics.unknown() == 0
+    assert statistics.broken == { 2 : 0, 3 : 0 }
+
+@pytest.mark.parametrize( 'chunk', [ 1, 2, 3, 100 ] )
+def test_scan_reports_trailing_bytes( tmp_path, chunk ):
+    records = records_of( inspected_types )
+    path = tmp_path / 'truncated.uv3'
+    path.write_bytes( records.tobytes() + b'\x00' * 11 )
+
+    statistics, trailing = info_scan( str( path ), chunk )
+    assert trailing == 11
+    assert statistics.count == 15
+    assert statistics.broken == { 2 : 1, 3 : 1 }
+
+    path.write_bytes( b'\x00' * 27 )
+    statistics, trailing = info_scan( str( path ), chunk )
+    assert ( statistics.count, trailing ) == ( 0, 27 )
+
+def differences():
+    records_a = records_of( [ 1 ] * 12 )
+    records_b = records_a.copy()
+    records_b['x'][2] += 0.125
+    records_b['z'][2] -= 3.0
+    records_b['r'][5] = 200
+    records_b['t'][7] = 2
+    records_b['y'][9] = np.nan
+    records_b['z'][10] += 0.5
+
+    # same NaN in both records - equal bytes #
+    records_a['x'][11] = records_b['x'][11] = np.nan
+    return records_a, records_b
+
+@pytest.mark.parametrize( 'chunk', [ 1, 2, 3, 100 ] )
+def test_difference_across_chunks( chunk ):
+    records_a, records_b = differences()
+
+    difference = UV3Difference()
+    for start in range( 0, len( records_a ), chunk ):
+        difference.update( start, records_a[start:start + chunk], records_b[start:start + chunk] )
+
+    assert difference.compared == 12
+    assert difference.records == 5
+    assert difference.first == 2
+    assert difference.fields == { 'x' : 1, 'y' : 1, 'z' : 2, 't' : 1, 'r' : 1, 'g' : 0, 'b' : 0 }
+
+    # NaN differences left out of the distance #
+    assert list( difference.distance ) == [ 0.125, 0.0, 3.0 ]
+
+def test_difference_of_signed_zeros():
+    records_a = records_of( [ 1 ] )
+    records_b = records_a.copy()
+    records_a['x'] = 0.0
+    records_b['x'] = -0.0
+
+    difference = UV3Difference()
+    difference.update( 0, records_a, records_b )
+    assert ( difference.records, difference.fields['x'], difference.distance[0] ) == ( 1, 1, 0.0 )
+
+@pytest.mark.parametrize( 'chunk', [ 1, 2, 3, 100 ] )
+def test_diff_of_files( tmp_path, chunk ):
+    records_a, records_b = differences()
+    path_a = tmp_path / 'a.uv3'
+    path_b = tmp_path / 'b.uv3'
+    path_a.write_bytes( records_a.tobytes() )
+    path_b.write_bytes( records_b.tobytes() + records_of( [ 1, 1 ] ).tobytes() + b'\x01' )
+
+    # common records only, sizes with the extra records and bytes #
+    difference, size_a, size_b = info_diff( str( path_a ), str( path_b ), chunk )
+    assert ( difference.compared, difference.records, difference.first ) == ( 12, 5, 2 )
+    assert ( size_a, size_b ) == ( 12 * 28, 14 * 28 + 1 )
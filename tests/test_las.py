@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+import pytest
+
+from fourd.las import las_class, las_classification, las_filter, las_mask, las_returns
+
+# point records of the formats 0 to 5 and 6 to 10, as mapped from the files #
+legacy_dtype = np.dtype( [ ( 'X', '<i4' ), ( 'Y', '<i4' ), ( 'Z', '<i4' ), ( 'intensity', '<u2' ), ( 'flag_byte', 'u1' ), ( 'raw_classification', 'u1' ) ] )
+extended_dtype = np.dtype( [ ( 'X', '<i4' ), ( 'Y', '<i4' ), ( 'Z', '<i4' ), ( 'intensity', '<u2' ), ( 'flag_byte', 'u1' ), ( 'classification_flags', 'u1' ), ( 'classification_byte', 'u1' ) ] )
+
+class Header( object ):
+
+    def __init__( self, scale, offset ):
+        self.scale = scale
+        self.offset = offset
+
+class LasFile( object ):
+
+    def __init__( self, scale=( 0.01, 0.01, 0.01 ), offset=( 2600000.0, 1200000.0, 0.0 ) ):
+        self.header = Header( scale, offset )
+
+def test_class_leaves_out_the_flags_of_legacy_formats():
+    chunk = np.zeros( 4, dtype=legacy_dtype )
+    chunk['raw_classification'] = [ 2, 2 | 0x20, 6 | 0x80, 31 | 0xe0 ]
+
+    assert list( las_class( chunk ) ) == [ 2, 2, 6, 31 ]
+    assert list( las_classification( chunk ) ) == [ 2, 0x22, 0x86, 0xff ]
+
+def test_class_keeps_the_byte_of_extended_formats():
+    chunk = np.zeros( 3, dtype=extended_dtype )
+    chunk['classification_byte'] = [ 2, 64, 200 ]
+
+    assert list( las_class( chunk ) ) == [ 2, 64, 200 ]
+
+def test_class_mask_ignores_the_flags():
+    chunk = np.zeros( 4, dtype=legacy_dtype )
+    chunk['raw_classification'] = [ 2, 2 | 0x40, 5, 6 | 0x20 ]
+
+    pm_filter = las_filter( LasFile(), classes=[ 2, 6 ] )
+    assert list( las_mask( pm_filter, chunk ) ) == [ True, True, False, True ]
+
+def test_no_filter():
+    assert las_filter( LasFile() ) is None
+    assert las_mask( None, np.zeros( 3, dtype=legacy_dtype ) ) is None
+
+def test_bbox_mask_includes_its_bounds():
+    chunk = np.zeros( 6, dtype=legacy_dtype )
+
+    # raw integers of 2600010.00 to 2600010.05, and of 1200020.00 #
+    chunk['X'] = [ 999, 1000, 1002, 1004, 1005, 1003 ]
+    chunk['Y'] = [ 2000, 2000, 2000, 2000, 2000, 2001 ]
+
+    pm_filter = las_filter( LasFile(), bbox=( 2600010.0, 1200019.995, 2600010.04, 1200020.0 ) )
+    assert pm_filter['bbox'] == ( 1000, 2000, 1004, 2000 )
+    assert list( las_mask( pm_filter, chunk ) ) == [ False, True, True, True, False, False ]
+
+@pytest.mark.parametrize( 'dtype, flags', [
+    ( legacy_dtype, [ 1 | 1 << 3, 1 | 3 << 3, 2 | 3 << 3, 3 | 3 << 3, 2 | 2 << 3 ] ),
+    ( extended_dtype, [ 1 | 1 << 4, 1 | 3 << 4, 2 | 3 << 4, 3 | 3 << 4, 2 | 2 << 4 ] ),
+] )
+def test_returns_mask( dtype, flags ):
+    chunk = np.zeros( 5, dtype=dtype )
+    chunk['flag_byte'] = flags
+
+    number, count = las_returns( chunk )
+    assert list( number ) == [ 1, 1, 2, 3, 2 ]
+    assert list( count ) == [ 1, 3, 3, 3, 2 ]
+
+    assert list( las_mask( las_filter( LasFile(), returns='first' ), chunk ) ) == [ True, True, False, False, False ]
+    assert list( las_mask( las_filter( LasFile(), returns='last' ), chunk ) ) == [ True, False, False, True, True ]
+    assert list( las_mask( las_filter( LasFile(), returns='2' ), chunk ) ) == [ False, False, True, False, True ]
+
+def test_intensity_mask_and_combined_filters():
+    chunk = np.zeros( 5, dtype=legacy_dtype )
+    chunk['intensity'] = [ 99, 100, 150, 200, 201 ]
+    chunk['raw_classification'] = [ 2, 2, 3, 2, 2 ]
+
+    assert list( las_mask( las_filter( LasFile(), intensity=( 100, 200 ) ), chunk ) ) == [ False, True, True, True, False ]
+    assert list( las_mask( las_filter( LasFile(), classes=[ 2 ], intensity=( 100, 200 ) ), chunk ) ) == [ False, True, False, True, False ]
+
+def las( path, count=2000 ):
+    laspy = pytest.importorskip( 'laspy.file' )
+    header = pytest.importorskip( 'laspy.header' )
+    rng = np.random.default_rng( 0 )
+    inFile = laspy.File( path, mode='w', header=header.Header( point_format=3 ) )
+    inFile.header.scale = [ 0.01, 0.01, 0.01 ]
+    inFile.header.offset = [ 2600000, 1200000, 0 ]
+    inFile.X = rng.integers( 0, 100000, count ).astype( np.int32 )
+    inFile.Y = rng.integers( 0, 100000, count ).astype( np.int32 )
+    inFile.Z = rng.integers( 30000, 80000, count ).astype( np.int32 )
+    inFile.intensity = rng.integers( 0, 4000, count ).astype( np.uint16 )
+    inFile.raw_classification = rng.integers( 0, 25, count ).astype( np.uint8 )
+    inFile.red = rng.integers( 0, 256, count ).astype( np.uint16 )
+    inFile.green = rng.integers( 0, 256, count ).astype( np.uint16 )
+    inFile.blue = rng.integers( 0, 256, count ).astype( np.uint16 )
+    inFile.header.min = [ inFile.x.min(), inFile.y.min(), inFile.z.min() ]
+    inFile.header.max = [ inFile.x.max(), inFile.y.max(), inFile.z.max() ]
+    inFile.close()
+    return path
+
+@pytest.mark.parametrize( 'options', [ [], [ '-t', '1' ], [ '-c', '1' ], [ '-w', '2' ], [ '--sort', '1' ] ] )
+def test_filters_selecting_no_point( tmp_path, options ):
+    from fourd.tools.las_to_uv3 import main
+    input = las( str( tmp_path / 'points.las' ) )
+    output = str( tmp_path / 'points.uv3' )
+
+    # no class above 24 in the file #
+    main( [ '-i', input, '-o', output, '--classes', '30', '--chunk-points', '500' ] + options )
+    assert os.path.getsize( output ) == 0
+
+@pytest.mark.parametrize( 'options', [ [], [ '-t', '1' ], [ '-w', '2' ] ] )
+def test_batch_filters_selecting_no_point( tmp_path, options ):
+    from fourd.tools.batch_las_uv3 import main
+    folder = tmp_path / 'las'
+    folder.mkdir()
+    for name in ( 'a.las', 'b.las' ):
+        las( str( folder / name ), 500 )
+    output = str( tmp_path / 'points.uv3' )
+
+    main( [ '-i', str( folder ) + os.sep, '-o', output, '--bbox', '0', '0', '1', '1' ] + options )
+    assert os.path.getsize( output ) == 0
+
+def test_filters_keep_the_selected_points( tmp_path ):
+    from fourd.tools.las_to_uv3 import main
+    input = las( str( tmp_path / 'points.las' ) )
+    output = str( tmp_path / 'points.uv3' )
+
+    main( [ '-i', input, '-o', output, '--classes', '2', '6', '--intensity-range', '1000', '3000' ] )
+
+    laspy = pytest.importorskip( 'laspy.file' )
+    inFile = laspy.File( input, mode='r' )
+    try:
+        kept = np.isin( inFile.raw_classification & 0x1f, [ 2, 6 ] ) & ( inFile.intensity >= 1000 ) & ( inFile.intensity <= 3000 )
+    finally:
+        inFile.close()
+    assert os.path.getsize( output ) == 28 * int( np.count_nonzero( kept ) ) > 0
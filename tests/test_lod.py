@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+from fourd.lod import lod_buckets, lod_build, lod_dtype, lod_keys, lod_output, lod_split, lod_voxels
+from fourd.uv3 import uv3_dtype
+
+def lod_records( count, seed=0 ):
+    rng = np.random.default_rng( seed )
+    X = rng.uniform( 1000.0, 1040.0, count )
+    Y = rng.uniform( 2000.0, 2040.0, count )
+    Z = rng.uniform( 400.0, 410.0, count )
+    I, J, K = lod_voxels( X, Y, Z, ( 1000.0, 2000.0, 400.0 ), 1.5 )
+
+    records = np.zeros( count, dtype=lod_dtype )
+    records['x'] = X
+    records['y'] = Y
+    records['z'] = Z
+    records['t'] = 1
+    records['n'] = np.arange( count )
+    records['i'] = I
+    records['j'] = J
+    records['k'] = K
+    return records
+
+def build( tmp_path, records, buckets, levels=3 ):
+    '''
+    Split the records in two parts and build their levels, with a memory
+    budget giving the asked number of buckets
+    '''
+    path = tmp_path / ( 'buckets-%d' % buckets )
+    path.mkdir()
+    max_memory = ( 2 * len( records ) * lod_dtype.itemsize ) // buckets
+    assert lod_buckets( len( records ), max_memory ) == buckets
+
+    half = len( records ) // 2
+    lod_split( str( path ), 0, 'a', records[:half], buckets )
+    lod_split( str( path ), 0, 'b', records[half:], buckets )
+
+    output = str( path / 'points.uv3' )
+    counts = lod_build( str( path ), [ 'a', 'b' ], output, levels, len( records ), max_memory )
+
+    # bucket files removed once read, the levels being left #
+    assert sorted( os.listdir( str( path ) ) ) == sorted( os.path.basename( lod_output( output, level + 1 ) ) for level in range( levels ) )
+    return counts, [ np.fromfile( lod_output( output, level + 1 ), dtype=uv3_dtype ) for level in range( levels ) ]
+
+def first_of_voxels( records, level ):
+    keys = lod_keys( records, level )
+    _, first = np.unique( keys, return_index=True )
+    return records[np.sort( first )]
+
+def raw( records ):
+    return np.sort( np.ascontiguousarray( records[list( uv3_dtype.names )].astype( uv3_dtype ) ).view( 'V28' ) )
+
+def test_levels_keep_the_first_point_of_each_voxel( tmp_path ):
+    records = lod_records( 3000 )
+    counts, levels = build( tmp_path, records, 1 )
+
+    expected = records
+    for level, uv3 in enumerate( levels ):
+        expected = first_of_voxels( expected, level )
+        assert counts[level] == len( uv3 ) == len( expected )
+        np.testing.assert_array_equal( np.sort( uv3.view( 'V28' ) ), raw( expected ) )
+
+    # a single point per voxel, and fewer points at each level #
+    assert counts[0] > counts[1] > counts[2] > 0
+
+def test_levels_do_not_depend_on_the_buckets( tmp_path ):
+    records = lod_records( 3000, seed=1 )
+    counts, levels = build( tmp_path, records, 1 )
+
+    for buckets in ( 2, 5, 8 ):
+        bucket_counts, bucket_levels = build( tmp_path, records, buckets )
+        assert bucket_counts == counts
+        for uv3, reference in zip( bucket_levels, levels ):
+            np.testing.assert_array_equal( np.sort( uv3.view( 'V28' ) ), np.sort( reference.view( 'V28' ) ) )
+
+def test_voxels_of_points():
+    I, J, K = lod_voxels( np.array( [ 0.0, 1.49, 1.5, 3.1 ] ), np.array( [ 10.0, 10.0, 11.6, 10.0 ] ), np.zeros( 4 ), ( 0.0, 10.0, 0.0 ), 1.5 )
+    assert list( I ) == [ 0, 0, 1, 2 ]
+    assert list( J ) == [ 0, 0, 1, 0 ]
+    assert list( K ) == [ 0, 0, 0, 0 ]
+
+    with pytest.raises( ValueError ):
+        lod_voxels( np.array( [ -1.0 ] ), np.array( [ 10.0 ] ), np.zeros( 1 ), ( 0.0, 10.0, 0.0 ), 1.5 )
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from fourd.morton import morton_bounds, morton_keys, morton_merge, morton_record_bytes, morton_sort, morton_spread
+from fourd.uv3 import uv3_dtype
+
+class Collector( object ):
+
+    def __init__( self ):
+        self.parts = []
+
+    def write( self, records ):
+        self.parts.append( np.array( records ) )
+
+    def records( self ):
+        return np.concatenate( self.parts ) if self.parts else np.empty( 0, dtype=uv3_dtype )
+
+def points( count, seed=0 ):
+    rng = np.random.default_rng( seed )
+    records = np.zeros( count, dtype=uv3_dtype )
+    records['x'] = rng.uniform( 0.10, 0.11, count )
+    records['y'] = rng.uniform( 0.80, 0.81, count )
+    records['z'] = rng.uniform( 400.0, 500.0, count )
+    records['t'] = 1
+    records['r'] = np.arange( count ) % 256
+    records['g'] = ( np.arange( count ) // 256 ) % 256
+    return records
+
+def test_spread_interleaves_bits():
+    values = np.array( [ 0, 1, 2, 3, 0x1fffff ], dtype=np.uint64 )
+    spread = morton_spread( values )
+    assert list( spread[:4] ) == [ 0, 1, 8, 9 ]
+    assert int( spread[4] ) == int( '001' * 21, 2 )
+
+def test_keys_follow_the_z_order():
+    records = np.zeros( 4, dtype=uv3_dtype )
+    records['x'] = [ 0.0, 1.0, 0.0, 1.0 ]
+    records['y'] = [ 0.0, 0.0, 1.0, 1.0 ]
+    keys = morton_keys( records, morton_bounds( records ) )
+    assert list( np.argsort( keys ) ) == [ 0, 1, 2, 3 ]
+
+def test_sort_matches_a_stable_sort_in_memory( tmp_path ):
+    records = points( 5000 )
+
+    # duplicated coordinates, whose order must be kept #
+    records[1000:1500][[ 'x', 'y', 'z' ]] = records[0][[ 'x', 'y', 'z' ]]
+
+    path = str( tmp_path / 'points.uv3' )
+    records.tofile( path )
+
+    # runs of 300 records, merged by blocks much smaller than them #
+    morton_sort( path, path, 300 * morton_record_bytes )
+
+    expected = records[np.argsort( morton_keys( records, morton_bounds( records ) ), kind='stable' )]
+    np.testing.assert_array_equal( np.fromfile( path, dtype=uv3_dtype ), expected )
+
+def test_merge_keeps_equal_keys_in_run_order():
+    records = points( 20 )
+    records[[ 'x', 'y', 'z' ]] = records[0][[ 'x', 'y', 'z' ]]
+    runs = [ records[:10], records[10:] ]
+    bounds = ( np.zeros( 3 ), np.ones( 3 ) )
+
+    # equal keys straddle the blocks of both runs #
+    output = Collector()
+    morton_merge( runs, bounds, output, 3 )
+    np.testing.assert_array_equal( output.records(), records )
+
+def test_merge_interleaves_runs_by_key():
+    records = points( 400, seed=1 )
+    bounds = morton_bounds( records )
+    runs = [ part[np.argsort( morton_keys( part, bounds ), kind='stable' )] for part in ( records[:150], records[150:300], records[300:] ) ]
+
+    output = Collector()
+    morton_merge( runs, bounds, output, 16 )
+
+    expected = np.concatenate( runs )
+    expected = expected[np.argsort( morton_keys( expected, bounds ), kind='stable' )]
+    np.testing.assert_array_equal( output.records(), expected )
+
+def test_sort_rejects_non_finite_coordinates( tmp_path ):
+    records = points( 100 )
+    records['z'][42] = np.nan
+    path = str( tmp_path / 'points.uv3' )
+    records.tofile( path )
+
+    with pytest.raises( ValueError, match='record 42' ):
+        morton_sort( path, path )
+    np.testing.assert_array_equal( np.fromfile( path, dtype=uv3_dtype ).view( 'V28' ), records.view( 'V28' ) )
+
+def test_sort_empty_file( tmp_path ):
+    path = tmp_path / 'empty.uv3'
+    path.write_bytes( b'' )
+    morton_sort( str( path ), str( path ) )
+    assert path.read_bytes() == b''
@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+pytest.importorskip( 'osgeo' )
+
+from fourd.raster import RasterCache, raster_colours, raster_sample, raster_windows
+
+# interpolation of the tools before vectorization, x being the row and y the column #
+def pm_raster_interpolate( pm_x, pm_y, pm_raster, pm_nodata ):
+    pm_x1 = int( pm_x )
+    pm_y1 = int( pm_y )
+    pm_x2 = pm_x1 + 1
+    pm_y2 = pm_y1 + 1
+    pm_dx = pm_x - pm_x1
+    pm_dy = pm_y - pm_y1
+    pm_x1y1 = pm_raster[pm_x1][pm_y1] / 1.0
+    pm_x1y2 = pm_raster[pm_x1][pm_y2] / 1.0
+    pm_x2y1 = pm_raster[pm_x2][pm_y1] / 1.0
+    pm_x2y2 = pm_raster[pm_x2][pm_y2] / 1.0
+    pm_dfc = pm_x1y1
+    pm_dfx = pm_x2y1 - pm_x1y1
+    pm_dfy = pm_x1y2 - pm_x1y1
+    pm_dfxy = pm_x1y1 + pm_x2y2 - pm_x2y1 - pm_x1y2
+    return pm_dfx * pm_dx + pm_dfy * pm_dy + pm_dfxy * pm_dx * pm_dy + pm_dfc
+
+def scalar_sample( raster, rows, columns ):
+    heights = np.zeros( ( len( rows ), len( columns ) ) )
+    inside = np.zeros( ( len( rows ), len( columns ) ), dtype=bool )
+    height, width = raster.shape
+    for line, row in enumerate( rows ):
+        for cell, column in enumerate( columns ):
+            if int( column ) < 0 or int( row ) < 0 or int( column ) + 1 >= width or int( row ) + 1 >= height:
+                continue
+            heights[line, cell] = pm_raster_interpolate( float( row ), float( column ), raster, None )
+            inside[line, cell] = True
+    return heights, inside
+
+def dem( dtype, seed=0 ):
+    rng = np.random.default_rng( seed )
+    return ( rng.uniform( -50.0, 3000.0, ( 9, 13 ) ) ).astype( dtype )
+
+# fractional pixel coordinates, some outside of the raster or on its last line #
+sample_rows = np.array( [ -0.5, 0.0, 0.25, 3.999, 4.5, 7.0, 7.75, 8.0, 8.5, 12.0 ] )
+sample_columns = np.array( [ -1.25, 0.0, 0.5, 6.125, 11.0, 11.999, 12.0, 12.5 ] )
+
+@pytest.mark.parametrize( 'dtype', [ np.int16, np.int32, np.float32, np.float64 ] )
+def test_sample_matches_the_scalar_interpolation( dtype ):
+    raster = dem( dtype )
+    heights, inside = raster_sample( raster, sample_rows, sample_columns, raster.shape[0], raster.shape[1] )
+    expected, expected_inside = scalar_sample( raster, sample_rows, sample_columns )
+
+    np.testing.assert_array_equal( inside, expected_inside )
+    np.testing.assert_array_equal( heights, expected )
+    assert inside.any() and not inside.all()
+
+def test_sample_of_a_window():
+    raster = dem( np.float32, 1 )
+    rows = np.array( [ 4.5, 6.25 ] )
+    columns = np.array( [ 5.5, 8.0 ] )
+
+    # nodes read out of a window of the raster, starting at column 5 and row 4 #
+    heights, inside = raster_sample( raster[4:8, 5:10], rows, columns, 9, 13, 5, 4 )
+    expected, _ = scalar_sample( raster, rows, columns )
+    assert inside.all()
+    np.testing.assert_array_equal( heights, expected )
+
+def test_sample_outside_of_the_raster():
+    heights, inside = raster_sample( None, np.array( [ -3.0, 20.0 ] ), np.array( [ 0.5 ] ), 9, 13 )
+    assert not inside.any()
+    np.testing.assert_array_equal( heights, np.zeros( ( 2, 1 ) ) )
+
+class Band( object ):
+    '''
+    Raster band read out of an array, counting the reads
+    '''
+    def __init__( self, array, block ):
+        self.array = array
+        self.YSize, self.XSize = array.shape
+        self.block = block
+        self.reads = []
+
+    def GetBlockSize( self ):
+        return list( self.block )
+
+    def ReadAsArray( self, x, y, width, height ):
+        self.reads.append( ( x, y, width, height ) )
+        return self.array[y:y + height, x:x + width].copy()
+
+def test_cache_gives_windows_across_blocks():
+    array = np.arange( 23 * 17, dtype=np.int32 ).reshape( 17, 23 )
+    band = Band( array, ( 8, 5 ) )
+    cache = RasterCache( band, budget=1 << 20 )
+
+    for x, y, width, height in ( ( 0, 0, 23, 17 ), ( 7, 4, 2, 2 ), ( 16, 15, 7, 2 ), ( 3, 6, 9, 1 ) ):
+        np.testing.assert_array_equal( cache.read( x, y, width, height ), array[y:y + height, x:x + width] )
+
+    # each block read once, partial blocks at the edges #
+    assert cache.misses == len( band.reads ) == 3 * 4
+    assert ( 16, 15, 7, 2 ) in band.reads
+    assert cache.hits > 0
+
+def test_cache_drops_the_least_recently_used_blocks():
+    array = np.arange( 40 * 10, dtype=np.int16 ).reshape( 10, 40 )
+    band = Band( array, ( 10, 10 ) )
+
+    # room for two blocks of 200 bytes #
+    cache = RasterCache( band, budget=400 )
+    for column in ( 0, 1, 0, 2, 0, 1 ):
+        cache.block( column, 0 )
+
+    # block 1 dropped for block 2, block 0 kept being used #
+    assert [ x for x, y, width, height in band.reads ] == [ 0, 10, 20, 10 ]
+    assert ( cache.misses, cache.hits ) == ( 4, 2 )
+    assert list( cache.blocks ) == [ ( 0, 0 ), ( 1, 0 ) ]
+    assert cache.bytes == 400
+
+def test_cache_keeps_a_block_larger_than_the_budget():
+    band = Band( np.zeros( ( 4, 4 ), dtype=np.float64 ), ( 4, 4 ) )
+    cache = RasterCache( band, budget=1 )
+    cache.read( 0, 0, 4, 4 )
+    cache.read( 1, 1, 2, 2 )
+    assert ( cache.misses, cache.hits ) == ( 1, 1 )
+
+def test_cache_prepares_blocks_once():
+    array = np.array( [ [ -40000000000, 5 ], [ 7, -40000000000 ] ], dtype=np.int64 )
+    prepared = []
+    def prepare( data ):
+        prepared.append( data.shape )
+        return np.where( data < -34020000000, 0, data )
+
+    cache = RasterCache( Band( array, ( 2, 1 ) ), prepare=prepare )
+    np.testing.assert_array_equal( cache.read( 0, 0, 2, 2 ), [ [ 0, 5 ], [ 7, 0 ] ] )
+    np.testing.assert_array_equal( cache.read( 1, 0, 1, 2 ), [ [ 5 ], [ 0 ] ] )
+    assert prepared == [ ( 1, 2 ), ( 1, 2 ) ]
+
+@pytest.mark.parametrize( 'order', [ 'row', 'column' ] )
+def test_windows_cover_the_range( order ):
+    band = Band( np.zeros( ( 50, 70 ) ), ( 16, 8 ) )
+    line = 70 if order == 'row' else 50
+    windows = list( raster_windows( band, 3, 45, order, 20 * line, 1 ) )
+
+    # contiguous windows, cut on the blocks along the split, with the overlap #
+    assert windows[0][0] == 3
+    assert sum( count for first, count, read in windows ) == 42
+    block = 8 if order == 'row' else 16
+    for first, count, read in windows[:-1]:
+        assert ( first + count ) % block == 0
+        assert read == count + 1
+
+def test_colours_larger_than_a_byte_are_rejected():
+    raster_colours( [ np.array( [ [ 0, 255 ] ], dtype=np.uint8 ), np.array( [ [ -1, 255 ] ], dtype=np.int16 ) ] )
+    with pytest.raises( ValueError ):
+        raster_colours( [ np.array( [ [ 0, 255 ] ], dtype=np.uint8 ), np.array( [ [ 0, 256 ] ], dtype=np.uint16 ) ] )
@@ -0,0 +1,167 @@
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from fourd.stream import stream_close, stream_open, stream_path, stream_send, stream_temporary
+
+class Receiver(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        self.server.received.append(self.rfile.read())
+
+class TCPReceiver(socketserver.TCPServer):
+    received = None
+
+class UnixReceiver(socketserver.UnixStreamServer):
+    received = None
+
+def receive(server):
+    '''
+    Serve a single connection in the background, its bytes being kept in
+    server.received
+    '''
+    server.received = []
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+    return thread
+
+def fifo_reader(path):
+    received = []
+    def read():
+        with open(path, mode='rb') as fifo:
+            received.append(fifo.read())
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread, received
+
+def las(path, count=5000):
+    laspy = pytest.importorskip('laspy.file')
+    header = pytest.importorskip('laspy.header')
+    rng = np.random.default_rng(0)
+    inFile = laspy.File(path, mode='w', header=header.Header(point_format=3))
+    inFile.header.scale = [0.01, 0.01, 0.01]
+    inFile.header.offset = [2600000, 1200000, 0]
+    inFile.X = rng.integers(0, 100000, count).astype(np.int32)
+    inFile.Y = rng.integers(0, 100000, count).astype(np.int32)
+    inFile.Z = rng.integers(30000, 80000, count).astype(np.int32)
+    inFile.intensity = rng.integers(0, 4000, count).astype(np.uint16)
+    inFile.raw_classification = rng.integers(0, 25, count).astype(np.uint8)
+    inFile.red = rng.integers(0, 256, count).astype(np.uint16)
+    inFile.green = rng.integers(0, 256, count).astype(np.uint16)
+    inFile.blue = rng.integers(0, 256, count).astype(np.uint16)
+    inFile.header.min = [inFile.x.min(), inFile.y.min(), inFile.z.min()]
+    inFile.header.max = [inFile.x.max(), inFile.y.max(), inFile.z.max()]
+    inFile.close()
+    return path
+
+def convert(input, output, *options):
+    from fourd.tools.las_to_uv3 import main
+    main(['-i', input, '-o', output, '-s', '1', '-r', '1', '--chunk-points', '1000'] + list(options))
+
+def test_stream_path(tmp_path):
+    fifo = str(tmp_path / 'fifo')
+    os.mkfifo(fifo)
+    plain = tmp_path / 'points.uv3'
+    plain.write_bytes(b'')
+
+    assert stream_path('-')
+    assert stream_path('tcp://localhost:4000')
+    assert stream_path('unix:///tmp/socket')
+    assert stream_path(fifo)
+    assert not stream_path(str(plain))
+    assert not stream_path(str(tmp_path / 'missing.uv3'))
+    assert not stream_path(None)
+
+def test_stream_send_over_a_socket_pair():
+    data = os.urandom(3 * 1024 * 1024 + 28)
+    path = stream_temporary()
+    with open(path, mode='wb') as source:
+        source.write(data)
+
+    sender, receiver = socket.socketpair()
+    received = []
+    def read():
+        with receiver.makefile(mode='rb') as stream:
+            received.append(stream.read())
+        receiver.close()
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+
+    stream = sender.makefile(mode='wb')
+    sender.close()
+    stream_send(path, stream)
+    stream_close(stream)
+    thread.join(10)
+
+    assert received == [data]
+    assert not os.path.exists(path)
+
+@pytest.mark.parametrize('options', [[], ['--sort', '1'], ['-w', '2']])
+def test_conversion_over_tcp(tmp_path, options):
+    input = las(str(tmp_path / 'points.las'))
+    output = str(tmp_path / 'points.uv3')
+    convert(input, output, *options)
+
+    with TCPReceiver(('127.0.0.1', 0), Receiver) as server:
+        thread = receive(server)
+        convert(input, 'tcp://127.0.0.1:%d' % server.server_address[1], *options)
+        thread.join(10)
+
+    with open(output, mode='rb') as uv3:
+        assert server.received == [uv3.read()]
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='no unix sockets')
+def test_conversion_over_a_unix_socket(tmp_path):
+    input = las(str(tmp_path / 'points.las'))
+    output = str(tmp_path / 'points.uv3')
+    convert(input, output)
+
+    path = str(tmp_path / 'socket')
+    with UnixReceiver(path, Receiver) as server:
+        thread = receive(server)
+        convert(input, 'unix://' + path)
+        thread.join(10)
+
+    with open(output, mode='rb') as uv3:
+        assert server.received == [uv3.read()]
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='no named pipes')
+def test_conversion_into_a_named_pipe(tmp_path):
+    input = las(str(tmp_path / 'points.las'))
+    output = str(tmp_path / 'points.uv3')
+    convert(input, output)
+
+    path = str(tmp_path / 'fifo')
+    os.mkfifo(path)
+    thread, received = fifo_reader(path)
+    convert(input, path)
+    thread.join(10)
+
+    with open(output, mode='rb') as uv3:
+        assert received == [uv3.read()]
+
+def test_conversion_to_the_standard_output(tmp_path, capfdbinary):
+    input = las(str(tmp_path / 'points.las'))
+    output = str(tmp_path / 'points.uv3')
+    convert(input, output)
+    capfdbinary.readouterr()
+
+    stdout = sys.stdout
+    convert(input, '-')
+
+    # messages went to the standard error, which is given back once done #
+    assert sys.stdout is stdout
+    received = capfdbinary.readouterr()
+    assert b'Processing file' in received.err
+    with open(output, mode='rb') as uv3:
+        assert received.out == uv3.read()
+
+def test_streams_reject_tiles(tmp_path):
+    input = las(str(tmp_path / 'points.las'), 10)
+    with pytest.raises(SystemExit):
+        convert(input, 'tcp://127.0.0.1:1', '--tiles', '0.001')
@@ -0,0 +1,136 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from fourd.morton import morton_bounds, morton_keys
+from fourd.tiles import TileWriter, tiles_files, tiles_gather, tiles_load, tiles_manifest, tiles_part, tiles_sort
+from fourd.uv3 import uv3_dtype
+
+def points( degrees, t=1 ):
+    records = np.zeros( len( degrees ), dtype=uv3_dtype )
+    records['x'] = np.radians( [ x for x, y in degrees ] )
+    records['y'] = np.radians( [ y for x, y in degrees ] )
+    records['z'] = np.arange( len( degrees ) ) + 10.0
+    records['t'] = t
+    records['r'] = np.arange( len( degrees ) )
+    return records
+
+def tile( path, name ):
+    return np.fromfile( os.path.join( path, name + '.uv3' ), dtype=uv3_dtype )
+
+def same( a, b ):
+    np.testing.assert_array_equal( np.asarray( a ).view( 'V28' ), np.asarray( b ).view( 'V28' ) )
+
+# points going back and forth between three cells of one degree #
+routed = [ ( 0.5, 0.5 ), ( 1.5, 0.5 ), ( 0.25, 0.75 ), ( -0.5, 0.5 ), ( 1.75, 0.25 ), ( 0.5, 0.25 ), ( -0.25, 0.5 ) ]
+
+def test_records_are_routed_into_cells( tmp_path ):
+    records = points( routed )
+    path = str( tmp_path / 'tiles' )
+
+    # a single opened tile, so that tiles are closed and opened again in append mode #
+    with TileWriter( path, 1.0, handles=1 ) as uv3:
+        for index in range( len( records ) ):
+            uv3.write( records[index:index + 1] )
+        uv3.write( records[:0] )
+
+    same( tile( path, '0_0' ), records[[ 0, 2, 5 ]] )
+    same( tile( path, '1_0' ), records[[ 1, 4 ]] )
+    same( tile( path, '-1_0' ), records[[ 3, 6 ]] )
+
+    with open( os.path.join( path, tiles_manifest ) ) as stream:
+        manifest = json.load( stream )
+    assert manifest['size_deg'] == 1.0
+    assert [ entry['file'] for entry in manifest['tiles'] ] == [ '-1_0.uv3', '0_0.uv3', '1_0.uv3' ]
+
+    entry = tiles_load( path )['-1_0']
+    assert entry['cell'] == [ -1, 0 ]
+    assert entry['extent_deg'] == [ -1.0, 0.0, 0.0, 1.0 ]
+    assert entry['count'] == 2
+
+    # bounds in the units of the records #
+    assert entry['min'] == [ math.radians( -0.5 ), math.radians( 0.5 ), 13.0 ]
+    assert entry['max'] == [ math.radians( -0.25 ), math.radians( 0.5 ), 16.0 ]
+    assert tiles_files( path ) == [ os.path.join( path, name + '.uv3' ) for name in ( '-1_0', '0_0', '1_0' ) ]
+
+def test_writes_of_several_cells_keep_the_order( tmp_path ):
+    records = points( routed * 3 )
+    path = str( tmp_path / 'tiles' )
+
+    with TileWriter( path, 1.0, handles=1 ) as uv3:
+        uv3.write( records[:10] )
+        uv3.write( records[10:] )
+
+    cells = np.floor( np.degrees( records['x'] ) ).astype( int )
+    for x in ( -1, 0, 1 ):
+        same( tile( path, '%d_0' % x ), records[cells == x] )
+        assert tiles_load( path )['%d_0' % x]['count'] == int( np.count_nonzero( cells == x ) )
+
+def test_primitives_follow_their_first_vertex( tmp_path ):
+
+    # two triangles starting in different cells, with vertices across them #
+    records = points( [ ( 0.5, 0.5 ), ( 1.5, 0.5 ), ( 1.5, 1.5 ), ( 1.5, 1.5 ), ( 0.5, 0.5 ), ( 0.5, 1.5 ) ], t=3 )
+    path = str( tmp_path / 'tiles' )
+
+    with TileWriter( path, 1.0, handles=1 ) as uv3:
+        uv3.write( records )
+        with pytest.raises( ValueError ):
+            uv3.write( records[:4] )
+
+    same( tile( path, '0_0' ), records[:3] )
+    same( tile( path, '1_1' ), records[3:] )
+    assert tiles_load( path )['0_0']['max'][0] == math.radians( 1.5 )
+
+def test_route_a_file_by_chunks( tmp_path ):
+    records = points( routed * 5 )
+    source = str( tmp_path / 'points.uv3' )
+    records.tofile( source )
+    path = str( tmp_path / 'tiles' )
+
+    with TileWriter( path, 0.5, handles=2 ) as uv3:
+        uv3.route( source, chunk=4 )
+
+    routed_records = np.concatenate( [ tile( path, name ) for name in sorted( tiles_load( path ) ) ] )
+    assert len( routed_records ) == len( records )
+    assert sum( entry['count'] for entry in tiles_load( path ).values() ) == len( records )
+    assert tiles_load( path )['1_1']['extent_deg'] == [ 0.5, 0.5, 1.0, 1.0 ]
+
+def test_parts_are_gathered_in_order( tmp_path ):
+    records = points( routed )
+    path = str( tmp_path / 'tiles' )
+    parts = [ tiles_part( path, '%012d' % start ) for start in ( 0, 4 ) ]
+
+    with TileWriter( parts[0], 1.0 ) as uv3:
+        uv3.write( records[:4] )
+    with TileWriter( parts[1], 1.0 ) as uv3:
+        uv3.write( records[4:] )
+
+    # a missing part, as written by an empty range, is left out #
+    assert tiles_gather( path, parts + [ tiles_part( path, 'missing' ) ], 1.0 ) == 3
+    assert not any( os.path.exists( part ) for part in parts )
+
+    same( tile( path, '0_0' ), records[[ 0, 2, 5 ]] )
+    same( tile( path, '1_0' ), records[[ 1, 4 ]] )
+    same( tile( path, '-1_0' ), records[[ 3, 6 ]] )
+
+    entry = tiles_load( path )['0_0']
+    assert entry['count'] == 3
+    assert ( entry['min'][2], entry['max'][2] ) == ( 10.0, 15.0 )
+    assert 'file' in entry
+
+def test_tiles_are_sorted_one_by_one( tmp_path ):
+    rng = np.random.default_rng( 0 )
+    records = points( [ ( x, y ) for x, y in rng.uniform( 0.0, 2.0, ( 500, 2 ) ) ] )
+    path = str( tmp_path / 'tiles' )
+
+    with TileWriter( path, 1.0 ) as uv3:
+        uv3.write( records )
+    tiles_sort( path, 64 * 50 )
+
+    for name in tiles_load( path ):
+        records = tile( path, name )
+        keys = morton_keys( records, morton_bounds( records ) )
+        assert ( keys[1:] >= keys[:-1] ).all()
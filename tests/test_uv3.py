@@ -0,0 +1,151 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+import fourd.uv3
+from fourd.uv3 import UV3Writer, uv3_allocate, uv3_append, uv3_concatenate, uv3_dtype
+
+def points( count, seed=0 ):
+    rng = np.random.default_rng( seed )
+    records = np.zeros( count, dtype=uv3_dtype )
+    for field in ( 'x', 'y', 'z' ):
+        records[field] = rng.normal( 0.0, 1.0, count )
+    for field in ( 't', 'r', 'g', 'b' ):
+        records[field] = rng.integers( 0, 256, count )
+    return records
+
+def read( path ):
+    return np.fromfile( path, dtype=uv3_dtype )
+
+def same( a, b ):
+    np.testing.assert_array_equal( np.asarray( a ).view( 'V28' ), np.asarray( b ).view( 'V28' ) )
+
+@pytest.mark.parametrize( 'count', [ 0, 1, 99, 100, 101, 1050 ] )
+def test_write_close_and_read_back( tmp_path, count ):
+    records = points( count )
+    path = str( tmp_path / 'points.uv3' )
+
+    # small buffers and queue, so that the writing thread waits for free buffers #
+    with UV3Writer( path, buffer=100, depth=1 ) as uv3:
+        uv3.write( records[:count // 2] )
+        for record in records[count // 2:count // 2 + 10]:
+            uv3.record( *record )
+        uv3.write( records[count // 2 + 10:] )
+
+    assert ( uv3.records, uv3.bytes ) == ( count, count * 28 )
+    same( read( path ), records )
+
+    # closing again does nothing #
+    uv3.close()
+    same( read( path ), records )
+
+def test_write_to_an_opened_stream():
+    records = points( 250 )
+    stream = io.BytesIO()
+    stream.write( b'head' )
+
+    with UV3Writer( stream, buffer=64 ) as uv3:
+        uv3.write( records )
+
+    # the stream is flushed and left open #
+    assert not stream.closed
+    assert stream.getvalue() == b'head' + records.tobytes()
+
+def test_write_parts_at_their_offset( tmp_path ):
+    records = points( 1000 )
+    path = str( tmp_path / 'points.uv3' )
+    uv3_allocate( path, len( records ) )
+    assert os.path.getsize( path ) == 1000 * 28
+
+    # parts written in any order, at the index of their first record #
+    for start, stop in ( ( 600, 1000 ), ( 0, 250 ), ( 250, 600 ) ):
+        with UV3Writer( path, start, buffer=64 ) as uv3:
+            uv3.write( records[start:stop] )
+    same( read( path ), records )
+
+class FailingStream( object ):
+
+    def __init__( self, fail ):
+        self.fail = fail
+        self.written = 0
+
+    def write( self, data ):
+        if self.written >= self.fail:
+            raise OSError( 'no space left' )
+        self.written += 1
+
+    def flush( self ):
+        pass
+
+def test_write_errors_of_the_thread_are_raised():
+    records = points( 1000 )
+
+    uv3 = UV3Writer( FailingStream( 2 ), buffer=100, depth=1 )
+    with pytest.raises( OSError, match='no space left' ):
+        uv3.write( records )
+        uv3.close()
+
+    # the thread is stopped by closing, which raises the error again #
+    with pytest.raises( OSError ):
+        uv3.close()
+    assert uv3.thread is None
+    uv3.close()
+
+def test_write_errors_stop_the_writer():
+    with pytest.raises( OSError ):
+        with UV3Writer( FailingStream( 0 ), buffer=10, depth=1 ) as uv3:
+            for index in range( 100 ):
+                uv3.write( points( 10 ) )
+    assert uv3.thread is None
+
+def test_append_and_concatenate( tmp_path ):
+    shards = []
+    parts = []
+    for index, count in enumerate( ( 10, 0, 300, 7 ) ):
+        part = points( count, index )
+        path = str( tmp_path / ( 'shard-%d.uv3' % index ) )
+        part.tofile( path )
+        shards.append( path )
+        parts.append( part )
+
+    output = str( tmp_path / 'points.uv3' )
+    uv3_concatenate( output, shards )
+    same( read( output ), np.concatenate( parts ) )
+
+    # appended to an opened stream, after its own content #
+    with open( output, mode='ab' ) as uv3:
+        uv3.write( parts[3].tobytes() )
+        uv3_concatenate( uv3, shards[:1] )
+    same( read( output ), np.concatenate( parts + [ parts[3], parts[0] ] ) )
+
+def copy_failing( *args ):
+    raise OSError( 'not supported' )
+
+@pytest.mark.parametrize( 'fallback', [ 'sendfile', 'user space' ] )
+def test_append_fallbacks( tmp_path, monkeypatch, fallback ):
+    records = points( 500 )
+    source = str( tmp_path / 'source.uv3' )
+    records.tofile( source )
+
+    # kernel copies missing or failing #
+    monkeypatch.delattr( fourd.uv3.os, 'copy_file_range', raising=False )
+    if fallback == 'user space':
+        monkeypatch.setattr( fourd.uv3.os, 'sendfile', copy_failing )
+
+    output = str( tmp_path / 'points.uv3' )
+    with open( output, mode='wb' ) as uv3, open( source, mode='rb' ) as stream:
+        uv3.write( b'x' * 28 )
+        uv3_append( uv3, stream )
+    assert open( output, mode='rb' ).read() == b'x' * 28 + records.tobytes()
+
+def test_append_to_a_stream_without_file( tmp_path ):
+    records = points( 100 )
+    source = str( tmp_path / 'source.uv3' )
+    records.tofile( source )
+
+    stream = io.BytesIO()
+    with open( source, mode='rb' ) as part:
+        uv3_append( stream, part )
+    assert stream.getvalue() == records.tobytes()
@@ -0,0 +1,146 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from fourd.uv3 import UV3Writer, uv3_dtype
+from fourd.uv3z import UV3ZReader, UV3ZWriter, uv3z_check, uv3z_compress, uv3z_decompress, uv3z_delta, uv3z_header, uv3z_path, uv3z_shuffle, uv3z_trailer, uv3z_writer
+
+def points( count, seed=0 ):
+    rng = np.random.default_rng( seed )
+    records = np.zeros( count, dtype=uv3_dtype )
+    records['x'] = np.cumsum( rng.normal( 0.0, 1e-7, count ) ) + 0.1
+    records['y'] = np.cumsum( rng.normal( 0.0, 1e-7, count ) ) + 0.8
+    records['z'] = rng.uniform( -10.0, 500.0, count )
+    for field in ( 't', 'r', 'g', 'b' ):
+        records[field] = rng.integers( 0, 256, count )
+    return records
+
+def same( a, b ):
+    # compared bit by bit, so that signed zeros and NaN payloads count #
+    np.testing.assert_array_equal( np.asarray( a ).view( 'V28' ), np.asarray( b ).view( 'V28' ) )
+
+@pytest.mark.parametrize( 'codec', [ 'zlib', 'lzma' ] )
+@pytest.mark.parametrize( 'count', [ 0, 1, 99, 100, 101, 1000 ] )
+def test_round_trip_by_blocks( tmp_path, codec, count ):
+    records = points( count )
+    path = str( tmp_path / 'points.uv3z' )
+
+    with UV3ZWriter( path, codec, block=100, threads=2 ) as uv3:
+        uv3.write( records[:count // 3] )
+        for record in records[count // 3:count // 2]:
+            uv3.record( *record )
+        uv3.write( records[count // 2:] )
+    assert uv3.records == count
+    assert uv3z_check( path )
+
+    with UV3ZReader( path, threads=2 ) as reader:
+        assert len( reader ) == count
+        assert reader.block == 100
+        assert reader.codec == codec
+        assert list( reader.index['records'] ) == [ 100 ] * ( count // 100 ) + ( [ count % 100 ] if count % 100 else [] )
+        same( np.concatenate( list( reader.blocks() ) or [ np.empty( 0, dtype=uv3_dtype ) ] ), records )
+
+        # slices within, across and beyond the blocks #
+        for start, stop in ( ( 0, count ), ( 5, 50 ), ( 95, 205 ), ( 100, 200 ), ( count - 1, count + 10 ), ( 50, 10 ) ):
+            same( reader[start:stop], records[start:stop] )
+
+        with pytest.raises( ValueError ):
+            reader[::2]
+
+@pytest.mark.parametrize( 'filters', [ 0, uv3z_delta, uv3z_shuffle, uv3z_delta | uv3z_shuffle ] )
+def test_filters_keep_the_bits( tmp_path, filters ):
+    records = points( 300 )
+    records['x'][:4] = [ 0.0, -0.0, np.inf, -np.inf ]
+    records['z'][10] = np.nan
+    path = str( tmp_path / 'points.uv3z' )
+
+    with UV3ZWriter( path, block=64, filters=filters ) as uv3:
+        uv3.write( records )
+
+    with UV3ZReader( path ) as reader:
+        assert reader.filters == filters
+        same( reader[0:len( reader )], records )
+
+def test_layout_and_stream_output( tmp_path ):
+    records = points( 250 )
+    stream = io.BytesIO()
+
+    with UV3ZWriter( stream, block=100 ) as uv3:
+        uv3.write( records )
+    data = stream.getvalue()
+    assert not stream.closed
+
+    # header, blocks, index of three blocks and trailer #
+    offset, blocks, count, magic = uv3z_trailer.unpack( data[-uv3z_trailer.size:] )
+    assert ( blocks, count, magic ) == ( 3, 250, b'UV3I' )
+    assert data[:4] == b'UV3Z'
+    assert offset > uv3z_header.size
+    assert len( data ) == offset + 3 * 20 + uv3z_trailer.size
+
+    path = tmp_path / 'points.uv3z'
+    path.write_bytes( data )
+    with UV3ZReader( str( path ) ) as reader:
+        same( reader[0:250], records )
+
+def test_truncated_and_foreign_files( tmp_path ):
+    records = points( 10 )
+    plain = str( tmp_path / 'points.uv3' )
+    records.tofile( plain )
+    assert not uv3z_check( plain )
+    with pytest.raises( ValueError ):
+        UV3ZReader( plain )
+
+    path = tmp_path / 'points.uv3z'
+    with UV3ZWriter( str( path ) ) as uv3:
+        uv3.write( records )
+    path.write_bytes( path.read_bytes()[:-1] )
+    with pytest.raises( ValueError ):
+        UV3ZReader( str( path ) )
+
+def test_unknown_codec( tmp_path ):
+    with pytest.raises( ValueError ):
+        UV3ZWriter( str( tmp_path / 'points.uv3z' ), 'bzip2' )
+
+@pytest.mark.parametrize( 'codec', [ 'zlib', 'lzma' ] )
+def test_compress_and_decompress_files( tmp_path, codec ):
+    records = points( 3000 )
+    plain = str( tmp_path / 'points.uv3' )
+    packed = str( tmp_path / 'points.uv3z' )
+    unpacked = str( tmp_path / 'unpacked.uv3' )
+    records.tofile( plain )
+
+    count, size = uv3z_compress( plain, packed, codec, remove=False )
+    assert count == 3000
+    assert size == os.path.getsize( packed ) < os.path.getsize( plain )
+    assert os.path.exists( plain )
+
+    uv3z_decompress( packed, unpacked )
+    with open( plain, 'rb' ) as a, open( unpacked, 'rb' ) as b:
+        assert a.read() == b.read()
+
+    uv3z_compress( plain, packed, codec )
+    assert not os.path.exists( plain )
+
+def test_compress_empty_file( tmp_path ):
+    plain = tmp_path / 'empty.uv3'
+    plain.write_bytes( b'' )
+    packed = str( tmp_path / 'empty.uv3z' )
+
+    assert uv3z_compress( str( plain ), packed )[0] == 0
+    uv3z_decompress( packed, str( plain ) )
+    assert plain.read_bytes() == b''
+
+def test_writer_follows_the_extension( tmp_path ):
+    assert uv3z_path( 'points.uv3z' )
+    assert not uv3z_path( 'points.uv3' )
+    assert not uv3z_path( None )
+
+    records = points( 50 )
+    for name, kind in ( ( 'points.uv3', UV3Writer ), ( 'points.uv3z', UV3ZWriter ) ):
+        path = str( tmp_path / name )
+        with uv3z_writer( path ) as uv3:
+            assert isinstance( uv3, kind )
+            uv3.write( records )
+        assert uv3z_check( path ) == ( kind is UV3ZWriter )